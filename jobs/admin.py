@@ -1,11 +1,18 @@
 from django.contrib import admin
-from .models import UserProfile, JobPost
+from django.db.models import BooleanField, ExpressionWrapper, Q
+from django.http import Http404, HttpResponse
+from django.urls import path, reverse
+from django.utils.html import format_html, format_html_join
+
+from .models import UserProfile, JobPost, RequestProfile
+from .profiling import stats_report
 
 
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
 	list_display = ("user", "role")
 	search_fields = ("user__username", "user__email", "role")
+	list_select_related = ("user",)
 
 
 @admin.register(JobPost)
@@ -13,3 +20,64 @@ class JobPostAdmin(admin.ModelAdmin):
 	list_display = ("title", "company", "employer", "created_at")
 	search_fields = ("title", "company", "employer__username")
 	list_filter = ("created_at",)
+	list_select_related = ("employer",)
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+	"""Read-only view of captured requests, with their profiles as .pstats downloads."""
+	list_display = ("created_at", "reason", "method", "path", "status_code", "duration_ms", "db_queries", "pstats")
+	list_filter = ("reason", "endpoint", "method")
+	search_fields = ("path", "endpoint")
+	exclude = ("stats", "queries")
+	readonly_fields = ("pstats", "sql_log", "profile")
+
+	def get_queryset(self, request):
+		# The list never shows the profile blobs or SQL logs, which can be large.
+		queryset = super().get_queryset(request).annotate(
+			profiled=ExpressionWrapper(Q(stats__isnull=False), output_field=BooleanField()),
+		)
+		if request.resolver_match and request.resolver_match.url_name.endswith("changelist"):
+			queryset = queryset.defer("stats", "queries")
+		return queryset
+
+	def get_urls(self):
+		return [
+			path("<int:pk>/pstats/", self.admin_site.admin_view(self.download_pstats), name="jobs_requestprofile_pstats"),
+			*super().get_urls(),
+		]
+
+	def download_pstats(self, request, pk):
+		if not self.has_view_permission(request):
+			raise Http404
+		captured = RequestProfile.objects.filter(pk=pk).values_list("stats", flat=True).first()
+		if not captured:
+			raise Http404("No profile was recorded for this request.")
+		response = HttpResponse(bytes(captured), content_type="application/octet-stream")
+		response["Content-Disposition"] = f'attachment; filename="request-{pk}.pstats"'
+		return response
+
+	@admin.display(description="Profile file")
+	def pstats(self, obj):
+		if obj.profiled:
+			return format_html('<a href="{}">request-{}.pstats</a>', reverse("admin:jobs_requestprofile_pstats", args=[obj.pk]), obj.pk)
+		return "-"
+
+	@admin.display(description="SQL")
+	def sql_log(self, obj):
+		return format_html(
+			"<table>{}</table>",
+			format_html_join("", "<tr><td>{}&nbsp;ms</td><td><code>{}</code></td></tr>", ((ms, sql) for sql, ms in obj.queries)),
+		)
+
+	@admin.display(description="Profile (cumulative time)")
+	def profile(self, obj):
+		if not obj.stats:
+			return "-"
+		return format_html("<pre>{}</pre>", stats_report(bytes(obj.stats)))
+
+	def has_add_permission(self, request):
+		return False
+
+	def has_change_permission(self, request, obj=None):
+		return False
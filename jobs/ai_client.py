@@ -0,0 +1,256 @@
+"""Resilient access to the Gemini model.
+
+Every call runs on a small shared thread pool with a per-call timeout. A
+process-wide semaphore caps in-flight model calls, failed attempts are retried
+with jittered exponential backoff (timed-out ones are not, as they may still be
+running), and a circuit breaker, fed one outcome per request, fails fast while
+the provider is degraded. Callers treat :class:`AIServiceUnavailable` as the signal
+to fall back to the local ranking.
+"""
+import asyncio
+import importlib
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+
+class AIServiceUnavailable(Exception):
+	pass
+
+
+class CircuitOpenError(AIServiceUnavailable):
+	pass
+
+
+class CircuitBreaker:
+	"""Opens after ``failure_threshold`` consecutive failures and lets a single
+	probe through once ``reset_timeout`` seconds have passed."""
+	CLOSED = "closed"
+	OPEN = "open"
+	HALF_OPEN = "half_open"
+
+	def __init__(self, failure_threshold=5, reset_timeout=30.0):
+		self.failure_threshold = failure_threshold
+		self.reset_timeout = reset_timeout
+		self.state = self.CLOSED
+		self.failures = 0
+		self.opened_at = 0.0
+		self._lock = threading.Lock()
+
+	def allow(self):
+		with self._lock:
+			if self.state == self.CLOSED:
+				return True
+			if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+				self.state = self.HALF_OPEN
+				return True
+			return False
+
+	def record_success(self):
+		with self._lock:
+			self.state = self.CLOSED
+			self.failures = 0
+
+	def record_failure(self):
+		with self._lock:
+			self.failures += 1
+			if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+				self.state = self.OPEN
+				self.opened_at = time.monotonic()
+
+
+_genai_clients = {}  # (module path, api key) -> (genai module, None), for clients that loaded
+_genai_lock = threading.Lock()
+
+
+def _get_genai_client():
+	"""Import and configure the google.generativeai client, once per process and key.
+
+	Returns (genai_module, None) on success or (None, error_message) on failure.
+	This keeps import/configuration lazy so management commands (migrate, makemigrations)
+	don't crash if the optional dependency is missing or not configured, and don't pay
+	for importing it. A loaded client is remembered per module path and API key; a
+	failure is not, so the next call tries again.
+	AI_GENAI_MODULE may point at a stand-in such as ``jobs.fake_genai``.
+	"""
+	module_path = getattr(settings, "AI_GENAI_MODULE", "google.generativeai")
+	api_key = os.environ.get("GEMINI_API_KEY") or os.environ.get("GEMINI_APIKEY")
+	key = (module_path, api_key)
+	outcome = _genai_clients.get(key)
+	if outcome is None:
+		with _genai_lock:
+			outcome = _genai_clients.get(key)
+			if outcome is None:
+				outcome = _load_genai(module_path, api_key)
+				if outcome[0] is not None:
+					_genai_clients[key] = outcome
+	return outcome
+
+
+def _load_genai(module_path, api_key):
+	try:
+		genai = importlib.import_module(module_path)  # imported lazily
+	except Exception:
+		return None, f"{module_path} not installed"
+
+	if not api_key:
+		return None, "GEMINI_API_KEY not set in environment"
+
+	try:
+		# configure may raise if the client API changes; surface that message
+		genai.configure(api_key=api_key)
+	except Exception as e:
+		return None, f"Error configuring Gemini API: {e}"
+
+	return genai, None
+
+
+def preload():
+	"""Import and configure the model SDK ahead of the first request (see jobs.startup)."""
+	_get_genai_client()
+
+
+class GeminiClient:
+	def __init__(self, genai, model_name="gemini-pro", timeout=15.0, max_retries=2, backoff=0.5, breaker=None):
+		self.genai = genai
+		self.model_name = model_name
+		self.timeout = timeout
+		self.max_retries = max_retries
+		self.backoff = backoff
+		self.breaker = breaker or _breaker
+
+	def _call(self, prompt):
+		response = self.genai.GenerativeModel(self.model_name).generate_content(prompt)
+		return getattr(response, "text", str(response))
+
+	def _submit(self, prompt):
+		if not _in_flight.acquire(blocking=False):
+			raise AIServiceUnavailable("Too many in-flight AI requests")
+		try:
+			future = _get_executor().submit(self._call, prompt)
+		except Exception:
+			_in_flight.release()
+			raise
+		# The permit is returned when the call finishes or is cancelled before it
+		# starts; a timed-out call that is still running keeps it until it ends.
+		future.add_done_callback(_release_permit)
+		return future
+
+	def _delay(self, attempt):
+		return self.backoff * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+
+	def _begin(self):
+		if not self.breaker.allow():
+			raise CircuitOpenError("AI service circuit is open")
+
+	def _failed(self, error, attempts):
+		# One failed request counts once towards opening the circuit, however many attempts it made.
+		self.breaker.record_failure()
+		return AIServiceUnavailable(f"AI request failed after {attempts} attempts: {error!r}")
+
+	def generate(self, prompt):
+		"""Return the model's response text.
+
+		Each attempt waits at most ``timeout``. Errors are retried; a timeout is not,
+		since the timed-out call may still be running and holding its permit.
+		"""
+		self._begin()
+		error = None
+		for attempt in range(1, self.max_retries + 2):
+			if attempt > 1:
+				time.sleep(self._delay(attempt - 1))
+			try:
+				future = self._submit(prompt)
+			except AIServiceUnavailable as exc:
+				error = exc
+				break
+			try:
+				text = future.result(timeout=self.timeout)
+			except TimeoutError as exc:
+				future.cancel()  # frees the permit if the call never started
+				error = exc
+				break
+			except Exception as exc:
+				error = exc
+				continue
+			self.breaker.record_success()
+			return text
+		raise self._failed(error, attempt) from error
+
+	async def agenerate(self, prompt):
+		"""Async variant of :meth:`generate` that never blocks the event loop."""
+		self._begin()
+		error = None
+		for attempt in range(1, self.max_retries + 2):
+			if attempt > 1:
+				await asyncio.sleep(self._delay(attempt - 1))
+			try:
+				future = self._submit(prompt)
+			except AIServiceUnavailable as exc:
+				error = exc
+				break
+			try:
+				# On timeout wait_for cancels the call if it has not started yet.
+				text = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+			except TimeoutError as exc:
+				error = exc
+				break
+			except Exception as exc:
+				error = exc
+				continue
+			self.breaker.record_success()
+			return text
+		raise self._failed(error, attempt) from error
+
+
+_max_concurrency = getattr(settings, "AI_MAX_CONCURRENCY", 8)
+_in_flight = threading.BoundedSemaphore(_max_concurrency)
+_breaker = CircuitBreaker(
+	failure_threshold=getattr(settings, "AI_CIRCUIT_FAILURE_THRESHOLD", 5),
+	reset_timeout=getattr(settings, "AI_CIRCUIT_RESET_TIMEOUT", 30.0),
+)
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _release_permit(future):
+	_in_flight.release()
+
+
+def _get_executor():
+	global _executor
+	if _executor is None:
+		with _executor_lock:
+			if _executor is None:
+				_executor = ThreadPoolExecutor(max_workers=_max_concurrency, thread_name_prefix="gemini")
+	return _executor
+
+
+def get_client():
+	"""Return (GeminiClient, None), or (None, error_message) when the SDK is unavailable."""
+	genai, error = _get_genai_client()
+	if genai is None:
+		return None, error
+	return GeminiClient(
+		genai,
+		model_name=getattr(settings, "AI_MODEL_NAME", "gemini-pro"),
+		timeout=getattr(settings, "AI_REQUEST_TIMEOUT", 15.0),
+		max_retries=getattr(settings, "AI_MAX_RETRIES", 2),
+		backoff=getattr(settings, "AI_RETRY_BACKOFF", 0.5),
+	), None
+
+
+def request_budget():
+	"""Most seconds a :meth:`GeminiClient.generate` call can take with the configured timeout and retries."""
+	timeout = getattr(settings, "AI_REQUEST_TIMEOUT", 15.0)
+	retries = getattr(settings, "AI_MAX_RETRIES", 2)
+	backoff = getattr(settings, "AI_RETRY_BACKOFF", 0.5)
+	return (retries + 1) * timeout + sum(backoff * 2 ** attempt * 1.5 for attempt in range(retries))
+
+
+def circuit_state():
+	return _breaker.state
@@ -1,32 +1,133 @@
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.db import transaction
 from rest_framework import authentication, exceptions
-import firebase_admin
-from firebase_admin import auth as fb_auth, credentials
+from . import metrics
+from .cache import BoundedCache, bump_version, get_version
 from .models import UserProfile
+import copy
+import hashlib
 import os
+import threading
+import time
+
+# firebase_admin (and the google-auth stack under it) is imported on first use, so
+# management commands and worker boots that never verify a token don't pay for it.
+fb_auth = None
+_firebase_lock = threading.Lock()
+
+
+def firebase_auth():
+	"""The ``firebase_admin.auth`` module, imported once per process."""
+	global fb_auth
+	if fb_auth is None:
+		with _firebase_lock:
+			if fb_auth is None:
+				from firebase_admin import auth
+				fb_auth = auth
+	return fb_auth
+
+
+def _cert_path():
+	candidates = [getattr(settings, 'FIREBASE_CERT_PATH', None), *getattr(settings, 'FIREBASE_CERT_CANDIDATES', ())]
+	return next((str(path) for path in candidates if path and os.path.isfile(path)), None)
 
 
 def ensure_firebase_initialized():
+	import firebase_admin
 	if firebase_admin._apps:
 		return
-	cert_path = getattr(settings, 'FIREBASE_CERT_PATH', None)
-	if not cert_path or not os.path.isfile(cert_path):
-		raise exceptions.AuthenticationFailed('Server auth not configured')
-	cred = credentials.Certificate(cert_path)
-	firebase_admin.initialize_app(cred)
+	with _firebase_lock:
+		if firebase_admin._apps:
+			return
+		cert_path = _cert_path()
+		if not cert_path:
+			raise exceptions.AuthenticationFailed('Server auth not configured')
+		from firebase_admin import credentials
+		firebase_admin.initialize_app(credentials.Certificate(cert_path))
+
+
+def preload():
+	"""Import and initialize Firebase ahead of the first request (see jobs.startup)."""
+	firebase_auth()
+	try:
+		ensure_firebase_initialized()
+	except exceptions.AuthenticationFailed:
+		pass  # not configured here; requests report it as before
+
+
+# Verified token claims, keyed by a hash of the raw token and kept no longer than its exp claim.
+_token_cache = BoundedCache(getattr(settings, 'FIREBASE_TOKEN_CACHE_SIZE', 1024))
+# uid -> (version, User, UserProfile), so repeated requests skip the get_or_create upserts.
+# Entries are checked against a per-user counter in the shared version cache, which
+# invalidate_user() bumps, so a role change made through any worker applies at once.
+_user_cache = BoundedCache(getattr(settings, 'FIREBASE_USER_CACHE_SIZE', 1024))
+
+
+def verify_token(id_token):
+	"""Verify a Firebase ID token, reusing the claims of recently verified tokens."""
+	key = hashlib.sha256(id_token.encode()).hexdigest()
+	decoded = _token_cache.get(key)
+	if decoded is not None:
+		return decoded
+
+	ensure_firebase_initialized()
+	decoded = firebase_auth().verify_id_token(id_token)
+	expires_at = decoded.get("exp")
+	if expires_at:
+		_token_cache.set(key, decoded, expires_at)
+	return decoded
+
+
+def _user_version_key(uid):
+	return f"auth:user:{uid}:version"
+
+
+def get_user_and_profile(uid, email=""):
+	ttl = getattr(settings, 'FIREBASE_USER_CACHE_TTL', 300)
+	version = get_version(_user_version_key(uid), timeout=ttl)
+	cached = _user_cache.get(uid)
+	if cached is None or cached[0] != version:
+		user, _ = User.objects.get_or_create(username=uid, defaults={"email": email})
+		profile, _ = UserProfile.objects.get_or_create(user=user)
+		cached = (version, user, profile)
+		_user_cache.set(uid, cached, time.time() + ttl)
+
+	# Hand each request its own copies so concurrent requests never share model instances.
+	user, profile = copy.copy(cached[1]), copy.copy(cached[2])
+	user.profile = profile
+	return user, profile
+
+
+def invalidate_user(uid):
+	"""Drop the cached user and profile in every process once the change is committed.
+
+	Bumping earlier would let another worker cache the old row under the new version.
+	"""
+	def invalidate():
+		_user_cache.pop(uid)
+		bump_version(_user_version_key(uid), timeout=getattr(settings, 'FIREBASE_USER_CACHE_TTL', 300))
+	transaction.on_commit(invalidate)
+
+
+def clear_auth_caches():
+	_token_cache.clear()
+	_user_cache.clear()
 
 
 class FirebaseAuthentication(authentication.BaseAuthentication):
 	def authenticate(self, request):
+		with metrics.timed("auth"):
+			return self._authenticate(request)
+
+	def _authenticate(self, request):
 		auth_header = request.META.get("HTTP_AUTHORIZATION", "")
 		if not auth_header.startswith("Bearer "):
 			return None
 
 		id_token = auth_header.split(" ", 1)[1]
 		try:
-			ensure_firebase_initialized()
-			decoded = fb_auth.verify_id_token(id_token)
+			decoded = verify_token(id_token)
 		except exceptions.AuthenticationFailed:
 			raise
 		except Exception:
@@ -37,6 +138,5 @@ class FirebaseAuthentication(authentication.BaseAuthentication):
 		if not uid:
 			raise exceptions.AuthenticationFailed("Invalid token payload")
 
-		user, _ = User.objects.get_or_create(username=uid, defaults={"email": email})
-		UserProfile.objects.get_or_create(user=user)
+		user, _ = get_user_and_profile(uid, email)
 		return (user, None)
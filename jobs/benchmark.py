@@ -0,0 +1,496 @@
+"""Reproducible load benchmark against the real URLconf.
+
+:func:`seed` fills a (throwaway) database with deterministic fixture data and
+:func:`run` drives the main endpoints through Django's test client from a pool
+of threads, with Firebase and Gemini replaced by the offline stand-ins in
+:mod:`jobs.testing` and :mod:`jobs.fake_genai`. The report is plain JSON so runs
+from different commits can be diffed or compared with :func:`compare`.
+"""
+import json
+import random
+import re
+import statistics
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import Client
+from rest_framework.renderers import JSONRenderer
+
+from .cache import bump_jobs_version, bump_skills_version
+from .matching import skill_matrix
+from .models import JobPost, Skill, UserProfile
+from .search import get_search_backend
+from .serializers import SUMMARY_FIELDS, JobPostSerializer, serialize_jobs
+from .skill_index import skill_index
+
+WORDS = (
+	"python django react kubernetes data platform backend frontend mobile cloud security "
+	"analytics machine learning devops api design product senior junior remote startup"
+).split()
+LOCATIONS = ["Remote", "Berlin", "London", "New York", "Lagos", "Bangalore", "Toronto", "Sydney"]
+
+_SERVER_TIMING = re.compile(r'(\w+);dur=([\d.]+)(?:;desc="(\d+) queries")?')
+
+
+def seed(jobs=1000, skills=200, users=50, seed=0):
+	"""Create ``users`` job seekers, one employer, ``skills`` skills and ``jobs`` jobs."""
+	rng = random.Random(seed)
+	skill_rows = Skill.objects.bulk_create(Skill(name=f"{rng.choice(WORDS)}-{index}") for index in range(skills))
+	employer = User.objects.create(username="bench-employer", email="employer@bench.local")
+	UserProfile.objects.create(user=employer, role=UserProfile.Role.EMPLOYER)
+
+	seekers = User.objects.bulk_create(
+		User(username=f"bench-seeker-{index}", email=f"seeker{index}@bench.local") for index in range(users)
+	)
+	profiles = UserProfile.objects.bulk_create(
+		UserProfile(user=user, role=UserProfile.Role.JOB_SEEKER) for user in seekers
+	)
+	UserProfile.skills.through.objects.bulk_create(
+		UserProfile.skills.through(userprofile_id=profile.pk, skill_id=skill.pk)
+		for profile in profiles
+		for skill in rng.sample(skill_rows, min(5, len(skill_rows)))
+	)
+
+	add_jobs(employer, skill_rows, jobs, rng)
+
+	# bulk_create fires no signals, so refresh what they would have.
+	bump_jobs_version()
+	bump_skills_version()
+	get_search_backend().rebuild()
+	return seekers
+
+
+def add_jobs(employer, skill_rows, count, rng, batch_size=5000):
+	"""Bulk-insert ``count`` random jobs (2-8 skills each) in batches; fires no signals."""
+	for start in range(0, count, batch_size):
+		job_rows = JobPost.objects.bulk_create(
+			JobPost(
+				employer=employer,
+				title=" ".join(rng.sample(WORDS, 3)).title(),
+				description=" ".join(rng.choices(WORDS, k=60)),
+				location=rng.choice(LOCATIONS),
+				company=f"Company {rng.randrange(100)}",
+				salary=f"{rng.randrange(40, 200)}k",
+				job_type=rng.choice(JobPost.JobType.values),
+				status=JobPost.JobStatus.ACTIVE if rng.random() < 0.8 else JobPost.JobStatus.CLOSED,
+			)
+			for _ in range(min(batch_size, count - start))
+		)
+		JobPost.skills.through.objects.bulk_create(
+			JobPost.skills.through(jobpost_id=job.pk, skill_id=skill.pk)
+			for job in job_rows
+			for skill in rng.sample(skill_rows, min(rng.randint(2, 8), len(skill_rows)))
+		)
+
+
+def scenarios():
+	"""Endpoint name -> callable(client, token, rng) issuing one request."""
+	prefixes = sorted({word[:2] for word in WORDS})
+	return {
+		"jobs_list": lambda client, token, rng: client.get("/api/jobs/"),
+		"jobs_list_summary_gzip": lambda client, token, rng: client.get(
+			"/api/jobs/", {"view": "summary"}, HTTP_ACCEPT_ENCODING="gzip",
+		),
+		"skills_autocomplete": lambda client, token, rng: client.get("/api/skills/", {"prefix": rng.choice(prefixes)}),
+		"me": lambda client, token, rng: client.get("/api/me", HTTP_AUTHORIZATION=f"Bearer {token}"),
+		"ai_recommendations": lambda client, token, rng: client.post(
+			"/ai/recommendations/",
+			{"skills": rng.sample(WORDS, 3), "preferences": {"location": rng.choice(LOCATIONS)}},
+			content_type="application/json",
+			HTTP_AUTHORIZATION=f"Bearer {token}",
+		),
+	}
+
+
+def _percentile(values, fraction):
+	ordered = sorted(values)
+	return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def _summarize(samples, wall):
+	latencies = [sample["ms"] for sample in samples]
+	phases = {}
+	for sample in samples:
+		for phase, ms in sample["phases"].items():
+			phases.setdefault(phase, []).append(ms)
+	queries = [sample["queries"] for sample in samples]
+	return {
+		"requests": len(samples),
+		"errors": sum(1 for sample in samples if sample["status"] >= 400),
+		"throughput_rps": round(len(samples) / wall, 1) if wall else None,
+		"latency_ms": {
+			"mean": round(statistics.fmean(latencies), 2),
+			"p50": round(_percentile(latencies, 0.50), 2),
+			"p95": round(_percentile(latencies, 0.95), 2),
+			"p99": round(_percentile(latencies, 0.99), 2),
+			"max": round(max(latencies), 2),
+		},
+		"queries": {"mean": round(statistics.fmean(queries), 2), "max": max(queries)},
+		"response_bytes": {"mean": round(statistics.fmean(sample["bytes"] for sample in samples))},
+		"phases_ms": {phase: round(statistics.fmean(values), 2) for phase, values in sorted(phases.items())},
+		"responses": {
+			header: counts for header, counts in (
+				("source", _count(sample["source"] for sample in samples)),
+				("cache", _count(sample["cache"] for sample in samples)),
+			) if counts
+		},
+	}
+
+
+def _count(values):
+	counts = {}
+	for value in values:
+		if value:
+			counts[value] = counts.get(value, 0) + 1
+	return counts
+
+
+def _measure(send, client, token, rng):
+	started = time.perf_counter()
+	response = send(client, token, rng)
+	elapsed = (time.perf_counter() - started) * 1000
+	phases, queries = {}, 0
+	for phase, duration, count in _SERVER_TIMING.findall(response.get("Server-Timing", "")):
+		if phase != "total":
+			phases[phase] = float(duration)
+		if count:
+			queries = int(count)
+	return {
+		"ms": elapsed,
+		"status": response.status_code,
+		"bytes": sum(map(len, response.streaming_content)) if response.streaming else len(response.content),
+		"phases": phases,
+		"queries": queries,
+		"source": response.get("X-Recommendations-Source"),
+		"cache": response.get("X-Cache"),
+	}
+
+
+def run(tokens, endpoints=None, requests=200, concurrency=8, warmup=10, seed=0):
+	"""Benchmark each endpoint in turn and return ``{endpoint: summary}``.
+
+	Every request draws its token and parameters from its own seeded RNG, so a
+	run issues the same requests whatever the thread interleaving.
+	"""
+	available = scenarios()
+	local = threading.local()
+
+	def client():
+		if not hasattr(local, "client"):
+			local.client = Client()
+		return local.client
+
+	results = {}
+	for name in endpoints or available:
+		send = available[name]
+		rngs = [random.Random(f"{seed}:{name}:{index}") for index in range(warmup + requests)]
+		picks = [(rng.choice(tokens), rng) for rng in rngs]
+		for token, rng in picks[:warmup]:
+			_measure(send, client(), token, rng)
+		started = time.perf_counter()
+		with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="bench") as pool:
+			samples = list(pool.map(lambda pick: _measure(send, client(), *pick), picks[warmup:]))
+		results[name] = _summarize(samples, time.perf_counter() - started)
+	return results
+
+
+def _grow(rows, rng):
+	"""Add bench jobs until the table holds ``rows`` jobs."""
+	missing = rows - JobPost.objects.count()
+	if missing > 0:
+		add_jobs(User.objects.get(username="bench-employer"), list(Skill.objects.all()), missing, rng)
+		bump_jobs_version()
+
+
+def _timed_get(client, path, params=None):
+	started = time.perf_counter()
+	response = client.get(path, params or {})
+	return (time.perf_counter() - started) * 1000, response
+
+
+def pagination_curve(sizes, samples=15, depth=50, seed=0):
+	"""Page latency of /api/jobs/ as the table grows to each of ``sizes`` rows.
+
+	For each size this times the first page, filtered first pages and the pages
+	reached by following ``next`` cursors ``depth`` times, next to an OFFSET query
+	for the middle of the table. Keyset pages should stay flat where OFFSET grows.
+	"""
+	rng = random.Random(f"{seed}:pagination")
+	client = Client()
+	curve = []
+	for rows in sorted(sizes):
+		_grow(rows, rng)
+		first = [_timed_get(client, "/api/jobs/")[0] for _ in range(samples)]
+		active = [_timed_get(client, "/api/jobs/", {"status": "active"})[0] for _ in range(samples)]
+		filtered = [
+			_timed_get(client, "/api/jobs/", {"status": "active", "job_type": "FULL_TIME"})[0] for _ in range(samples)
+		]
+		deep, url = [], "/api/jobs/"
+		for _ in range(depth):
+			ms, response = _timed_get(client, url)
+			deep.append(ms)
+			url = response.json()["next"]
+			if not url:
+				break
+		middle = JobPost.objects.with_related().order_by("-created_at", "-id")
+		started = time.perf_counter()
+		list(middle[rows // 2:rows // 2 + 20])
+		offset_ms = (time.perf_counter() - started) * 1000
+		curve.append({
+			"rows": rows,
+			"first_page_ms": round(statistics.median(first), 2),
+			"active_page_ms": round(statistics.median(active), 2),
+			"filtered_page_ms": round(statistics.median(filtered), 2),
+			"deep_page_ms": round(statistics.median(deep[-10:]), 2),
+			"pages_walked": len(deep),
+			"offset_middle_ms": round(offset_ms, 2),
+		})
+	return {
+		"curve": curve,
+		# Latency at the largest size relative to the smallest; ~1.0 means flat.
+		"first_page_growth": _growth(curve, "first_page_ms"),
+		"active_page_growth": _growth(curve, "active_page_ms"),
+		"filtered_page_growth": _growth(curve, "filtered_page_ms"),
+		"deep_page_growth": _growth(curve, "deep_page_ms"),
+		"offset_growth": _growth(curve, "offset_middle_ms"),
+	}
+
+
+def _drain(response):
+	size = 0
+	for chunk in response.streaming_content:
+		size += len(chunk)
+	return size
+
+
+def streaming_memory(sizes, seed=0):
+	"""Peak Python heap while streaming every job, compared with rendering them in one list.
+
+	Streamed peaks should stay roughly constant as rows grow, while the buffered
+	render grows linearly. Measured with tracemalloc, so timings are not meaningful here.
+	"""
+	rng = random.Random(f"{seed}:streaming")
+	client = Client()
+	curve = []
+	for rows in sorted(sizes):
+		_grow(rows, rng)
+		peaks = {}
+		for name, render in (
+			("stream_json", lambda: _drain(client.get("/api/jobs/", {"stream": "true"}))),
+			("export_ndjson", lambda: _drain(client.get("/api/jobs/export/"))),
+			("buffered_list", lambda: len(JSONRenderer().render(serialize_jobs(JobPost.objects.with_related())))),
+		):
+			tracemalloc.start()
+			try:
+				body_bytes = render()
+				peaks[name] = tracemalloc.get_traced_memory()[1]
+			finally:
+				tracemalloc.stop()
+		curve.append({
+			"rows": rows,
+			"body_bytes": body_bytes,
+			**{f"{name}_peak_kib": round(peak / 1024) for name, peak in peaks.items()},
+		})
+	return {
+		"curve": curve,
+		"stream_json_growth": _growth(curve, "stream_json_peak_kib"),
+		"export_ndjson_growth": _growth(curve, "export_ndjson_peak_kib"),
+		"buffered_list_growth": _growth(curve, "buffered_list_peak_kib"),
+	}
+
+
+def serializer_speed(rows, repeat=5):
+	"""Time JobPostSerializer against the hand-written serializer on the first ``rows`` jobs.
+
+	Rows are loaded once, so only serialization is measured; each figure is the
+	best of ``repeat`` runs.
+	"""
+	jobs = list(JobPost.objects.with_related().order_by("-created_at", "-id")[:rows])
+	results = {"rows": len(jobs)}
+	for name, render in (
+		("drf_serializer", lambda: JobPostSerializer(jobs, many=True).data),
+		("serialize_jobs", lambda: serialize_jobs(jobs)),
+		("serialize_jobs_summary", lambda: serialize_jobs(jobs, SUMMARY_FIELDS)),
+	):
+		timings = []
+		for _ in range(repeat):
+			started = time.perf_counter()
+			render()
+			timings.append((time.perf_counter() - started) * 1000)
+		results[f"{name}_ms"] = round(min(timings), 2)
+	if results["serialize_jobs_ms"]:
+		results["speedup"] = round(results["drf_serializer_ms"] / results["serialize_jobs_ms"], 1)
+	return results
+
+
+def _ensure_skills(count, rng):
+	"""Add bench skills until the table holds ``count`` skills."""
+	existing = Skill.objects.count()
+	if count > existing:
+		Skill.objects.bulk_create(Skill(name=f"{rng.choice(WORDS)}-{index}") for index in range(existing, count))
+		bump_skills_version()
+
+
+def matching_curve(sizes, skills=5000, seekers=50, page=20, seed=0):
+	"""Skill-matrix rebuild and per-seeker scoring time as the table grows to each of ``sizes`` jobs.
+
+	Jobs added here draw from ``skills`` skills and each seeker has 5 of them.
+	Scoring is timed for every active job (``score_all``) and for one listing page.
+	"""
+	rng = random.Random(f"{seed}:matching")
+	_ensure_skills(skills, rng)
+	skill_ids = list(Skill.objects.values_list("pk", flat=True))
+	profiles = [rng.sample(skill_ids, 5) for _ in range(seekers)]
+	curve = []
+	for rows in sorted(sizes):
+		_grow(rows, rng)
+		skill_matrix.clear()
+		started = time.perf_counter()
+		skill_matrix.rebuild()
+		rebuild_ms = (time.perf_counter() - started) * 1000
+		job_ids = list(JobPost.objects.active().order_by("-created_at", "-id").values_list("pk", flat=True)[:page])
+		timings = {"score_all": [], "score_page": []}
+		for profile in profiles:
+			for name, limit in (("score_all", None), ("score_page", job_ids)):
+				started = time.perf_counter()
+				skill_matrix.scores(profile, limit)
+				timings[name].append((time.perf_counter() - started) * 1000)
+		curve.append({
+			"rows": rows,
+			"active_jobs": len(skill_matrix._current().rows),
+			"skills": len(skill_ids),
+			"rebuild_ms": round(rebuild_ms, 1),
+			**{
+				f"{name}_ms": {"p50": round(_percentile(values, 0.50), 3), "p99": round(_percentile(values, 0.99), 3)}
+				for name, values in timings.items()
+			},
+		})
+	return {"curve": curve}
+
+
+def skill_prefix_latency(skills=100000, lookups=5000, seed=0):
+	"""Latency of skill autocomplete lookups once the table holds ``skills`` skills.
+
+	Times the index rebuild, then ``lookups`` prefix searches (1-4 characters of
+	existing names, limit 10) straight against the index and a sample of them
+	through /api/skills/?prefix=.
+	"""
+	rng = random.Random(f"{seed}:prefix")
+	_ensure_skills(skills, rng)
+	names = list(Skill.objects.values_list("name", flat=True))
+	prefixes = [name[:rng.randint(1, 4)] for name in rng.choices(names, k=lookups)]
+	skill_index.clear()
+	started = time.perf_counter()
+	skill_index.search("")
+	rebuild_ms = (time.perf_counter() - started) * 1000
+
+	index_ms = []
+	for prefix in prefixes:
+		started = time.perf_counter()
+		skill_index.search(prefix, 10)
+		index_ms.append((time.perf_counter() - started) * 1000)
+	client = Client()
+	endpoint_ms = [_timed_get(client, "/api/skills/", {"prefix": prefix})[0] for prefix in prefixes[:500]]
+	return {
+		"skills": len(names),
+		"rebuild_ms": round(rebuild_ms, 1),
+		**{
+			f"{name}_ms": {
+				"p50": round(_percentile(values, 0.50), 4),
+				"p99": round(_percentile(values, 0.99), 4),
+				"max": round(max(values), 4),
+			}
+			for name, values in (("index_lookup", index_ms), ("endpoint", endpoint_ms))
+		},
+	}
+
+
+def _job_payloads(count, skill_names, rng):
+	return [
+		{
+			"title": " ".join(rng.sample(WORDS, 3)).title(),
+			"description": " ".join(rng.choices(WORDS, k=60)),
+			"location": rng.choice(LOCATIONS),
+			"company": f"Company {rng.randrange(100)}",
+			"salary": f"{rng.randrange(40, 200)}k",
+			"type": rng.choice(JobPost.JobType.values),
+			"skills": rng.sample(skill_names, min(rng.randint(2, 8), len(skill_names))),
+		}
+		for _ in range(count)
+	]
+
+
+def bulk_import_speed(token, rows=10000, seed=0):
+	"""Jobs per second imported through POST /api/jobs/bulk/ against one POST /api/jobs/ per job.
+
+	Both paths create ``rows`` jobs with the same fields and existing skills, as
+	the employer whose Firebase ``token`` is given; every job of the per-request
+	path is actually posted.
+	"""
+	rng = random.Random(f"{seed}:bulk")
+	skills = dict(Skill.objects.values_list("name", "pk")[:200])
+	headers = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+	client = Client()
+
+	payloads = _job_payloads(rows, list(skills), rng)
+	max_rows = getattr(settings, "JOBS_BULK_MAX_ROWS", 10000)
+	started = time.perf_counter()
+	for start in range(0, rows, max_rows):
+		response = client.post(
+			"/api/jobs/bulk/", payloads[start:start + max_rows], content_type="application/json", **headers,
+		)
+		if response.status_code != 201 or response.json()["failed"]:
+			raise RuntimeError(f"Bulk import failed: {response.content[:500]!r}")
+	bulk_ms = (time.perf_counter() - started) * 1000
+
+	payloads = _job_payloads(rows, list(skills), rng)
+	started = time.perf_counter()
+	for payload in payloads:
+		payload["skill_ids"] = [skills[name] for name in payload.pop("skills")]
+		response = client.post("/api/jobs/", payload, content_type="application/json", **headers)
+		if response.status_code != 201:
+			raise RuntimeError(f"Job create failed: {response.content[:500]!r}")
+	per_request_ms = (time.perf_counter() - started) * 1000
+
+	return {
+		"rows": rows,
+		"bulk_ms": round(bulk_ms, 1),
+		"bulk_rows_per_s": round(rows / bulk_ms * 1000),
+		"per_request_ms": round(per_request_ms, 1),
+		"per_request_rows_per_s": round(rows / per_request_ms * 1000),
+		"speedup": round(per_request_ms / bulk_ms, 1),
+	}
+
+
+def _growth(curve, field):
+	return round(curve[-1][field] / curve[0][field], 2) if len(curve) > 1 and curve[0][field] else None
+
+
+def compare(report, baseline):
+	"""Relative change of p95 latency and throughput per endpoint against a baseline report."""
+	changes = {}
+	for name, current in report["endpoints"].items():
+		previous = baseline.get("endpoints", {}).get(name)
+		if not previous:
+			continue
+		changes[name] = {
+			"p95_ms": [previous["latency_ms"]["p95"], current["latency_ms"]["p95"]],
+			"p95_change": _ratio(current["latency_ms"]["p95"], previous["latency_ms"]["p95"]),
+			"throughput_change": _ratio(current["throughput_rps"], previous["throughput_rps"]),
+			"queries_mean": [previous["queries"]["mean"], current["queries"]["mean"]],
+			"response_bytes_mean": [previous.get("response_bytes", {}).get("mean"), current["response_bytes"]["mean"]],
+		}
+	return changes
+
+
+def _ratio(current, previous):
+	return round(current / previous - 1, 3) if current and previous else None
+
+
+def load_report(path):
+	with open(path) as handle:
+		return json.load(handle)
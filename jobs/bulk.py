@@ -0,0 +1,141 @@
+"""Batched job import.
+
+Rows are validated a batch at a time. Each batch resolves all its skill names
+through the skill index (creating missing skills with ``bulk_create(ignore_conflicts=True)``)
+and writes its jobs and skill links with ``bulk_create`` inside one transaction.
+``bulk_create`` fires no model signals, so the caches and indexes those signals
+maintain are refreshed once per batch instead. A batch that fails to save is
+rolled back on its own; rows from earlier batches stay imported.
+"""
+import logging
+from collections import defaultdict, deque
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Max
+from django.db.models.functions import Lower
+from rest_framework.exceptions import ValidationError
+
+from .cache import bump_skills_version
+from .models import JobPost, Skill
+from .serializers import JobPostBulkSerializer
+from .signals import jobs_changed
+from .skill_index import normalize_skill_name, skill_index, skill_key
+
+logger = logging.getLogger(__name__)
+
+# Model fields a bulk row can set, used to find inserted rows again.
+_ROW_FIELDS = ("title", "description", "location", "company", "salary", "job_type", "status")
+
+
+def batch_size():
+	return getattr(settings, "JOBS_BULK_BATCH_SIZE", 500)
+
+
+def resolve_skills(names):
+	"""Map skill names to Skill ids, creating any that do not exist yet.
+
+	Names are matched after normalization, so "python " reuses "Python".
+	"""
+	ids = {}
+	missing = {}
+	for name in dict.fromkeys(names):
+		existing = skill_index.find(name)
+		if existing:
+			ids[name] = existing[0]
+		else:
+			missing.setdefault(skill_key(name), []).append(name)
+	if missing:
+		created = [Skill(name=normalize_skill_name(variants[0])) for variants in missing.values()]
+		Skill.objects.bulk_create(created, ignore_conflicts=True)
+		# ignore_conflicts leaves primary keys unset, so read the new rows back;
+		# a conflicting row may differ in case from the name given here.
+		rows = list(
+			Skill.objects.annotate(lower_name=Lower("name"))
+			.filter(lower_name__in=[skill.name.lower() for skill in created])
+			.values_list("id", "name")
+		)
+		# bulk_create fires no signals; index the rows as the Skill signals would, after commit.
+		transaction.on_commit(lambda: skill_index.add(rows, bump_skills_version()))
+		for skill_id, name in rows:
+			for variant in missing.get(skill_key(name), ()):
+				ids[variant] = skill_id
+	return ids
+
+
+def _import_batch(rows, offset, employer):
+	# One serializer validates every row, as ListSerializer does with its child,
+	# so its fields are built once rather than per row.
+	validator = JobPostBulkSerializer()
+	results = []
+	valid = []
+	for index, row in enumerate(rows, start=offset):
+		try:
+			data = dict(validator.run_validation(row))
+		except ValidationError as exc:
+			results.append({"index": index, "status": "error", "errors": exc.detail})
+			continue
+		data["skills"] = list(dict.fromkeys(name for name in data.pop("skills") if name.strip()))
+		valid.append((index, data))
+
+	if valid:
+		with transaction.atomic():
+			skills = resolve_skills(name for _, data in valid for name in data["skills"])
+			last_id = None if connection.features.can_return_rows_from_bulk_insert else _last_id(employer)
+			jobs = JobPost.objects.bulk_create([
+				JobPost(employer=employer, **{key: value for key, value in data.items() if key != "skills"})
+				for _, data in valid
+			])
+			if last_id is not None or any(job.pk is None for job in jobs):
+				_read_back_ids(jobs, employer, last_id or 0)
+			JobPost.skills.through.objects.bulk_create([
+				JobPost.skills.through(jobpost_id=job.pk, skill_id=skill_id)
+				for job, (_, data) in zip(jobs, valid)
+				for skill_id in dict.fromkeys(skills[name] for name in data["skills"])
+			])
+			jobs_changed([job.pk for job in jobs])
+		results.extend({"index": index, "status": "created", "id": job.pk} for job, (index, _) in zip(jobs, valid))
+
+	results.sort(key=lambda result: result["index"])
+	return results
+
+
+def _last_id(employer):
+	return JobPost.objects.filter(employer=employer).aggregate(last=Max("pk"))["last"] or 0
+
+
+def _read_back_ids(jobs, employer, last_id):
+	"""Set the primary keys of just inserted ``jobs`` on backends that do not return them (MySQL)."""
+	ids = defaultdict(deque)
+	inserted = JobPost.objects.filter(employer=employer, pk__gt=last_id).order_by("pk")
+	for pk, *values in inserted.values_list("pk", *_ROW_FIELDS):
+		ids[tuple(values)].append(pk)
+	for job in jobs:
+		matches = ids.get(tuple(getattr(job, name) for name in _ROW_FIELDS))
+		if not matches:
+			raise DatabaseError("Could not read back the ids of inserted jobs.")
+		job.pk = matches.popleft()
+
+
+def _not_imported(rows, offset, message):
+	return [{"index": index, "status": "error", "errors": {"non_field_errors": [message]}} for index in range(offset, offset + len(rows))]
+
+
+def import_jobs(rows, employer):
+	"""Create jobs from ``rows`` and return one result entry per row, in input order.
+
+	When a batch cannot be saved, its rows and every later row are reported as
+	errors and the batches imported before it are kept.
+	"""
+	size = batch_size()
+	results = []
+	for offset in range(0, len(rows), size):
+		batch = rows[offset:offset + size]
+		try:
+			results.extend(_import_batch(batch, offset, employer))
+		except DatabaseError:
+			logger.exception("Bulk import of rows %d-%d failed", offset, offset + len(batch) - 1)
+			results.extend(_not_imported(batch, offset, "Could not be saved."))
+			results.extend(_not_imported(rows[offset + size:], offset + size, "Not imported: an earlier batch failed."))
+			break
+	return results
@@ -0,0 +1,209 @@
+"""Caching helpers.
+
+``BoundedCache`` is a per-process LRU for hot in-memory lookups. The rest of
+the module is the recommendation response cache built on Django's cache framework.
+
+Entries live in the ``RECOMMENDATION_CACHE_ALIAS`` cache, whose backend applies
+the TTL (``TIMEOUT``) and size-bounded LRU eviction (``MAX_ENTRIES``). Keys embed
+the active job-set version.
+
+Change counters (job set, skills, application counts) live in the
+``VERSION_CACHE_ALIAS`` cache so that recommendation churn never evicts them.
+Every process must see the same counters, so with more than one worker that
+cache has to be shared (Redis or Memcached, whose ``incr`` is atomic); see
+``jobs.checks``. Hit/miss counters stay in the per-process default cache.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .ranking import UNSET_PREFERENCES
+
+
+class BoundedCache:
+	"""Thread-safe LRU mapping whose entries may expire at an absolute timestamp."""
+
+	def __init__(self, max_size):
+		self.max_size = max_size
+		self._data = OrderedDict()
+		self._lock = threading.Lock()
+
+	def get(self, key):
+		with self._lock:
+			entry = self._data.get(key)
+			if entry is None:
+				return None
+			value, expires_at = entry
+			if expires_at <= time.time():
+				del self._data[key]
+				return None
+			self._data.move_to_end(key)
+			return value
+
+	def set(self, key, value, expires_at=float("inf")):
+		if self.max_size <= 0 or expires_at <= time.time():
+			return
+		with self._lock:
+			self._data[key] = (value, expires_at)
+			self._data.move_to_end(key)
+			while len(self._data) > self.max_size:
+				self._data.popitem(last=False)
+
+	def pop(self, key):
+		with self._lock:
+			self._data.pop(key, None)
+
+	def clear(self):
+		with self._lock:
+			self._data.clear()
+
+	def __len__(self):
+		return len(self._data)
+
+
+JOBS_VERSION_KEY = "jobs:version"
+SKILLS_VERSION_KEY = "skills:version"
+APPLICATIONS_VERSION_KEY = "jobs:applications:version"
+HITS_KEY = "recommendations:hits"
+MISSES_KEY = "recommendations:misses"
+
+
+def _entries():
+	return caches[getattr(settings, "RECOMMENDATION_CACHE_ALIAS", "recommendations")]
+
+
+def _meta():
+	return caches["default"]
+
+
+def _versions():
+	return caches[getattr(settings, "VERSION_CACHE_ALIAS", "versions")]
+
+
+def _incr(cache, key):
+	try:
+		return cache.incr(key)
+	except ValueError:
+		cache.add(key, 0, timeout=None)
+		return cache.incr(key)
+
+
+def get_version(key, timeout=None):
+	"""Current value of a shared change counter.
+
+	A counter may be given a ``timeout`` when losing it is harmless, e.g. per-user counters.
+	"""
+	cache = _versions()
+	version = cache.get(key)
+	if version is None:
+		# Seed from the clock so a lost counter never reuses an older version.
+		cache.add(key, time.time_ns(), timeout=timeout)
+		version = cache.get(key)
+	return version
+
+
+def bump_version(key, timeout=None):
+	"""Advance a change counter and return its new value; the previous one was ``value - 1``."""
+	cache = _versions()
+	cache.set(f"{key}:changed_at", time.time(), timeout=timeout)
+	try:
+		return cache.incr(key)
+	except ValueError:
+		get_version(key, timeout)
+		return cache.incr(key)
+
+
+# Changed ids are kept per version for this long, and at most this many versions are looked back.
+CHANGES_TIMEOUT = 3600
+MAX_CHANGES_LOOKBACK = 100
+
+
+def bump_version_with_changes(key, ids):
+	"""Advance a change counter, recording the ``ids`` that changed under the new version."""
+	version = bump_version(key)
+	_versions().set(f"{key}:{version}:changes", sorted(ids), timeout=CHANGES_TIMEOUT)
+	return version
+
+
+def get_changes(key, since, until):
+	"""Ids changed by versions after ``since`` up to ``until``, or None when some are unknown."""
+	if not isinstance(since, int) or not 0 <= until - since <= MAX_CHANGES_LOOKBACK:
+		return None
+	keys = [f"{key}:{version}:changes" for version in range(since + 1, until + 1)]
+	found = _versions().get_many(keys)
+	if len(found) != len(keys):
+		return None  # expired, or bumped without recording changes
+	return {item for ids in found.values() for item in ids}
+
+
+def get_changed_at(key):
+	"""Unix time of the last bump of a change counter, or None if unknown."""
+	return _versions().get(f"{key}:changed_at")
+
+
+def get_jobs_version():
+	"""Current version of the job set."""
+	return get_version(JOBS_VERSION_KEY)
+
+
+def bump_jobs_version():
+	"""Invalidate every cached recommendation after the job set changed."""
+	return bump_version(JOBS_VERSION_KEY)
+
+
+def get_skills_version():
+	return get_version(SKILLS_VERSION_KEY)
+
+
+def bump_skills_version():
+	return bump_version(SKILLS_VERSION_KEY)
+
+
+def _normalize_preferences(preferences):
+	normalized = {}
+	for key, value in (preferences or {}).items():
+		value = " ".join(str(value).split()).lower() if value is not None else ""
+		if value not in UNSET_PREFERENCES:
+			normalized[str(key)] = value
+	return normalized
+
+
+def recommendation_key(skills, preferences, *extra):
+	"""Cache key for a seeker's request against the current job-set version."""
+	payload = {
+		"skills": sorted({" ".join(str(skill).split()).lower() for skill in skills or ()}),
+		"preferences": _normalize_preferences(preferences),
+		"extra": extra,
+	}
+	digest = hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+	return f"recommendations:{get_jobs_version()}:{digest}"
+
+
+def get_recommendations(key):
+	"""Cached ``(jobs, source)`` for ``key``, or ``None`` on a miss."""
+	entry = _entries().get(key)
+	_incr(_meta(), MISSES_KEY if entry is None else HITS_KEY)
+	return (entry["jobs"], entry["source"]) if entry is not None else None
+
+
+def set_recommendations(key, jobs, source):
+	"""Cache ``jobs`` together with where they came from ("ai" or "local")."""
+	_entries().set(key, {"jobs": jobs, "source": source})
+
+
+def cache_stats():
+	meta = _meta()
+	hits = meta.get(HITS_KEY, 0)
+	misses = meta.get(MISSES_KEY, 0)
+	total = hits + misses
+	return {
+		"hits": hits,
+		"misses": misses,
+		"hit_ratio": (hits / total) if total else 0.0,
+		"jobs_version": get_jobs_version(),
+	}
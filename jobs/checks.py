@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Backends whose data is private to one process.
+_PROCESS_LOCAL = (
+	"django.core.cache.backends.locmem.LocMemCache",
+	"django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_version_cache(app_configs, **kwargs):
+	"""Change counters must be shared, or other workers keep serving stale ETags, recommendations and snapshots."""
+	alias = getattr(settings, "VERSION_CACHE_ALIAS", "versions")
+	backend = settings.CACHES.get(alias, {}).get("BACKEND")
+	if backend in _PROCESS_LOCAL:
+		return [Error(
+			f"The '{alias}' cache ({backend}) is private to each process.",
+			hint=(
+				"Set VERSION_CACHE_BACKEND and VERSION_CACHE_LOCATION to a shared Redis or Memcached cache. "
+				"Single-process deployments may silence jobs.E001."
+			),
+			id="jobs.E001",
+		)]
+	return []
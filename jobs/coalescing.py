@@ -0,0 +1,87 @@
+"""Coalescing of concurrent identical calls (singleflight).
+
+While a call for a key is running, other callers with the same key wait for it
+and receive its result (or its exception) instead of repeating the work. A
+caller given a ``timeout`` stops waiting after that many seconds and makes the
+call itself, so a stuck leader cannot hold its followers indefinitely.
+Threads and asyncio tasks are coalesced separately, since they cannot wait on
+each other without blocking.
+"""
+import asyncio
+import threading
+
+from . import metrics
+
+
+class _Call:
+	__slots__ = ("done", "result", "error")
+
+	def __init__(self):
+		self.done = threading.Event()
+		self.result = None
+		self.error = None
+
+
+class SingleFlight:
+	def __init__(self, scope):
+		self.scope = scope
+		self._lock = threading.Lock()
+		self._calls = {}
+		self._futures = {}  # (event loop, key) -> future of the running call
+
+	def do(self, key, fn, timeout=None):
+		"""``fn()``, or the result of an identical call already in flight."""
+		with self._lock:
+			call = self._calls.get(key)
+			leader = call is None
+			if leader:
+				call = self._calls[key] = _Call()
+		if not leader:
+			metrics.SHED_REQUESTS.inc(self.scope, "coalesced")
+			if not call.done.wait(timeout):
+				metrics.SHED_REQUESTS.inc(self.scope, "coalesce_timeout")
+				return fn()
+			if call.error is not None:
+				raise call.error
+			return call.result
+
+		try:
+			call.result = fn()
+		except Exception as exc:
+			call.error = exc
+			raise
+		finally:
+			with self._lock:
+				del self._calls[key]
+			call.done.set()
+		return call.result
+
+	async def ado(self, key, fn, timeout=None):
+		"""Async variant of :meth:`do` for a coroutine function ``fn``."""
+		flight = (asyncio.get_running_loop(), key)
+		future = self._futures.get(flight)
+		if future is not None:
+			metrics.SHED_REQUESTS.inc(self.scope, "coalesced")
+			try:
+				return await asyncio.wait_for(asyncio.shield(future), timeout)
+			except TimeoutError:
+				metrics.SHED_REQUESTS.inc(self.scope, "coalesce_timeout")
+				return await fn()
+
+		future = self._futures[flight] = flight[0].create_future()
+		try:
+			result = await fn()
+		except Exception as exc:
+			future.set_exception(exc)
+			future.exception()  # retrieved here, so a lone caller logs no warning
+			raise
+		else:
+			future.set_result(result)
+		finally:
+			del self._futures[flight]
+			if not future.done():
+				future.cancel()
+		return result
+
+
+recommendation_flights = SingleFlight("recommendations")
@@ -0,0 +1,35 @@
+"""HTTP conditional request support (ETag / Last-Modified).
+
+Validators come from cheap sources: shared change counters for collections and
+``updated_at`` for single jobs. A matching ``If-None-Match`` or
+``If-Modified-Since`` is answered with 304 before any serialization happens.
+
+Every worker must read the same counters, so the version cache has to be
+shared between processes (checked by ``jobs.checks``), and counters are only
+bumped once a write has committed, so no worker pairs a new version with old rows.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+def make_etag(request, *parts):
+	"""Strong ETag over the request path and query string plus ``parts``."""
+	digest = hashlib.sha1(repr((request.get_full_path(), parts)).encode()).hexdigest()
+	return f'"{digest}"'
+
+
+def with_validators(response, etag, last_modified=None):
+	response["ETag"] = etag
+	if last_modified:
+		response["Last-Modified"] = http_date(last_modified)
+	return response
+
+
+def not_modified(request, etag, last_modified=None):
+	"""A 304 response carrying the validators when the client's copy is current, else None."""
+	if request.method not in ("GET", "HEAD"):
+		return None
+	response = get_conditional_response(request, etag=etag, last_modified=last_modified and int(last_modified))
+	return with_validators(response, etag, last_modified) if response is not None else None
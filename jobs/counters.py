@@ -0,0 +1,127 @@
+"""Application counting for job posts.
+
+Applies increment ``JobPost.applications_count`` with ``F()`` expressions, so
+concurrent requests never lose an update. With ``JOBS_APPLICATION_COUNT_BUFFERED``
+each process instead accumulates deltas in memory and writes them in a single
+``UPDATE`` at most every ``JOBS_APPLICATION_FLUSH_INTERVAL`` seconds, keeping
+popular postings from becoming a row-lock hotspot. Counts in listings then lag
+by at most that window. Buffered applications are only added, and flushed,
+after the request's transaction commits.
+"""
+import atexit
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Now
+
+from .cache import APPLICATIONS_VERSION_KEY, bump_version_with_changes
+from .models import JobPost
+
+
+def increment(job_id, count=1):
+	"""Atomically add ``count`` applications to a job in the database."""
+	JobPost.objects.filter(pk=job_id).update(applications_count=F("applications_count") + count, updated_at=Now())
+	_bump_after_commit([job_id])
+
+
+def flush_deltas(deltas):
+	"""Apply many per-job deltas in one UPDATE statement."""
+	if not deltas:
+		return
+	JobPost.objects.filter(pk__in=list(deltas)).update(
+		applications_count=F("applications_count") + Case(
+			*(When(pk=job_id, then=Value(delta)) for job_id, delta in deltas.items()),
+			default=Value(0),
+			output_field=IntegerField(),
+		),
+		updated_at=Now(),
+	)
+	_bump_after_commit(list(deltas))
+
+
+def _bump_after_commit(job_ids):
+	# Readers elsewhere must not see the new version before the new counts; the
+	# recorded ids let them re-read just those jobs' counts.
+	transaction.on_commit(lambda: bump_version_with_changes(APPLICATIONS_VERSION_KEY, job_ids))
+
+
+class BufferedCounter:
+	def __init__(self, flush_interval):
+		self.flush_interval = flush_interval
+		self._lock = threading.Lock()
+		self._deltas = Counter()
+		self._last_flush = time.monotonic()
+		self._flusher = None
+
+	def add(self, job_id, count=1):
+		with self._lock:
+			self._deltas[job_id] += count
+			due = time.monotonic() - self._last_flush >= self.flush_interval
+			if self._flusher is None:
+				self._start_flusher()
+		if due:
+			self.flush()
+
+	def pending(self, job_id):
+		with self._lock:
+			return self._deltas.get(job_id, 0)
+
+	def flush(self):
+		with self._lock:
+			deltas, self._deltas = self._deltas, Counter()
+			self._last_flush = time.monotonic()
+		try:
+			flush_deltas(deltas)
+		except Exception:
+			# Keep the increments for the next flush rather than dropping them.
+			with self._lock:
+				self._deltas.update(deltas)
+			raise
+
+	def _start_flusher(self):
+		# Flushes idle processes too, so counts never lag by more than the window.
+		self._flusher = threading.Thread(target=self._run_flusher, name="application-counter", daemon=True)
+		self._flusher.start()
+		atexit.register(self.flush)
+
+	def _run_flusher(self):
+		while True:
+			time.sleep(self.flush_interval)
+			try:
+				self.flush()
+			except Exception:
+				pass
+			finally:
+				connection.close()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def _get_buffer():
+	global _buffer
+	if _buffer is None:
+		with _buffer_lock:
+			if _buffer is None:
+				_buffer = BufferedCounter(getattr(settings, "JOBS_APPLICATION_FLUSH_INTERVAL", 5.0))
+	return _buffer
+
+
+def record_application(job_id):
+	"""Count one application, buffered or immediately depending on settings."""
+	if getattr(settings, "JOBS_APPLICATION_COUNT_BUFFERED", False):
+		# Buffered once the application commits, so a rolled-back request adds nothing
+		# and a due flush never writes other requests' deltas in this transaction.
+		transaction.on_commit(lambda: _get_buffer().add(job_id), robust=True)
+	else:
+		increment(job_id)
+
+
+def pending_applications(job_id):
+	"""Applications counted by this process but not yet written to the database."""
+	return _buffer.pending(job_id) if _buffer is not None else 0
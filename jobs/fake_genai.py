@@ -0,0 +1,73 @@
+"""Deterministic stand-in for ``google.generativeai``.
+
+Set ``AI_GENAI_MODULE = "jobs.fake_genai"`` to run recommendations offline. By
+default the model answers with the ids of every job in the prompt, in prompt
+order; :func:`set_behaviour` injects latency, failures or a canned response.
+"""
+import json
+import threading
+import time
+
+_decoder = json.JSONDecoder()
+
+_lock = threading.Lock()
+_state = {"latency": 0.0, "failures": 0, "response": None}
+calls = 0
+
+
+def configure(api_key=None, **kwargs):
+	pass
+
+
+def set_behaviour(latency=0.0, failures=0, response=None):
+	"""Delay every call by ``latency`` seconds, fail the next ``failures`` calls
+	and, when given, answer with ``response`` instead of the prompt's job ids."""
+	global calls
+	with _lock:
+		_state.update(latency=latency, failures=failures, response=response)
+		calls = 0
+
+
+def reset():
+	set_behaviour()
+
+
+def prompt_job_ids(prompt):
+	"""Ids of the first JSON array of job objects embedded in ``prompt``."""
+	start = prompt.find("[")
+	while start != -1:
+		try:
+			value, _ = _decoder.raw_decode(prompt, start)
+		except ValueError:
+			value = None
+		if isinstance(value, list) and value and all(isinstance(item, dict) and "id" in item for item in value):
+			return [item["id"] for item in value]
+		start = prompt.find("[", start + 1)
+	return []
+
+
+class GenerateContentResponse:
+	def __init__(self, text):
+		self.text = text
+
+
+class GenerativeModel:
+	def __init__(self, model_name, **kwargs):
+		self.model_name = model_name
+
+	def generate_content(self, prompt, **kwargs):
+		global calls
+		with _lock:
+			calls += 1
+			latency = _state["latency"]
+			fail = _state["failures"] > 0
+			if fail:
+				_state["failures"] -= 1
+			response = _state["response"]
+		if latency:
+			time.sleep(latency)
+		if fail:
+			raise RuntimeError("Injected Gemini failure")
+		if response is None:
+			response = json.dumps(prompt_job_ids(prompt))
+		return GenerateContentResponse(response)
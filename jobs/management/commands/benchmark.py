@@ -0,0 +1,146 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+
+import django
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+
+from jobs import benchmark, fake_genai, metrics
+from jobs.testing import FakeFirebaseAuth, fake_firebase
+
+
+def _sizes(value):
+	try:
+		sizes = sorted({int(part) for part in value.split(",") if part.strip()})
+	except ValueError:
+		raise argparse.ArgumentTypeError("expected comma-separated row counts")
+	if not sizes or sizes[0] < 1:
+		raise argparse.ArgumentTypeError("expected positive row counts")
+	return sizes
+
+
+def _git_revision():
+	try:
+		return subprocess.run(
+			["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+		).stdout.strip()
+	except (OSError, subprocess.CalledProcessError):
+		return None
+
+
+class Command(BaseCommand):
+	help = (
+		"Seed a throwaway test database and load-test the main endpoints with offline "
+		"Firebase and Gemini stand-ins, reporting throughput, latency percentiles and query counts as JSON."
+	)
+
+	def add_arguments(self, parser):
+		parser.add_argument("--jobs", type=int, default=1000)
+		parser.add_argument("--skills", type=int, default=200)
+		parser.add_argument("--users", type=int, default=50)
+		parser.add_argument("--requests", type=int, default=200, help="Measured requests per endpoint.")
+		parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests per endpoint.")
+		parser.add_argument("--concurrency", type=int, default=8)
+		parser.add_argument("--endpoint", action="append", dest="endpoints", choices=list(benchmark.scenarios()),
+			help="Endpoint to run; repeat for several. Defaults to all.")
+		parser.add_argument("--seed", type=int, default=0)
+		parser.add_argument("--ai-latency", type=float, default=0.05, help="Simulated model latency in seconds.")
+		parser.add_argument("--auth-latency", type=float, default=0.0, help="Simulated token verification latency in seconds.")
+		parser.add_argument("--no-endpoints", action="store_true", help="Skip the endpoint load test, e.g. to only run curves.")
+		parser.add_argument("--pagination-sizes", type=_sizes, default=[],
+			help="Comma-separated table sizes, e.g. 1000,10000,100000,1000000, to measure /api/jobs/ page latency at.")
+		parser.add_argument("--memory-sizes", type=_sizes, default=[],
+			help="Comma-separated table sizes to measure peak memory of the streamed and buffered job lists at.")
+		parser.add_argument("--matching-jobs", type=_sizes, default=[],
+			help="Comma-separated table sizes, e.g. 10000,100000, to time skill-match scoring at.")
+		parser.add_argument("--matching-skills", type=int, default=5000,
+			help="Skills the --matching-jobs curve draws from.")
+		parser.add_argument("--bulk-rows", type=int, default=0,
+			help="Import this many jobs through /api/jobs/bulk/ and, one by one, through /api/jobs/.")
+		parser.add_argument("--prefix-skills", type=int, default=0,
+			help="Grow the skills table to this many rows, e.g. 100000, and time prefix lookups.")
+		parser.add_argument("--serializer-rows", type=int, default=0,
+			help="Time JobPostSerializer against the hand-written serializer on this many jobs.")
+		parser.add_argument("--output", help="Write the JSON report to this file instead of stdout.")
+		parser.add_argument("--baseline", help="Earlier report to compare p95 latency and throughput against.")
+
+	def handle(self, *args, **options):
+		baseline = benchmark.load_report(options["baseline"]) if options["baseline"] else None
+		if options["requests"] < 1 or options["concurrency"] < 1:
+			raise CommandError("--requests and --concurrency must be positive.")
+
+		setup_test_environment()
+		old_config = setup_databases(verbosity=0, interactive=False)
+		api_key = os.environ.get("GEMINI_API_KEY")
+		os.environ["GEMINI_API_KEY"] = api_key or "benchmark"
+		try:
+			# Throttles are off so every measured request reaches the view.
+			with override_settings(AI_GENAI_MODULE="jobs.fake_genai", JOBS_THROTTLE_RATES={}), fake_firebase(FakeFirebaseAuth(latency=options["auth_latency"])) as firebase:
+				for alias in ("default", settings.VERSION_CACHE_ALIAS, settings.RECOMMENDATION_CACHE_ALIAS):
+					caches[alias].clear()
+				fake_genai.set_behaviour(latency=options["ai_latency"])
+				metrics.reset()
+				seekers = benchmark.seed(options["jobs"], options["skills"], options["users"], options["seed"])
+				tokens = [firebase.issue_token(user.username, user.email) for user in seekers]
+				endpoints = {} if options["no_endpoints"] else benchmark.run(
+					tokens,
+					endpoints=options["endpoints"],
+					requests=options["requests"],
+					concurrency=options["concurrency"],
+					warmup=options["warmup"],
+					seed=options["seed"],
+				)
+				curves = {}
+				if options["serializer_rows"]:
+					curves["serializers"] = benchmark.serializer_speed(options["serializer_rows"])
+				if options["bulk_rows"]:
+					employer = firebase.issue_token("bench-employer", "employer@bench.local")
+					curves["bulk_import"] = benchmark.bulk_import_speed(employer, options["bulk_rows"], seed=options["seed"])
+				# Curves grow the table past --jobs, so they run after the endpoint load test.
+				if options["prefix_skills"]:
+					curves["skill_prefix"] = benchmark.skill_prefix_latency(options["prefix_skills"], seed=options["seed"])
+				if options["pagination_sizes"]:
+					curves["pagination"] = benchmark.pagination_curve(options["pagination_sizes"], seed=options["seed"])
+				if options["matching_jobs"]:
+					curves["matching"] = benchmark.matching_curve(
+						options["matching_jobs"], skills=options["matching_skills"], seed=options["seed"],
+					)
+				if options["memory_sizes"]:
+					curves["streaming_memory"] = benchmark.streaming_memory(options["memory_sizes"], seed=options["seed"])
+				vendor = connection.vendor
+		finally:
+			fake_genai.reset()
+			if api_key is None:
+				os.environ.pop("GEMINI_API_KEY", None)
+			teardown_databases(old_config, verbosity=0)
+			teardown_test_environment()
+
+		report = {
+			"meta": {
+				"revision": _git_revision(),
+				"python": platform.python_version(),
+				"django": django.get_version(),
+				"database": vendor,
+				"parameters": {key: options[key] for key in (
+					"jobs", "skills", "users", "requests", "warmup", "concurrency", "seed", "ai_latency", "auth_latency",
+				)},
+			},
+			"endpoints": endpoints,
+			**curves,
+		}
+		if baseline is not None:
+			report["comparison"] = benchmark.compare(report, baseline)
+
+		output = json.dumps(report, indent=2)
+		if options["output"]:
+			with open(options["output"], "w") as handle:
+				handle.write(output + "\n")
+			self.stdout.write(self.style.SUCCESS(f"Wrote benchmark report to {options['output']}"))
+		else:
+			self.stdout.write(output)
@@ -0,0 +1,70 @@
+import json
+import platform
+import statistics
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from jobs import startup
+
+# Imported on first use; a boot that loads them has regressed.
+LAZY_MODULES = ("firebase_admin", "google.generativeai")
+
+
+class Command(BaseCommand):
+	help = (
+		"Boot fresh interpreters under python -X importtime (Django setup plus the URLconf) and report "
+		"import time and the heaviest modules as JSON. Fails when the median exceeds the budget or a "
+		"lazily imported SDK is loaded at boot."
+	)
+
+	def add_arguments(self, parser):
+		parser.add_argument("--runs", type=int, default=5)
+		parser.add_argument("--budget-ms", type=float, default=None,
+			help="Median import time allowed, in ms. Defaults to STARTUP_IMPORT_BUDGET_MS.")
+		parser.add_argument("--top", type=int, default=15, help="Heaviest modules (by self time) to list.")
+		parser.add_argument("--output", help="Write the JSON report to this file instead of stdout.")
+
+	def handle(self, *args, **options):
+		if options["runs"] < 1:
+			raise CommandError("--runs must be positive.")
+		budget = options["budget_ms"]
+		if budget is None:
+			budget = getattr(settings, "STARTUP_IMPORT_BUDGET_MS", 0)
+		try:
+			runs = startup.measure_boot(options["runs"])
+		except RuntimeError as exc:
+			raise CommandError(str(exc))
+
+		import_ms = sorted(run["import_ms"] for run in runs)
+		median_ms = statistics.median(import_ms)
+		typical = min(runs, key=lambda run: abs(run["import_ms"] - median_ms))
+		loaded = {name for name, _, _, _ in typical["modules"]}
+		eager = [name for name in LAZY_MODULES if name in loaded]
+		heaviest = sorted(typical["modules"], key=lambda module: module[1], reverse=True)[:options["top"]]
+
+		report = {
+			"meta": {"python": platform.python_version(), "runs": options["runs"], "boot": startup.boot_code()},
+			"import_ms": {"median": round(median_ms, 1), "min": round(import_ms[0], 1), "max": round(import_ms[-1], 1)},
+			"wall_ms": {"median": round(statistics.median(run["wall_ms"] for run in runs), 1)},
+			"modules": len(loaded),
+			"budget_ms": budget or None,
+			"eager_heavy_imports": eager,
+			"heaviest": [
+				{"module": name, "self_ms": round(own / 1000, 2), "cumulative_ms": round(cumulative / 1000, 2)}
+				for name, own, cumulative, _ in heaviest
+			],
+		}
+
+		output = json.dumps(report, indent=2)
+		if options["output"]:
+			with open(options["output"], "w") as handle:
+				handle.write(output + "\n")
+			self.stdout.write(self.style.SUCCESS(f"Wrote startup report to {options['output']}"))
+		else:
+			self.stdout.write(output)
+
+		if eager:
+			raise CommandError(f"Imported at boot but meant to be lazy: {', '.join(eager)}")
+		if budget and median_ms > budget:
+			raise CommandError(f"Median boot import time {median_ms:.0f} ms exceeds the {budget:.0f} ms budget")
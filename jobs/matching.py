@@ -0,0 +1,184 @@
+"""Skill-match scoring of job seekers against active jobs.
+
+The active job x skill incidence matrix is held as one integer bitset per job,
+with a column per skill id. Scoring a seeker is a single pass of bitwise ANDs
+and popcounts over every row, so no per-job queries or Python sets are needed.
+The matrix is loaded lazily and updated incrementally (copy-on-write) from model
+signals, so scoring never waits for a lock in steady state. An update only
+advances the matrix's job-set version when the matrix was current up to that
+change; otherwise, as after a write in another worker process, the version no
+longer matches the shared counter and the next read rebuilds it.
+"""
+import math
+import threading
+from typing import NamedTuple
+
+from .cache import get_jobs_version
+from .models import JobPost
+from .routers import use_default
+
+
+class MatchScore(NamedTuple):
+	overlap: int  # skills shared by the seeker and the job
+	jaccard: float  # overlap / skills in either
+	coverage: float  # share of the job's skills the seeker has
+	weighted_coverage: float  # share of the seeker's skills the job uses, rarer skills weighing more
+
+
+NO_MATCH = MatchScore(0, 0.0, 0.0, 0.0)
+
+
+class _Matrix(NamedTuple):
+	columns: dict  # skill id -> bit position
+	rows: dict  # active job id -> skill bitset
+	frequency: list  # active jobs per column
+
+	def copy(self):
+		return _Matrix(dict(self.columns), dict(self.rows), list(self.frequency))
+
+	def column(self, skill_id):
+		column = self.columns.get(skill_id)
+		if column is None:
+			column = self.columns[skill_id] = len(self.columns)
+			self.frequency.append(0)
+		return column
+
+	def set_row(self, job_id, skill_ids):
+		self.drop_row(job_id)
+		mask = 0
+		for skill_id in skill_ids:
+			column = self.column(skill_id)
+			mask |= 1 << column
+			self.frequency[column] += 1
+		self.rows[job_id] = mask
+
+	def drop_row(self, job_id):
+		mask = self.rows.pop(job_id, None)
+		while mask:
+			low = mask & -mask
+			self.frequency[low.bit_length() - 1] -= 1
+			mask ^= low
+
+
+class SkillMatrix:
+	"""Copy-on-write: updates build a new :class:`_Matrix` under the lock and swap it
+	in, so scoring reads one consistent matrix without holding the lock."""
+
+	def __init__(self):
+		self._lock = threading.RLock()  # reentrant: the first read rebuilds while holding it
+		self._matrix = _Matrix({}, {}, [])
+		self.version = None
+
+	def _job_skills(self, job_ids=None):
+		"""Skill ids of active jobs, optionally limited to ``job_ids``, read from default (see jobs.snapshot)."""
+		active = JobPost.objects.active()
+		links = JobPost.skills.through.objects.filter(jobpost__status=JobPost.JobStatus.ACTIVE)
+		if job_ids is not None:
+			active = active.filter(pk__in=job_ids)
+			links = links.filter(jobpost_id__in=job_ids)
+		with use_default():
+			skills = {job_id: [] for job_id in active.values_list("pk", flat=True)}
+			for job_id, skill_id in links.values_list("jobpost_id", "skill_id"):
+				skills[job_id].append(skill_id)
+		return skills
+
+	def rebuild(self):
+		with self._lock:
+			version = get_jobs_version()
+			matrix = _Matrix({}, {}, [])
+			for job_id, skill_ids in self._job_skills().items():
+				matrix.set_row(job_id, skill_ids)
+			# The matrix is published before its version, so a reader that sees
+			# the new version also sees the new matrix.
+			self._matrix = matrix
+			self.version = version
+
+	def clear(self):
+		"""Forget the loaded matrix; the next read rebuilds it."""
+		with self._lock:
+			self._matrix = _Matrix({}, {}, [])
+			self.version = None
+
+	def update_jobs(self, job_ids, version):
+		"""Re-read the given jobs after a skills or status change that moved the job-set version to ``version``."""
+		job_ids = list(job_ids)
+		with self._lock:
+			if self.version is None:
+				return  # not loaded yet; the first read builds it from scratch
+			skills = self._job_skills(job_ids)
+			matrix = self._matrix.copy()
+			for job_id in job_ids:
+				if job_id in skills:
+					matrix.set_row(job_id, skills[job_id])
+				else:
+					matrix.drop_row(job_id)
+			self._matrix = matrix
+			self._advance(version)
+
+	def remove_jobs(self, job_ids, version):
+		with self._lock:
+			if self.version is None:
+				return
+			matrix = self._matrix.copy()
+			for job_id in job_ids:
+				matrix.drop_row(job_id)
+			self._matrix = matrix
+			self._advance(version)
+
+	def _advance(self, version):
+		# Missing an earlier change (made elsewhere) leaves the matrix stale; patching
+		# this one does not make it current, so it is rebuilt on the next read.
+		self.version = version if self.version == version - 1 else None
+
+	def _current(self):
+		version = get_jobs_version()
+		if self.version is None or self.version != version:
+			with self._lock:
+				if self.version is None or self.version != version:
+					self.rebuild()
+		return self._matrix
+
+	def scores(self, skill_ids, job_ids=None):
+		"""MatchScore per active job (or per given job id that is active) for a seeker's skill ids."""
+		matrix = self._current()
+		seeker_skills = set(skill_ids)
+		seeker = 0
+		weights = {}
+		seeker_weight = 0.0
+		for skill_id in seeker_skills:
+			column = matrix.columns.get(skill_id)
+			weight = 1.0 / math.log(2 + (matrix.frequency[column] if column is not None else 0))
+			seeker_weight += weight
+			if column is not None:
+				seeker |= 1 << column
+				weights[column] = weight
+		rows = matrix.rows if job_ids is None else {
+			job_id: matrix.rows[job_id] for job_id in job_ids if job_id in matrix.rows
+		}
+
+		results = dict.fromkeys(rows, NO_MATCH)
+		for job_id, mask in rows.items():
+			shared = mask & seeker
+			if not shared:
+				continue
+			overlap = shared.bit_count()
+			job_size = mask.bit_count()
+			matched_weight = 0.0
+			while shared:
+				low = shared & -shared
+				matched_weight += weights[low.bit_length() - 1]
+				shared ^= low
+			results[job_id] = MatchScore(
+				overlap,
+				overlap / (job_size + len(seeker_skills) - overlap),
+				overlap / job_size,
+				matched_weight / seeker_weight,
+			)
+		return results
+
+
+skill_matrix = SkillMatrix()
+
+
+def match_scores(skill_ids, job_ids=None):
+	return skill_matrix.scores(list(skill_ids), job_ids)
@@ -0,0 +1,267 @@
+"""In-process request metrics.
+
+Code paths report into the timing record of the request being served (a
+contextvar, so it follows requests into ``sync_to_async`` threads) with
+:func:`timed` and :func:`observe`. :class:`jobs.middleware.PerformanceMiddleware`
+turns each record into a ``Server-Timing`` header and folds it into the
+histograms below, which :func:`render_prometheus` exposes in Prometheus text format.
+
+Histograms and counters are sharded per thread: each thread only ever writes
+its own series, so observations take no lock. The registry lock is taken only
+when a thread first sees a label set, and when a scrape copies the shards. When
+a thread exits, its counts are folded into a base shard and its shard dropped,
+so servers that recycle threads do not grow the registry.
+"""
+import contextvars
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from contextlib import contextmanager
+
+_current = contextvars.ContextVar("request_timing", default=None)
+
+
+class RequestTiming:
+	"""Time spent per phase (seconds) and other per-request measurements."""
+	__slots__ = ("started", "phases", "db_queries", "values", "queries")
+
+	def __init__(self):
+		self.started = time.perf_counter()
+		self.phases = {}
+		self.db_queries = 0
+		self.values = {}
+		self.queries = None  # [(sql, seconds)] when the request's queries are being logged
+
+	def add(self, phase, seconds):
+		self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+	def elapsed(self):
+		return time.perf_counter() - self.started
+
+
+def start_request():
+	"""Begin a timing record for the current request; returns (timing, token for :func:`end_request`)."""
+	timing = RequestTiming()
+	return timing, _current.set(timing)
+
+
+def end_request(token):
+	_current.reset(token)
+
+
+def current():
+	return _current.get()
+
+
+@contextmanager
+def timed(phase):
+	"""Attribute the wrapped block's wall time to ``phase`` of the current request."""
+	timing = _current.get()
+	if timing is None:
+		yield
+		return
+	started = time.perf_counter()
+	try:
+		yield
+	finally:
+		timing.add(phase, time.perf_counter() - started)
+
+
+def observe(name, value):
+	"""Record a per-request measurement such as the prompt size."""
+	timing = _current.get()
+	if timing is not None:
+		timing.values[name] = value
+
+
+MAX_LOGGED_QUERIES = 200
+
+
+def db_wrapper(execute, sql, params, many, context):
+	"""``connection.execute_wrapper`` hook counting queries and their time, and logging them if asked."""
+	timing = _current.get()
+	if timing is None:
+		return execute(sql, params, many, context)
+	started = time.perf_counter()
+	try:
+		return execute(sql, params, many, context)
+	finally:
+		seconds = time.perf_counter() - started
+		timing.add("db", seconds)
+		timing.db_queries += 1
+		if timing.queries is not None and len(timing.queries) < MAX_LOGGED_QUERIES:
+			timing.queries.append((sql, seconds))
+
+
+class Histogram:
+	type = "histogram"
+
+	def __init__(self, name, documentation, buckets, labelnames=()):
+		self.name = name
+		self.documentation = documentation
+		self.buckets = tuple(buckets)
+		self.labelnames = tuple(labelnames)
+		self._local = threading.local()
+		self._base = {}  # counts of threads that have exited
+		self._shards = [self._base]
+		self._lock = threading.Lock()
+
+	def _new_series(self):
+		# One count per bucket plus +Inf, then the running sum.
+		return [0] * (len(self.buckets) + 1) + [0.0]
+
+	def _series(self, labels):
+		owner = getattr(self._local, "owner", None)
+		if owner is None:
+			owner = self._local.owner = _ShardOwner()
+			with self._lock:
+				self._shards.append(owner.shard)
+			# The thread-local value is released when its thread exits.
+			weakref.finalize(owner, self._retire, owner.shard)
+		shard = owner.shard
+		series = shard.get(labels)
+		if series is None:
+			series = self._new_series()
+			with self._lock:
+				shard[labels] = series
+		return series
+
+	def observe(self, value, *labels):
+		series = self._series(labels)
+		series[bisect_left(self.buckets, value)] += 1
+		series[-1] += value
+
+	def _retire(self, shard):
+		with self._lock:
+			self._shards = [other for other in self._shards if other is not shard]
+			_merge(self._base, shard.items())
+
+	def collect(self):
+		"""Label tuple -> merged [counts..., sum] across every thread."""
+		with self._lock:
+			shards = [list(shard.items()) for shard in self._shards]
+		merged = {}
+		for items in shards:
+			_merge(merged, items)
+		return merged
+
+	def reset(self):
+		with self._lock:
+			for shard in self._shards:
+				shard.clear()
+
+	def _header(self):
+		return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+
+	def _pairs(self, labels):
+		return [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, labels)]
+
+	def render(self):
+		lines = self._header()
+		for labels, series in sorted(self.collect().items()):
+			pairs = self._pairs(labels)
+			cumulative = 0
+			for bound, count in zip((*self.buckets, "+Inf"), series):
+				cumulative += count
+				le = bound if bound == "+Inf" else repr(float(bound))
+				bucket_labels = ",".join([*pairs, f'le="{le}"'])
+				lines.append(f"{self.name}_bucket{{{bucket_labels}}} {cumulative}")
+			label_text = "{" + ",".join(pairs) + "}" if pairs else ""
+			lines.append(f"{self.name}_sum{label_text} {series[-1]}")
+			lines.append(f"{self.name}_count{label_text} {cumulative}")
+		return "\n".join(lines)
+
+
+class Counter(Histogram):
+	type = "counter"
+
+	def __init__(self, name, documentation, labelnames=()):
+		super().__init__(name, documentation, (), labelnames)
+
+	def _new_series(self):
+		return [0]
+
+	def inc(self, *labels, amount=1):
+		self._series(labels)[0] += amount
+
+	def render(self):
+		lines = self._header()
+		for labels, (count,) in sorted(self.collect().items()):
+			pairs = self._pairs(labels)
+			label_text = "{" + ",".join(pairs) + "}" if pairs else ""
+			lines.append(f"{self.name}{label_text} {count}")
+		return "\n".join(lines)
+
+
+class _ShardOwner:
+	"""A thread's shard, held through the thread-local so exiting threads can be noticed."""
+	__slots__ = ("shard", "__weakref__")
+
+	def __init__(self):
+		self.shard = {}
+
+
+def _merge(totals, items):
+	for labels, series in items:
+		total = totals.setdefault(labels, [0] * len(series))
+		for index, value in enumerate(series):
+			total[index] += value
+
+
+def _escape(value):
+	return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+_SECONDS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_SECONDS = Histogram(
+	"jobchain_request_duration_seconds", "Time to produce a response.", _SECONDS, ("endpoint", "method", "status"),
+)
+PHASE_SECONDS = Histogram(
+	"jobchain_request_phase_seconds", "Time per request spent in auth, db, serialize and ai.", _SECONDS, ("endpoint", "phase"),
+)
+DB_QUERIES = Histogram(
+	"jobchain_request_db_queries", "Database queries per request.", (0, 1, 2, 5, 10, 20, 50, 100), ("endpoint",),
+)
+PROMPT_BYTES = Histogram(
+	"jobchain_ai_prompt_bytes", "Size of prompts sent to the model.", (2000, 4000, 8000, 16000, 32000, 64000, 128000), ("endpoint",),
+)
+SHED_REQUESTS = Counter(
+	"jobchain_requests_shed_total", "Requests refused by a throttle or answered from another request's computation.",
+	("scope", "reason"),
+)
+METRICS = (REQUEST_SECONDS, PHASE_SECONDS, DB_QUERIES, PROMPT_BYTES, SHED_REQUESTS)
+
+
+def record(endpoint, method, status_code, timing):
+	"""Fold a finished request's timing record into the histograms."""
+	REQUEST_SECONDS.observe(timing.elapsed(), endpoint, method, f"{status_code // 100}xx")
+	for phase, seconds in timing.phases.items():
+		PHASE_SECONDS.observe(seconds, endpoint, phase)
+	DB_QUERIES.observe(timing.db_queries, endpoint)
+	if "prompt_bytes" in timing.values:
+		PROMPT_BYTES.observe(timing.values["prompt_bytes"], endpoint)
+
+
+def server_timing(timing):
+	"""``Server-Timing`` header value for a timing record."""
+	entries = []
+	for phase, seconds in timing.phases.items():
+		entry = f"{phase};dur={seconds * 1000:.1f}"
+		if phase == "db":
+			entry += f';desc="{timing.db_queries} queries"'
+		entries.append(entry)
+	if "prompt_bytes" in timing.values:
+		entries.append(f'prompt;desc="{timing.values["prompt_bytes"]} bytes"')
+	entries.append(f"total;dur={timing.elapsed() * 1000:.1f}")
+	return ", ".join(entries)
+
+
+def render_prometheus():
+	return "\n".join(metric.render() for metric in METRICS) + "\n"
+
+
+def reset():
+	for metric in METRICS:
+		metric.reset()
@@ -0,0 +1,207 @@
+import re
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import compress_sequence, compress_string
+
+from . import metrics, profiling
+
+try:
+	import brotli
+except ImportError:  # optional
+	brotli = None
+
+try:
+	import zstandard
+except ImportError:  # optional
+	zstandard = None
+
+
+def _endpoint(request):
+	# The URL name keeps label cardinality bounded, unlike the raw path.
+	match = getattr(request, "resolver_match", None)
+	if match is None:
+		return "unmatched"
+	return match.view_name or match.route or "unnamed"
+
+
+class PerformanceMiddleware:
+	"""Times every request, adds a ``Server-Timing`` header and feeds the metrics histograms.
+
+	Works for both sync and async views so the async recommendation endpoint is
+	not pushed onto a worker thread. Streamed bodies are timed up to the first
+	byte only. Slow, sampled and requested profiles are captured through
+	:mod:`jobs.profiling`; the stored row's id is returned in ``X-Profile-Id``.
+	"""
+	sync_capable = True
+	async_capable = True
+
+	def __init__(self, get_response):
+		self.get_response = get_response
+		self.server_timing = getattr(settings, "PERF_SERVER_TIMING", True)
+		self.async_mode = iscoroutinefunction(get_response)
+		if self.async_mode:
+			markcoroutinefunction(self)
+
+	def __call__(self, request):
+		if self.async_mode:
+			return self.__acall__(request)
+		timing, token = metrics.start_request()
+		reason, profiler = profiling.begin(request, timing)
+		try:
+			response = self.get_response(request)
+		finally:
+			if profiler is not None:
+				profiler.disable()
+			metrics.end_request(token)
+		if profiling.wanted(timing, reason):
+			self._captured(response, profiling.capture(request, response, timing, _endpoint(request), reason, profiler))
+		return self._finish(request, response, timing)
+
+	async def __acall__(self, request):
+		timing, token = metrics.start_request()
+		reason, _ = profiling.begin(request, timing, profile=False)
+		try:
+			response = await self.get_response(request)
+		finally:
+			metrics.end_request(token)
+		if profiling.wanted(timing, reason):
+			row = await sync_to_async(profiling.capture)(request, response, timing, _endpoint(request), reason, None)
+			self._captured(response, row)
+		return self._finish(request, response, timing)
+
+	def _captured(self, response, row):
+		if row is not None:
+			response["X-Profile-Id"] = str(row.pk)
+
+	def _finish(self, request, response, timing):
+		if self.server_timing:
+			response["Server-Timing"] = metrics.server_timing(timing)
+		metrics.record(_endpoint(request), request.method, response.status_code, timing)
+		return response
+
+
+class _Gzip:
+	# Django's helpers add random header bytes as a BREACH mitigation.
+	def compress(self, data):
+		return compress_string(data, max_random_bytes=100)
+
+	def stream(self, chunks):
+		return compress_sequence(chunks, max_random_bytes=100)
+
+
+class _Brotli:
+	def __init__(self, quality):
+		self.quality = quality
+
+	def compress(self, data):
+		return brotli.compress(data, quality=self.quality)
+
+	def stream(self, chunks):
+		compressor = brotli.Compressor(quality=self.quality)
+		for chunk in chunks:
+			data = compressor.process(chunk) + compressor.flush()
+			if data:
+				yield data
+		yield compressor.finish()
+
+
+class _Zstd:
+	# ZstdCompressor instances must not be shared between threads.
+	def __init__(self, level):
+		self.level = level
+
+	def compress(self, data):
+		return zstandard.ZstdCompressor(level=self.level).compress(data)
+
+	def stream(self, chunks):
+		compressor = zstandard.ZstdCompressor(level=self.level).compressobj()
+		for chunk in chunks:
+			data = compressor.compress(chunk) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+			if data:
+				yield data
+		yield compressor.flush()
+
+
+_ACCEPT_ENCODING = re.compile(r"\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([\d.]+))?\s*")
+
+
+def accepted_encodings(header):
+	"""Coding -> q-value from an Accept-Encoding header; unparsable entries are ignored."""
+	accepted = {}
+	for part in header.split(","):
+		match = _ACCEPT_ENCODING.fullmatch(part)
+		if match:
+			try:
+				accepted[match[1].lower()] = float(match[2]) if match[2] else 1.0
+			except ValueError:
+				accepted[match[1].lower()] = 0.0
+	return accepted
+
+
+class CompressionMiddleware(MiddlewareMixin):
+	"""Negotiated response compression: brotli and zstd when installed, gzip otherwise.
+
+	On equal q-values the server prefers br, then zstd, then gzip. Bodies under
+	``COMPRESSION_MIN_BYTES`` are sent as is. Strong ETags are weakened, since the
+	encoded bytes differ from the identity representation; so are those of 304s to
+	clients that accept an encoding, to match the 200 they revalidate.
+	"""
+
+	def __init__(self, get_response):
+		super().__init__(get_response)
+		self.min_bytes = getattr(settings, "COMPRESSION_MIN_BYTES", 1024)
+		self.encoders = {}
+		if brotli is not None:
+			self.encoders["br"] = _Brotli(getattr(settings, "COMPRESSION_BROTLI_QUALITY", 4))
+		if zstandard is not None:
+			self.encoders["zstd"] = _Zstd(getattr(settings, "COMPRESSION_ZSTD_LEVEL", 3))
+		self.encoders["gzip"] = _Gzip()
+
+	def _choose(self, request):
+		accepted = accepted_encodings(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+		best, best_q = None, 0.0
+		for coding in self.encoders:  # in server preference order
+			q = accepted.get(coding, accepted.get("*", 0.0))
+			if q > best_q:
+				best, best_q = coding, q
+		return best
+
+	def process_response(self, request, response):
+		if response.has_header("Content-Encoding") or getattr(response, "is_async", False):
+			return response
+		if response.status_code == 304:
+			# Carry the validator a 200 would have had, as the client compares against it.
+			patch_vary_headers(response, ("Accept-Encoding",))
+			if self._choose(request) is not None:
+				self._weaken_etag(response)
+			return response
+		if not response.streaming and len(response.content) < self.min_bytes:
+			return response
+
+		patch_vary_headers(response, ("Accept-Encoding",))
+		coding = self._choose(request)
+		if coding is None:
+			return response
+		encoder = self.encoders[coding]
+
+		if response.streaming:
+			response.streaming_content = encoder.stream(response.streaming_content)
+			del response.headers["Content-Length"]
+		else:
+			compressed = encoder.compress(response.content)
+			if len(compressed) >= len(response.content):
+				return response
+			response.content = compressed
+			response.headers["Content-Length"] = str(len(compressed))
+
+		self._weaken_etag(response)
+		response.headers["Content-Encoding"] = coding
+		return response
+
+	def _weaken_etag(self, response):
+		etag = response.get("ETag")
+		if etag and etag.startswith('"'):
+			response.headers["ETag"] = "W/" + etag
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.6 on 2026-10-18 15:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0003_merge_20250828_2204'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='jobpost',
+            index=models.Index(fields=['status'], name='jobs_jobpost_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobpost',
+            index=models.Index(fields=['created_at'], name='jobs_jobpost_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobpost',
+            index=models.Index(fields=['job_type', 'status'], name='jobs_jobpost_type_status_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+
+FTS_TABLE = 'jobs_jobpost_fts'
+
+
+def create_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(title, description, company, skills)"
+    )
+    schema_editor.execute(
+        f"INSERT INTO {FTS_TABLE} (rowid, title, description, company, skills) "
+        "SELECT job.id, job.title, job.description, job.company, "
+        "COALESCE((SELECT group_concat(skill.name, ' ') FROM jobs_jobpost_skills link "
+        "JOIN jobs_skill skill ON skill.id = link.skill_id WHERE link.jobpost_id = job.id), '') "
+        "FROM jobs_jobpost job"
+    )
+
+
+def drop_fts_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0004_jobpost_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_index, drop_fts_index),
+    ]
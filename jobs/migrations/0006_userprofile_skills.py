@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-18 15:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0005_jobpost_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='skills',
+            field=models.ManyToManyField(blank=True, related_name='seekers', to='jobs.skill'),
+        ),
+    ]
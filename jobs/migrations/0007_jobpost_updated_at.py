@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-18 15:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0006_userprofile_skills'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobpost',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.6 on 2026-10-18 15:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0008_recommendationtask'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('reason', models.CharField(choices=[('slow', 'Slow'), ('sampled', 'Sampled'), ('requested', 'Requested by header')], max_length=10)),
+                ('method', models.CharField(max_length=10)),
+                ('path', models.CharField(max_length=2048)),
+                ('endpoint', models.CharField(max_length=200)),
+                ('status_code', models.PositiveSmallIntegerField()),
+                ('duration_ms', models.FloatField()),
+                ('phases', models.JSONField(default=dict)),
+                ('db_queries', models.PositiveIntegerField(default=0)),
+                ('queries', models.JSONField(default=list)),
+                ('stats', models.BinaryField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-id'],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.6 on 2026-10-18 16:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0009_requestprofile'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='jobpost',
+            name='jobs_jobpost_status_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='jobpost',
+            name='jobs_jobpost_type_status_idx',
+        ),
+        migrations.AddIndex(
+            model_name='jobpost',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='jobs_jobpost_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobpost',
+            index=models.Index(fields=['job_type', 'status', 'created_at', 'id'], name='jobs_jobpost_type_status_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.6 on 2026-10-18 16:26
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+def merge_case_duplicates(apps, schema_editor):
+    # Keep the oldest spelling of each name and move links from the others onto it.
+    Skill = apps.get_model('jobs', 'Skill')
+    JobPostSkill = apps.get_model('jobs', 'JobPost').skills.through
+    ProfileSkill = apps.get_model('jobs', 'UserProfile').skills.through
+    kept = {}
+    for skill_id, name in Skill.objects.order_by('id').values_list('id', 'name'):
+        keep = kept.setdefault(name.lower(), skill_id)
+        if keep == skill_id:
+            continue
+        for through, owner in ((JobPostSkill, 'jobpost_id'), (ProfileSkill, 'userprofile_id')):
+            linked = set(through.objects.filter(skill_id=keep).values_list(owner, flat=True))
+            through.objects.filter(skill_id=skill_id, **{f'{owner}__in': linked}).delete()
+            through.objects.filter(skill_id=skill_id).update(skill_id=keep)
+        Skill.objects.filter(id=skill_id).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0011_jobapplication'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_case_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='skill',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('name'), name='jobs_skill_name_ci_uniq'),
+        ),
+    ]
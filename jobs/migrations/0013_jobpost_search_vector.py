@@ -0,0 +1,59 @@
+from django.db import migrations
+
+
+FTS_TABLE = 'jobs_jobpost_fts'
+FTS_DOCUMENTS = (
+    "SELECT job.id, job.title, job.description, job.company, "
+    "COALESCE((SELECT group_concat(skill.name, ' ') FROM jobs_jobpost_skills link "
+    "JOIN jobs_skill skill ON skill.id = link.skill_id WHERE link.jobpost_id = job.id), '') "
+    "FROM jobs_jobpost job"
+)
+
+
+def _spelled_out(column):
+    return rf"regexp_replace(regexp_replace({column}, '(\w)\+\+', '\1plusplus', 'g'), '(\w)#', '\1sharp', 'g')"
+
+
+def _recreate_fts(schema_editor, options):
+    schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    schema_editor.execute(f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(title, description, company, skills{options})")
+    schema_editor.execute(f"INSERT INTO {FTS_TABLE} (rowid, title, description, company, skills) {FTS_DOCUMENTS}")
+
+
+def add_search_tokens(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        # Keep + and # inside tokens, so c++ and c# are not indexed as the letter c.
+        _recreate_fts(schema_editor, ''', tokenize="unicode61 tokenchars '+#'"''')
+    elif vendor == 'postgresql':
+        skills = (
+            "COALESCE((SELECT string_agg(skill.name, ' ') FROM jobs_jobpost_skills link "
+            "JOIN jobs_skill skill ON skill.id = link.skill_id WHERE link.jobpost_id = job.id), '')"
+        )
+        vector = ' || '.join(
+            f"setweight(to_tsvector('english', {_spelled_out(column)}), '{weight}')"
+            for column, weight in (('job.title', 'A'), (skills, 'B'), ('job.company', 'B'), ('job.description', 'C'))
+        )
+        schema_editor.execute("ALTER TABLE jobs_jobpost ADD COLUMN search_vector tsvector")
+        schema_editor.execute(f"UPDATE jobs_jobpost job SET search_vector = {vector}")
+        schema_editor.execute("CREATE INDEX jobs_jobpost_search_idx ON jobs_jobpost USING GIN (search_vector)")
+
+
+def remove_search_tokens(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        _recreate_fts(schema_editor, '')
+    elif vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS jobs_jobpost_search_idx")
+        schema_editor.execute("ALTER TABLE jobs_jobpost DROP COLUMN IF EXISTS search_vector")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0012_skill_name_ci_uniq'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_search_tokens, remove_search_tokens),
+    ]
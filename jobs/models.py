@@ -1,9 +1,18 @@
+import uuid
+
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth.models import User
 
 
 class Skill(models.Model):
 	name = models.CharField(max_length=100, unique=True)
+
+	class Meta:
+		constraints = [
+			# "Python" and "python" are one skill.
+			models.UniqueConstraint(Lower("name"), name="jobs_skill_name_ci_uniq"),
+		]
 	
 	def __str__(self) -> str:
 		return self.name
@@ -16,11 +25,21 @@ class UserProfile(models.Model):
 
 	user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="profile")
 	role = models.CharField(max_length=16, choices=Role.choices, default=Role.JOB_SEEKER)
+	skills = models.ManyToManyField(Skill, related_name="seekers", blank=True)
 
 	def __str__(self) -> str:
 		return f"{self.user.username} ({self.role})"
 
 
+class JobPostQuerySet(models.QuerySet):
+	def active(self):
+		return self.filter(status=JobPost.JobStatus.ACTIVE)
+
+	def with_related(self):
+		"""Join the employer and prefetch skills, as read by JobPostSerializer."""
+		return self.select_related("employer").prefetch_related("skills")
+
+
 class JobPost(models.Model):
 	class JobType(models.TextChoices):
 		FULL_TIME = "FULL_TIME", "Full Time"
@@ -45,6 +64,84 @@ class JobPost(models.Model):
 	skills = models.ManyToManyField(Skill, related_name="job_posts", blank=True)
 	applications_count = models.IntegerField(default=0)
 	created_at = models.DateTimeField(auto_now_add=True)
+	updated_at = models.DateTimeField(auto_now=True)
+
+	objects = JobPostQuerySet.as_manager()
+
+	class Meta:
+		indexes = [
+			# Filters followed by the listing order, so a filtered page reads LIMIT rows instead of sorting every match.
+			models.Index(fields=["status", "created_at", "id"], name="jobs_jobpost_status_idx"),
+			models.Index(fields=["created_at"], name="jobs_jobpost_created_idx"),
+			models.Index(fields=["job_type", "status", "created_at", "id"], name="jobs_jobpost_type_status_idx"),
+		]
 
 	def __str__(self) -> str:
 		return self.title
+
+
+class JobApplication(models.Model):
+	"""A job seeker's application to a job; each seeker applies to a job at most once."""
+	user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="job_applications")
+	job = models.ForeignKey(JobPost, on_delete=models.CASCADE, related_name="applications")
+	created_at = models.DateTimeField(auto_now_add=True)
+
+	class Meta:
+		constraints = [
+			models.UniqueConstraint(fields=["user", "job"], name="jobs_application_user_job_uniq"),
+		]
+
+	def __str__(self) -> str:
+		return f"{self.user} -> {self.job}"
+
+
+class RecommendationTask(models.Model):
+	"""An AI recommendation request answered in the background (see jobs.tasks)."""
+	class Status(models.TextChoices):
+		PENDING = "pending", "Pending"
+		DONE = "done", "Done"
+		FAILED = "failed", "Failed"
+
+	id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+	user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="recommendation_tasks")
+	key = models.CharField(max_length=128)  # normalized request key shared by identical requests
+	status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+	source = models.CharField(max_length=10, blank=True)
+	result = models.JSONField(null=True, blank=True)
+	error = models.TextField(blank=True)
+	created_at = models.DateTimeField(auto_now_add=True)
+	finished_at = models.DateTimeField(null=True, blank=True)
+
+	class Meta:
+		indexes = [
+			models.Index(fields=["finished_at"], name="jobs_rectask_finished_idx"),
+		]
+
+	def __str__(self) -> str:
+		return f"{self.pk} ({self.status})"
+
+
+class RequestProfile(models.Model):
+	"""A slow or profiled request captured by jobs.profiling; only the newest few are kept."""
+	class Reason(models.TextChoices):
+		SLOW = "slow", "Slow"
+		SAMPLED = "sampled", "Sampled"
+		REQUESTED = "requested", "Requested by header"
+
+	created_at = models.DateTimeField(auto_now_add=True)
+	reason = models.CharField(max_length=10, choices=Reason.choices)
+	method = models.CharField(max_length=10)
+	path = models.CharField(max_length=2048)
+	endpoint = models.CharField(max_length=200)
+	status_code = models.PositiveSmallIntegerField()
+	duration_ms = models.FloatField()
+	phases = models.JSONField(default=dict)  # phase -> milliseconds, plus per-request values
+	db_queries = models.PositiveIntegerField(default=0)
+	queries = models.JSONField(default=list)  # [sql, milliseconds] without parameters
+	stats = models.BinaryField(null=True, blank=True)  # marshalled cProfile stats, as in a .pstats file
+
+	class Meta:
+		ordering = ["-id"]
+
+	def __str__(self) -> str:
+		return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
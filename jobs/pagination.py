@@ -0,0 +1,10 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class JobPostCursorPagination(CursorPagination):
+	"""Keyset pagination over ``(-created_at, -id)`` so page cost does not grow with the table."""
+	page_size = getattr(settings, 'JOBS_PAGE_SIZE', 20)
+	page_size_query_param = "page_size"
+	max_page_size = 100
+	ordering = ("-created_at", "-id")
@@ -0,0 +1,22 @@
+import json
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+	"""Newline-delimited JSON: one object per non-blank line, parsed into a list."""
+	media_type = "application/x-ndjson"
+
+	def parse(self, stream, media_type=None, parser_context=None):
+		encoding = (parser_context or {}).get("encoding", "utf-8")
+		rows = []
+		for line_number, line in enumerate(stream, start=1):
+			line = line.decode(encoding).strip()
+			if not line:
+				continue
+			try:
+				rows.append(json.loads(line))
+			except ValueError as exc:
+				raise ParseError(f"NDJSON parse error on line {line_number}: {exc}")
+		return rows
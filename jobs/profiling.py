@@ -0,0 +1,131 @@
+"""Opt-in request profiling and slow-request capture.
+
+A request runs under cProfile when it sends ``X-Profile: <PROFILING_TOKEN>`` or
+is picked by ``PROFILING_SAMPLE_RATE``. Profiled requests, and any request
+slower than ``PROFILING_SLOW_MS``, are stored as :class:`jobs.models.RequestProfile`
+rows with their phase timings (auth, db, serialize, ai) and SQL log. Statements
+are logged without their parameters. Slow capture is off by default, since it
+logs the queries of every request to have them at hand for the slow ones. The
+table is a ring buffer shared by every process: each process trims it to the
+newest ``PROFILING_BUFFER_SIZE`` rows at most every ``PROFILING_TRIM_INTERVAL``
+seconds, so it may briefly hold more. Rows are browsed in the Django admin, which also serves each profile as a ``.pstats``
+file for ``python -m pstats`` or snakeviz.
+
+Only synchronous views are profiled: cProfile follows one thread, while an async
+view shares its event loop with other requests. Slow or requested async
+requests are still captured, without a profile.
+"""
+import cProfile
+import io
+import logging
+import marshal
+import pstats
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils.crypto import constant_time_compare
+
+from .models import RequestProfile
+
+logger = logging.getLogger(__name__)
+
+HEADER = "X-Profile"
+
+_lock = threading.Lock()
+_next_trim = 0.0  # time.monotonic() after which the table is trimmed again
+
+
+def profile_reason(request):
+	"""Why this request should be profiled, or None."""
+	token = getattr(settings, "PROFILING_TOKEN", "")
+	header = request.headers.get(HEADER)
+	if token and header and constant_time_compare(header, token):
+		return RequestProfile.Reason.REQUESTED
+	rate = getattr(settings, "PROFILING_SAMPLE_RATE", 0.0)
+	if rate and random.random() < rate:
+		return RequestProfile.Reason.SAMPLED
+	return None
+
+
+def begin(request, timing, profile=True):
+	"""Start logging queries and, if chosen and ``profile`` allows it, a profiler.
+
+	Returns (reason, profiler); either may be None.
+	"""
+	reason = profile_reason(request)
+	if reason is not None or getattr(settings, "PROFILING_SLOW_MS", 0):
+		timing.queries = []
+	if reason is None or not profile:
+		return reason, None
+	profiler = cProfile.Profile()
+	try:
+		profiler.enable()
+	except ValueError:  # another profiler is active (one per process since Python 3.12)
+		return reason, None
+	return reason, profiler
+
+
+def wanted(timing, reason):
+	"""Whether a finished request should be stored."""
+	slow_ms = getattr(settings, "PROFILING_SLOW_MS", 0)
+	return reason is not None or bool(slow_ms and timing.elapsed() * 1000 >= slow_ms)
+
+
+def capture(request, response, timing, endpoint, reason, profiler):
+	"""Store a finished request (see :func:`wanted`); returns the row, or None if it could not be saved."""
+	stats = None
+	if profiler is not None:
+		profiler.create_stats()
+		stats = marshal.dumps(profiler.stats)  # the format pstats.Stats.dump_stats writes
+	values = {name: round(seconds * 1000, 3) for name, seconds in timing.phases.items()}
+	values.update(timing.values)
+	try:
+		row = RequestProfile.objects.create(
+			reason=reason or RequestProfile.Reason.SLOW,
+			method=request.method,
+			path=request.get_full_path()[:2048],
+			endpoint=endpoint[:200],
+			status_code=response.status_code,
+			duration_ms=round(timing.elapsed() * 1000, 3),
+			phases=values,
+			db_queries=timing.db_queries,
+			queries=[[sql, round(seconds * 1000, 3)] for sql, seconds in timing.queries or ()],
+			stats=stats,
+		)
+		_trim()
+	except DatabaseError:
+		# Capturing must never fail the request it describes.
+		logger.exception("Could not store request profile for %s %s", request.method, request.path)
+		return None
+	return row
+
+
+def _trim():
+	global _next_trim
+	with _lock:
+		if time.monotonic() < _next_trim:
+			return
+		_next_trim = time.monotonic() + getattr(settings, "PROFILING_TRIM_INTERVAL", 60)
+	size = max(1, getattr(settings, "PROFILING_BUFFER_SIZE", 100))
+	oldest_kept = list(RequestProfile.objects.order_by("-id").values_list("id", flat=True)[size - 1:size])
+	if oldest_kept:
+		RequestProfile.objects.filter(id__lt=oldest_kept[0]).delete()
+
+
+class _Loaded:
+	# pstats.Stats accepts any object with create_stats() and a ``stats`` dict.
+	def __init__(self, data):
+		self.stats = marshal.loads(data)
+
+	def create_stats(self):
+		pass
+
+
+def stats_report(data, sort="cumulative", limit=40):
+	"""Text report of stored profile stats, as printed by ``pstats``."""
+	stream = io.StringIO()
+	pstats.Stats(_Loaded(data), stream=stream).strip_dirs().sort_stats(sort).print_stats(limit)
+	return stream.getvalue()
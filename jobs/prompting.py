@@ -0,0 +1,112 @@
+"""Compact encoding of job posts for model prompts.
+
+Each job is reduced to the fields the model needs (no ids of nested skills,
+timestamps, duplicated aliases or employer names), its description is cut to
+``AI_PROMPT_DESCRIPTION_CHARS`` and the fragment is rendered without
+whitespace. Fragments are cached per job and ``updated_at``, so a change to one
+job leaves every other fragment cached, and jobs are added in rank order until
+the prompt reaches ``AI_PROMPT_BUDGET_BYTES``.
+"""
+import json
+import logging
+from typing import NamedTuple
+
+from django.conf import settings
+
+from .cache import BoundedCache
+
+logger = logging.getLogger(__name__)
+
+# Rough bytes-per-token ratio for English text, used for reporting only.
+BYTES_PER_TOKEN = 4
+
+_fragments = BoundedCache(getattr(settings, "AI_PROMPT_FRAGMENT_CACHE_SIZE", 10000))
+
+
+class PromptStats(NamedTuple):
+	jobs_included: int
+	jobs_dropped: int
+	prompt_bytes: int
+	saved_bytes: int
+
+	@property
+	def saved_tokens(self):
+		return self.saved_bytes // BYTES_PER_TOKEN
+
+
+def truncate(text, limit):
+	text = " ".join(str(text or "").split())
+	if len(text) <= limit:
+		return text
+	cut = text[:limit].rsplit(" ", 1)[0] or text[:limit]
+	return cut + "…"
+
+
+def compact_job(job):
+	"""Minimal dict for a serialized job; empty fields are left out."""
+	compact = {
+		"id": job["id"],
+		"title": job.get("title"),
+		"company": job.get("company"),
+		"location": job.get("location"),
+		"type": job.get("type"),
+		"salary": job.get("salary"),
+		"skills": [skill["name"] for skill in job.get("skills") or ()],
+		"desc": truncate(job.get("description"), getattr(settings, "AI_PROMPT_DESCRIPTION_CHARS", 280)),
+	}
+	return {key: value for key, value in compact.items() if value}
+
+
+def encode_job(job, updated_at=None):
+	"""Return ``(fragment, legacy_bytes)`` for a serialized job.
+
+	``legacy_bytes`` is the size the job used to take in the pretty-printed
+	prompt, kept alongside the fragment so savings can be reported cheaply.
+	The result is cached when the job's ``updated_at`` is given.
+	"""
+	key = (job["id"], updated_at)
+	encoded = _fragments.get(key) if updated_at is not None else None
+	if encoded is None:
+		fragment = json.dumps(compact_job(job), ensure_ascii=False, separators=(",", ":"))
+		legacy_bytes = len(json.dumps(job, indent=2).encode()) + 2
+		encoded = (fragment, legacy_bytes)
+		if updated_at is not None:
+			_fragments.set(key, encoded)
+	return encoded
+
+
+def encode_jobs(jobs, budget, updated_at=None):
+	"""JSON array of compact jobs, in the given order, fitting in ``budget`` bytes.
+
+	``updated_at`` maps a job id to its last change (or None), for caching
+	fragments. Returns ``(json_text, stats)`` where ``stats.prompt_bytes`` covers
+	the array only; jobs that would overflow the budget are dropped.
+	"""
+	fragments = []
+	used = 2  # surrounding brackets
+	legacy = 2
+	for job in jobs:
+		fragment, legacy_bytes = encode_job(job, updated_at(job["id"]) if updated_at else None)
+		size = len(fragment.encode()) + (1 if fragments else 0)
+		if used + size > budget:
+			break
+		fragments.append(fragment)
+		used += size
+		legacy += legacy_bytes
+	text = "[" + ",".join(fragments) + "]"
+	stats = PromptStats(len(fragments), len(jobs) - len(fragments), used, max(legacy - used, 0))
+	if jobs and not fragments:
+		logger.warning("AI prompt budget of %d bytes fits none of %d jobs", budget, len(jobs))
+	return text, stats
+
+
+def jobs_budget(header_bytes):
+	"""Bytes left for the job list once the rest of the prompt is accounted for (never negative)."""
+	return max(getattr(settings, "AI_PROMPT_BUDGET_BYTES", 32000) - header_bytes, 0)
+
+
+def log_stats(stats):
+	logger.info(
+		"AI prompt: %d bytes, %d jobs included, %d dropped by budget, ~%d bytes (~%d tokens) saved",
+		stats.prompt_bytes, stats.jobs_included, stats.jobs_dropped, stats.saved_bytes, stats.saved_tokens,
+	)
@@ -0,0 +1,140 @@
+"""Local candidate retrieval for AI recommendations.
+
+Active jobs are scored against a seeker's skills and search preferences with a
+BM25 index over title, skill names and description. The top candidates are the
+only jobs sent to the model, and the same ranking is served directly when the
+model is unavailable.
+"""
+import math
+import re
+from collections import Counter
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9+#]+)*")
+
+# Term-frequency weight of each field in the combined BM25 document.
+FIELD_WEIGHTS = {"title": 3.0, "skills": 2.0, "description": 1.0}
+
+# Flat bonuses added for structured preference matches.
+LOCATION_BONUS = 1.0
+JOB_TYPE_BONUS = 1.0
+
+UNSET_PREFERENCES = {"", "any", "all"}
+
+
+def tokenize(text):
+	"""Split free text into lowercase terms, keeping tokens such as c++ and node.js."""
+	if not text:
+		return []
+	return TOKEN_RE.findall(str(text).lower())
+
+
+def _skill_name(skill):
+	return skill.get("name", "") if isinstance(skill, dict) else str(skill)
+
+
+def _preference(preferences, key):
+	value = str(preferences.get(key) or "").strip()
+	return "" if value.lower() in UNSET_PREFERENCES else value
+
+
+def _normalize_job_type(value):
+	return re.sub(r"[^A-Z]+", "_", str(value).upper()).strip("_")
+
+
+def job_terms(job):
+	"""Weighted term frequencies for a serialized job post."""
+	terms = Counter()
+	for token in tokenize(job.get("title")):
+		terms[token] += FIELD_WEIGHTS["title"]
+	for skill in job.get("skills") or ():
+		for token in tokenize(_skill_name(skill)):
+			terms[token] += FIELD_WEIGHTS["skills"]
+	for token in tokenize(job.get("description")):
+		terms[token] += FIELD_WEIGHTS["description"]
+	return terms
+
+
+def query_terms(skills, preferences):
+	"""Distinct query terms built from the seeker's skills and search keywords."""
+	terms = []
+	for skill in skills or ():
+		terms.extend(tokenize(_skill_name(skill)))
+	terms.extend(tokenize(_preference(preferences, "search")))
+	return list(dict.fromkeys(terms))
+
+
+class BM25Index:
+	"""In-memory BM25 index over serialized job posts.
+
+	Jobs are tokenized once, when the index is built; scoring a query only walks
+	the postings of its own terms.
+	"""
+
+	def __init__(self, jobs, k1=1.2, b=0.75, terms=None):
+		"""``terms``, if given, returns the precomputed :func:`job_terms` of a job."""
+		self.k1 = k1
+		self.b = b
+		self.jobs = list(jobs)
+		self.lengths = []
+		self.postings = {}  # term -> [(position, frequency)]
+		total_length = 0.0
+		for position, job in enumerate(self.jobs):
+			frequencies = terms(job) if terms is not None else job_terms(job)
+			length = sum(frequencies.values())
+			self.lengths.append(length)
+			total_length += length
+			for term, frequency in frequencies.items():
+				self.postings.setdefault(term, []).append((position, frequency))
+
+		count = len(self.jobs)
+		self.average_length = (total_length / count) if count else 0.0
+		self.idf = {
+			term: math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+			for term, postings in self.postings.items()
+		}
+
+	def scores(self, terms):
+		"""Relevance of each job matching any of ``terms``, by position."""
+		scores = {}
+		if not self.average_length:
+			return scores
+		for term in terms:
+			idf = self.idf.get(term)
+			if idf is None:
+				continue
+			for position, frequency in self.postings[term]:
+				norm = self.k1 * (1 - self.b + self.b * self.lengths[position] / self.average_length)
+				scores[position] = scores.get(position, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+		return scores
+
+
+def rank_jobs(jobs, skills=None, preferences=None, limit=None):
+	"""Return serialized jobs ordered by relevance to the seeker.
+
+	``jobs`` is a list of serialized jobs or a :class:`BM25Index` already built
+	over them. When the seeker gave any skills or keywords, jobs matching none of
+	them are dropped. Ties keep the input order, so callers should pass jobs
+	newest first.
+	"""
+	preferences = preferences or {}
+	terms = query_terms(skills, preferences)
+	location = _preference(preferences, "location").lower()
+	job_type = _normalize_job_type(_preference(preferences, "jobType"))
+
+	index = jobs if isinstance(jobs, BM25Index) else BM25Index(jobs)
+	if terms:
+		candidates = index.scores(terms).items()
+	else:
+		candidates = ((position, 0.0) for position in range(len(index.jobs)))
+	scored = []
+	for position, score in candidates:
+		job = index.jobs[position]
+		if location and location in str(job.get("location") or "").lower():
+			score += LOCATION_BONUS
+		if job_type and job_type == _normalize_job_type(job.get("type") or ""):
+			score += JOB_TYPE_BONUS
+		scored.append((-score, position, job))
+
+	scored.sort(key=lambda item: item[:2])
+	ranked = [job for _, _, job in scored]
+	return ranked[:limit] if limit else ranked
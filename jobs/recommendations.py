@@ -0,0 +1,187 @@
+"""AI job recommendation pipeline shared by the sync and async views.
+
+Active jobs are pre-ranked locally, the top candidates are sent to the model,
+and the model's ordering is cached per normalized request and job-set version.
+Whenever the model cannot be reached, answers with something that is not a
+JSON array of candidate ids, or no candidate fits the prompt budget, the local
+ranking is returned (and not cached) instead.
+"""
+import json
+import logging
+from typing import NamedTuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from . import cache as recommendation_cache
+from . import metrics
+from . import prompting
+from .ai_client import AIServiceUnavailable, get_client
+from .ranking import rank_jobs
+from .snapshot import active_jobs
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidAIResponse(Exception):
+	pass
+
+
+class RecommendationResult(NamedTuple):
+	jobs: list
+	source: str  # "ai" or "local"
+	cache: str  # "HIT" or "MISS"
+
+
+def candidate_limit():
+	"""Number of locally pre-ranked jobs sent to the model (0 sends every match)."""
+	return getattr(settings, 'AI_RECOMMENDATION_CANDIDATES', 50)
+
+
+def load_candidates(skills, preferences):
+	"""Pre-rank the active jobs snapshot (newest first, so ranking ties favour recent posts)."""
+	return rank_jobs(active_jobs.ranking_index(), skills, preferences, limit=candidate_limit())
+
+
+def parse_job_ids(text):
+	"""Extract the JSON array of job ids from the model's response text."""
+	cleaned = text.strip().replace('```json', '').replace('```', '').strip()
+	try:
+		job_ids = json.loads(cleaned)
+	except json.JSONDecodeError as exc:
+		raise InvalidAIResponse("Failed to parse AI response.") from exc
+	if not isinstance(job_ids, list):
+		raise InvalidAIResponse("Failed to parse AI response.")
+	return job_ids
+
+
+def _as_job_id(value):
+	if isinstance(value, int) and not isinstance(value, bool):
+		return value
+	if isinstance(value, str) and value.strip().isdigit():
+		return int(value)
+	return None
+
+
+def select_jobs(candidates, job_ids):
+	"""Candidates in the model's order, reusing the already serialized rows.
+
+	Ids may be integers or numeric strings; others are ignored. Raises
+	InvalidAIResponse when none of them names a candidate.
+	"""
+	by_id = {job['id']: job for job in candidates}
+	selected = []
+	for job_id in job_ids:
+		job = by_id.pop(_as_job_id(job_id), None)
+		if job is not None:
+			selected.append(job)
+	if candidates and not selected:
+		raise InvalidAIResponse("AI response names no candidate job.")
+	return selected
+
+
+PROMPT_TEMPLATE = """
+        You are an expert AI career advisor. Your task is to analyze a list of available jobs and recommend the best matches for a user based on their profile and explicit preferences.
+
+        **User Profile:**
+        - Role: {role}
+        - Skills: {skills}
+        - Other Profile Data: (You can add more fields from the UserProfile model here if needed)
+
+        **User's Current Search Preferences:**
+        - Keywords: {search}
+        - Location: {location}
+        - Job Type: {job_type}
+        - Salary Range: {salary_range}
+        - Experience Level: {experience_level}
+
+        **Available Jobs (compact JSON; "desc" is a shortened description):**
+        {jobs}
+
+        **Your Task:**
+        Analyze all the available jobs and return a JSON array containing only the integer IDs of the jobs that are the best fit for the user, ordered from the absolute best match to the least. Do not include any explanations or other text outside of the JSON array.
+
+        Example Response: [10, 5, 23]
+        """
+
+
+def construct_prompt(profile, preferences, skills, jobs_data):
+	"""Build the prompt for the AI, returning ``(prompt, PromptStats)``.
+
+	Jobs are expected in rank order; the lowest ranked ones are dropped when the
+	prompt would exceed ``AI_PROMPT_BUDGET_BYTES``.
+	"""
+	fields = {
+		"role": profile.get_role_display(),
+		"skills": ', '.join(str(skill) for skill in skills) if skills else "Not specified",
+		"search": preferences.get('search', 'any'),
+		"location": preferences.get('location', 'any'),
+		"job_type": preferences.get('jobType', 'any'),
+		"salary_range": preferences.get('salaryRange', 'any'),
+		"experience_level": preferences.get('experienceLevel', 'any'),
+	}
+	header_bytes = len(PROMPT_TEMPLATE.format(jobs="", **fields).encode())
+	jobs_json, stats = prompting.encode_jobs(jobs_data, prompting.jobs_budget(header_bytes), active_jobs.updated_at)
+	prompt = PROMPT_TEMPLATE.format(jobs=jobs_json, **fields)
+	stats = stats._replace(prompt_bytes=len(prompt.encode()))
+	prompting.log_stats(stats)
+	metrics.observe("prompt_bytes", stats.prompt_bytes)
+	return prompt, stats
+
+
+def _cached(skills, preferences):
+	key = recommendation_cache.recommendation_key(skills, preferences, candidate_limit())
+	return key, recommendation_cache.get_recommendations(key)
+
+
+def _finish(key, candidates, text):
+	try:
+		jobs = select_jobs(candidates, parse_job_ids(text))
+	except InvalidAIResponse:
+		logger.warning("Unusable AI response, falling back to the local ranking: %.200r", text)
+		return RecommendationResult(candidates, "local", "MISS")
+	recommendation_cache.set_recommendations(key, jobs, "ai")
+	return RecommendationResult(jobs, "ai", "MISS")
+
+
+def recommend(profile, skills, preferences):
+	key, cached = _cached(skills, preferences)
+	if cached is not None:
+		return RecommendationResult(*cached, "HIT")
+
+	candidates = load_candidates(skills, preferences)
+	client, _ = get_client()
+	if not candidates or client is None:
+		return RecommendationResult(candidates, "local", "MISS")
+
+	prompt, stats = construct_prompt(profile, preferences, skills, candidates)
+	if not stats.jobs_included:
+		return RecommendationResult(candidates, "local", "MISS")
+	try:
+		with metrics.timed("ai"):
+			text = client.generate(prompt)
+	except AIServiceUnavailable:
+		return RecommendationResult(candidates, "local", "MISS")
+	return _finish(key, candidates, text)
+
+
+async def arecommend(profile, skills, preferences):
+	"""Async variant of :func:`recommend`; the model call never blocks the event loop."""
+	key, cached = await sync_to_async(_cached)(skills, preferences)
+	if cached is not None:
+		return RecommendationResult(*cached, "HIT")
+
+	candidates = await sync_to_async(load_candidates)(skills, preferences)
+	client, _ = get_client()
+	if not candidates or client is None:
+		return RecommendationResult(candidates, "local", "MISS")
+
+	prompt, stats = await sync_to_async(construct_prompt)(profile, preferences, skills, candidates)
+	if not stats.jobs_included:
+		return RecommendationResult(candidates, "local", "MISS")
+	try:
+		with metrics.timed("ai"):
+			text = await client.agenerate(prompt)
+	except AIServiceUnavailable:
+		return RecommendationResult(candidates, "local", "MISS")
+	return await sync_to_async(_finish)(key, candidates, text)
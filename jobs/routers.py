@@ -0,0 +1,72 @@
+"""Read-replica routing.
+
+Reads go to the replica only inside :func:`use_replica`, which viewsets using
+:class:`ReplicaReadMixin` enter around safe-method requests, authentication
+excepted. Everything else, including authentication, the reads that writes
+depend on and the loads of the in-process job snapshot, skill matrix and skill
+index (stamped with the shared change counters), stays on ``default`` so it
+never sees replication lag.
+"""
+import contextvars
+from contextlib import contextmanager
+
+from django.conf import settings
+
+_read_alias = contextvars.ContextVar("read_alias", default=None)
+
+
+def replica_alias():
+	"""The configured replica alias, or None when no replica is configured."""
+	alias = getattr(settings, "DATABASE_REPLICA_ALIAS", "replica")
+	return alias if alias in settings.DATABASES else None
+
+
+@contextmanager
+def _reading_from(alias):
+	token = _read_alias.set(alias)
+	try:
+		yield
+	finally:
+		_read_alias.reset(token)
+
+
+def use_replica():
+	"""Route reads made inside the block to the replica, when one is configured."""
+	return _reading_from(replica_alias())
+
+
+def use_default():
+	"""Route reads made inside the block to ``default``, e.g. within :func:`use_replica`."""
+	return _reading_from(None)
+
+
+class ReplicaReadMixin:
+	"""Serve GET/HEAD/OPTIONS handlers of a DRF view from the replica.
+
+	Authentication still reads from default. Streamed bodies are produced after
+	the handler returns and read from default.
+	"""
+	def dispatch(self, request, *args, **kwargs):
+		if request.method not in ("GET", "HEAD", "OPTIONS"):
+			return super().dispatch(request, *args, **kwargs)
+		with use_replica():
+			return super().dispatch(request, *args, **kwargs)
+
+	def perform_authentication(self, request):
+		with use_default():
+			super().perform_authentication(request)
+
+
+class ReplicaRouter:
+	def db_for_read(self, model, **hints):
+		return _read_alias.get()
+
+	def db_for_write(self, model, **hints):
+		return "default"
+
+	def allow_relation(self, obj1, obj2, **hints):
+		# The replica holds the same rows as default.
+		return True
+
+	def allow_migrate(self, db, app_label, model_name=None, **hints):
+		return db != replica_alias()
@@ -0,0 +1,183 @@
+"""Full-text search over job posts.
+
+On SQLite, job title, description, company and skill names are indexed in an
+FTS5 table that is kept up to date from model signals and ranked with BM25. Its
+tokenizer keeps ``+`` and ``#`` inside tokens, so c++ and c# are indexed as
+themselves rather than as the letter c. On PostgreSQL the same fields go into a
+GIN-indexed ``search_vector`` column, maintained the same way and ranked with
+ts_rank; c++ and c# are spelled out as cplusplus and csharp on both sides, as
+the tsvector parser drops the symbols. Any other database falls back to
+``icontains`` filtering. ``JOBS_SEARCH_BACKEND`` may name a backend class
+explicitly.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Exists, OuterRef, Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .models import JobPost, Skill
+
+FTS_TABLE = "jobs_jobpost_fts"
+SEARCH_TERM_RE = re.compile(r"\w[\w+#.]*")
+# c++ and c# as spelled out for PostgreSQL, whose tsvector parser drops the symbols.
+SYMBOL_PLUS_RE = re.compile(r"(\w)\+\+")
+SYMBOL_SHARP_RE = re.compile(r"(\w)#")
+
+
+class BasicSearchBackend:
+	"""Substring matching for databases without a full-text index."""
+	incremental = False
+
+	def filter(self, queryset, query):
+		skill_match = JobPost.skills.through.objects.filter(jobpost_id=OuterRef("pk"), skill__name__icontains=query)
+		return queryset.filter(
+			Q(title__icontains=query)
+			| Q(description__icontains=query)
+			| Q(company__icontains=query)
+			| Exists(skill_match)
+		)
+
+	def search(self, queryset, query):
+		return self.filter(queryset, query)
+
+	def index(self, job_ids):
+		pass
+
+	def remove(self, job_ids):
+		pass
+
+	def rebuild(self):
+		pass
+
+
+class SQLiteFTS5Backend(BasicSearchBackend):
+	"""FTS5 index ranked by BM25, with title matches weighted highest."""
+	incremental = True
+	# bm25() column weights for title, description, company and skills.
+	weights = (10.0, 1.0, 5.0, 5.0)
+
+	def match_expression(self, query):
+		"""Quote each term as an FTS5 prefix query so user input cannot inject syntax."""
+		terms = SEARCH_TERM_RE.findall(query)
+		return " ".join('"%s"*' % term.replace('"', '""') for term in terms)
+
+	def filter(self, queryset, query):
+		expression = self.match_expression(query)
+		if not expression:
+			return queryset.none()
+		return queryset.filter(id__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [expression]))
+
+	def search(self, queryset, query):
+		expression = self.match_expression(query)
+		if not expression:
+			return queryset.none()
+		weights = ", ".join(str(weight) for weight in self.weights)
+		return queryset.extra(
+			select={"search_rank": f"bm25({FTS_TABLE}, {weights})"},
+			tables=[FTS_TABLE],
+			where=[f"{FTS_TABLE}.rowid = {JobPost._meta.db_table}.id", f"{FTS_TABLE} MATCH %s"],
+			params=[expression],
+		).order_by("search_rank")
+
+	def _documents_sql(self):
+		through = JobPost.skills.through._meta.db_table
+		return (
+			f"SELECT job.id, job.title, job.description, job.company, "
+			f"COALESCE((SELECT group_concat(skill.name, ' ') FROM {through} link "
+			f"JOIN {Skill._meta.db_table} skill ON skill.id = link.skill_id "
+			f"WHERE link.jobpost_id = job.id), '') "
+			f"FROM {JobPost._meta.db_table} job"
+		)
+
+	def index(self, job_ids):
+		job_ids = list(job_ids)
+		if not job_ids:
+			return
+		placeholders = ", ".join(["%s"] * len(job_ids))
+		with connection.cursor() as cursor:
+			cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", job_ids)
+			cursor.execute(
+				f"INSERT INTO {FTS_TABLE} (rowid, title, description, company, skills) "
+				f"{self._documents_sql()} WHERE job.id IN ({placeholders})",
+				job_ids,
+			)
+
+	def remove(self, job_ids):
+		job_ids = list(job_ids)
+		if not job_ids:
+			return
+		placeholders = ", ".join(["%s"] * len(job_ids))
+		with connection.cursor() as cursor:
+			cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", job_ids)
+
+	def rebuild(self):
+		with connection.cursor() as cursor:
+			cursor.execute(f"DELETE FROM {FTS_TABLE}")
+			cursor.execute(f"INSERT INTO {FTS_TABLE} (rowid, title, description, company, skills) {self._documents_sql()}")
+
+
+def _spelled_out_sql(column):
+	# The SQL counterpart of PostgresSearchBackend.search_query.
+	return rf"regexp_replace(regexp_replace({column}, '(\w)\+\+', '\1plusplus', 'g'), '(\w)#', '\1sharp', 'g')"
+
+
+class PostgresSearchBackend(BasicSearchBackend):
+	"""Stored tsvector ranked with ts_rank, weighting title over skills and company over description."""
+	incremental = True
+	config = "english"
+
+	def search_query(self, query):
+		"""Spell out c++/c# as the stored vectors do (see :func:`_spelled_out_sql`)."""
+		return SYMBOL_SHARP_RE.sub(r"\1sharp", SYMBOL_PLUS_RE.sub(r"\1plusplus", query))
+
+	def _where(self):
+		return f"{JobPost._meta.db_table}.search_vector @@ websearch_to_tsquery('{self.config}', %s)"
+
+	def filter(self, queryset, query):
+		return queryset.extra(where=[self._where()], params=[self.search_query(query)])
+
+	def search(self, queryset, query):
+		search_query = self.search_query(query)
+		rank = f"ts_rank({JobPost._meta.db_table}.search_vector, websearch_to_tsquery('{self.config}', %s))"
+		return queryset.extra(
+			select={"search_rank": rank}, select_params=[search_query], where=[self._where()], params=[search_query],
+		).order_by("-search_rank")
+
+	def _update_sql(self):
+		through = JobPost.skills.through._meta.db_table
+		skills = (
+			f"COALESCE((SELECT string_agg(skill.name, ' ') FROM {through} link "
+			f"JOIN {Skill._meta.db_table} skill ON skill.id = link.skill_id WHERE link.jobpost_id = job.id), '')"
+		)
+		parts = (("job.title", "A"), (skills, "B"), ("job.company", "B"), ("job.description", "C"))
+		vector = " || ".join(
+			f"setweight(to_tsvector('{self.config}', {_spelled_out_sql(column)}), '{weight}')" for column, weight in parts
+		)
+		return f"UPDATE {JobPost._meta.db_table} job SET search_vector = {vector}"
+
+	def index(self, job_ids):
+		job_ids = list(job_ids)
+		if not job_ids:
+			return
+		with connection.cursor() as cursor:
+			cursor.execute(f"{self._update_sql()} WHERE job.id = ANY(%s)", [job_ids])
+
+	def rebuild(self):
+		with connection.cursor() as cursor:
+			cursor.execute(self._update_sql())
+
+
+VENDOR_BACKENDS = {
+	"sqlite": SQLiteFTS5Backend,
+	"postgresql": PostgresSearchBackend,
+}
+
+
+def get_search_backend():
+	backend_path = getattr(settings, "JOBS_SEARCH_BACKEND", None)
+	if backend_path:
+		return import_string(backend_path)()
+	return VENDOR_BACKENDS.get(connection.vendor, BasicSearchBackend)()
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from . import metrics
 from .models import JobPost, Skill
 
 
@@ -48,3 +49,107 @@ class JobPostSerializer(serializers.ModelSerializer):
 		if skills_data is not None:
 			instance.skills.set(skills_data)
 		return instance
+
+
+class JobPostBulkSerializer(serializers.ModelSerializer):
+	"""Validates one row of a bulk import; skills are given by name."""
+	type = serializers.ChoiceField(source="job_type", choices=JobPost.JobType.choices, required=False)
+	skills = serializers.ListField(child=serializers.CharField(max_length=100), required=False, default=list)
+
+	class Meta:
+		model = JobPost
+		fields = ["title", "description", "location", "company", "salary", "type", "status", "skills"]
+
+
+# Shared, unbound field used only for its datetime formatting so the fast path
+# renders timestamps exactly like JobPostSerializer (ISO 8601, current timezone).
+_datetime_field = serializers.DateTimeField()
+
+
+def _skills(job):
+	# Read the prefetch cache directly; building a related manager and queryset
+	# per row costs more than serializing the row itself.
+	prefetched = getattr(job, "_prefetched_objects_cache", {}).get("skills")
+	return prefetched if prefetched is not None else job.skills.all()
+
+
+def _employer_name(job):
+	# An unset employer reads as None, as in DRF's source="employer.username".
+	return job.employer.username if job.employer_id is not None else None
+
+
+def serialize_job(job):
+	"""Read-only equivalent of ``JobPostSerializer(job).data`` without DRF field machinery.
+
+	Expects ``employer`` to be joined and ``skills`` prefetched (see
+	``JobPostQuerySet.with_related``); keys and values match the serializer output,
+	including ``employer_name`` being None when there is no employer.
+	"""
+	created_at = _datetime_field.to_representation(job.created_at)
+	return {
+		"id": job.id,
+		"title": job.title,
+		"description": job.description,
+		"location": job.location,
+		"company": job.company,
+		"salary": job.salary,
+		"type": job.job_type,
+		"status": job.status,
+		"skills": [{"id": skill.id, "name": skill.name} for skill in _skills(job)],
+		"applications": job.applications_count,
+		"postedDate": created_at,
+		"created_at": created_at,
+		"employer_name": _employer_name(job),
+	}
+
+
+# Output field -> (model fields it reads, getter), for sparse fieldsets. Getters
+# receive the job and its formatted created_at, which is computed once per row.
+JOB_FIELDS = {
+	"id": (("id",), lambda job, created_at: job.id),
+	"title": (("title",), lambda job, created_at: job.title),
+	"description": (("description",), lambda job, created_at: job.description),
+	"location": (("location",), lambda job, created_at: job.location),
+	"company": (("company",), lambda job, created_at: job.company),
+	"salary": (("salary",), lambda job, created_at: job.salary),
+	"type": (("job_type",), lambda job, created_at: job.job_type),
+	"status": (("status",), lambda job, created_at: job.status),
+	"skills": ((), lambda job, created_at: [{"id": skill.id, "name": skill.name} for skill in _skills(job)]),
+	"applications": (("applications_count",), lambda job, created_at: job.applications_count),
+	"postedDate": (("created_at",), lambda job, created_at: created_at),
+	"created_at": (("created_at",), lambda job, created_at: created_at),
+	"employer_name": (("employer__username",), lambda job, created_at: _employer_name(job)),
+}
+
+# List rows without the long free-text description
+SUMMARY_FIELDS = tuple(name for name in JOB_FIELDS if name != "description")
+
+
+def project_jobs(queryset, fields):
+	"""Load only the columns and relations that ``fields`` read.
+
+	``id`` and ``created_at`` are always loaded, as ordering and cursor pagination use them.
+	"""
+	columns = {"id", "created_at"}
+	for name in fields:
+		columns.update(JOB_FIELDS[name][0])
+	queryset = queryset.select_related(None).prefetch_related(None)
+	if "employer_name" in fields:
+		queryset = queryset.select_related("employer")
+	if "skills" in fields:
+		queryset = queryset.prefetch_related("skills")
+	return queryset.only(*columns)
+
+
+def serialize_jobs(jobs, fields=None):
+	"""Serialize jobs in full, or only ``fields`` (names from ``JOB_FIELDS``)."""
+	with metrics.timed("serialize"):
+		if fields is None:
+			return [serialize_job(job) for job in jobs]
+		getters = [(name, JOB_FIELDS[name][1]) for name in fields]
+		dated = "created_at" in fields or "postedDate" in fields
+		rows = []
+		for job in jobs:
+			created_at = _datetime_field.to_representation(job.created_at) if dated else None
+			rows.append({name: getter(job, created_at) for name, getter in getters})
+		return rows
@@ -0,0 +1,120 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.functions import Now
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from . import metrics
+from .authentication import invalidate_user
+from .cache import bump_jobs_version, bump_skills_version
+from .matching import skill_matrix
+from .models import JobPost, Skill, UserProfile
+from .search import get_search_backend
+from .skill_index import skill_index
+from .snapshot import active_jobs
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+	# Counts queries and their time for the request being served, if any.
+	connection.execute_wrappers.append(metrics.db_wrapper)
+
+
+@receiver(connection_created)
+def tune_sqlite(sender, connection, **kwargs):
+	if connection.vendor != "sqlite" or connection.is_in_memory_db():
+		return
+	with connection.cursor() as cursor:
+		for pragma, value in getattr(settings, "SQLITE_PRAGMAS", {}).items():
+			cursor.execute(f"PRAGMA {pragma} = {value}")
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+	invalidate_user(instance.username)
+
+
+@receiver([post_save, post_delete], sender=UserProfile)
+def invalidate_cached_profile(sender, instance, **kwargs):
+	invalidate_user(instance.user.username)
+
+
+def jobs_changed(job_ids):
+	# Any job change invalidates cached recommendations and HTTP validators,
+	# and refreshes the job's skill-matrix row, snapshot entry and search document.
+	# This happens once the write commits: a version moved earlier would let another
+	# process pair it with the old rows, and a rollback would leave phantom entries.
+	job_ids = list(job_ids)
+	transaction.on_commit(lambda: _refresh_jobs(job_ids))
+
+
+def _refresh_jobs(job_ids):
+	version = bump_jobs_version()
+	skill_matrix.update_jobs(job_ids, version)
+	active_jobs.update_jobs(job_ids, version)
+	backend = get_search_backend()
+	if backend.incremental:
+		backend.index(job_ids)
+
+
+def touch_jobs(job_ids):
+	"""Move ``updated_at`` forward for jobs whose serialized form changed without a save()."""
+	JobPost.objects.filter(pk__in=list(job_ids)).update(updated_at=Now())
+
+
+@receiver(post_save, sender=JobPost)
+def index_job(sender, instance, raw=False, **kwargs):
+	if not raw:
+		jobs_changed([instance.pk])
+
+
+@receiver(post_delete, sender=JobPost)
+def unindex_job(sender, instance, **kwargs):
+	transaction.on_commit(lambda job_ids=[instance.pk]: _remove_jobs(job_ids))
+
+
+def _remove_jobs(job_ids):
+	version = bump_jobs_version()
+	skill_matrix.remove_jobs(job_ids, version)
+	active_jobs.remove_jobs(job_ids, version)
+	backend = get_search_backend()
+	if backend.incremental:
+		backend.remove(job_ids)
+
+
+@receiver([post_save, post_delete], sender=Skill)
+def invalidate_skill_index(sender, instance, created=False, raw=False, **kwargs):
+	new_skill = [(instance.pk, instance.name)] if created and not raw else None
+
+	def refresh():
+		version = bump_skills_version()
+		if new_skill:
+			skill_index.add(new_skill, version)
+	transaction.on_commit(refresh)
+
+
+@receiver(post_save, sender=Skill)
+def reindex_skill_jobs(sender, instance, created=False, raw=False, **kwargs):
+	if not created and not raw:
+		job_ids = list(instance.job_posts.values_list("pk", flat=True))
+		touch_jobs(job_ids)
+		jobs_changed(job_ids)
+
+
+@receiver(m2m_changed, sender=JobPost.skills.through)
+def reindex_job_skills(sender, instance, action, reverse, pk_set, **kwargs):
+	if not reverse:
+		job_ids = [instance.pk] if action in ("post_add", "post_remove", "post_clear") else []
+	elif action == "pre_clear":
+		# The affected jobs are only known before a reverse clear runs.
+		instance._cleared_job_ids = list(instance.job_posts.values_list("pk", flat=True))
+		job_ids = []
+	elif action == "post_clear":
+		job_ids = getattr(instance, "_cleared_job_ids", [])
+	else:
+		job_ids = list(pk_set or []) if action in ("post_add", "post_remove") else []
+	if job_ids:
+		touch_jobs(job_ids)
+		jobs_changed(job_ids)
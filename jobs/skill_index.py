@@ -0,0 +1,99 @@
+"""In-process prefix index over skill names.
+
+Names are normalized (whitespace collapsed, case folded) into a sorted list,
+so autocomplete is a binary search plus a short scan and exact lookups are a
+dict hit. The index is rebuilt lazily whenever the shared skills version
+changes, which skill saves and deletes bump through signals. New skills are
+inserted in place instead when the index was current up to their creation.
+"""
+import threading
+from bisect import bisect_left, bisect_right
+
+from .cache import get_skills_version
+from .models import Skill
+from .routers import use_default
+
+
+def normalize_skill_name(name):
+	"""Display form of a skill name: surrounding and repeated whitespace removed."""
+	return " ".join(str(name).split())
+
+
+def skill_key(name):
+	"""Lookup key under which spelling variants such as "Python" and "python " collide."""
+	return normalize_skill_name(name).casefold()
+
+
+class SkillPrefixIndex:
+	def __init__(self):
+		self._lock = threading.Lock()
+		# Swapped as a whole on rebuild, so readers never see a half-built index.
+		self._state = ((), (), {}, None)  # sorted keys, (id, name) per key, key -> (id, name), version
+
+	def _current(self):
+		state = self._state
+		version = get_skills_version()
+		if state[3] != version:
+			with self._lock:
+				state = self._state
+				if state[3] != version:
+					state = self._state = self._build(version)
+		return state
+
+	def add(self, skills, version):
+		"""Insert newly created ``(id, name)`` skills whose creation moved the skills version to ``version``.
+
+		An index that missed an earlier change (made elsewhere) is left stale, to be rebuilt.
+		"""
+		with self._lock:
+			keys, entries, by_key, current = self._state
+			if current is None or current != version - 1:
+				return
+			keys, entries, by_key = list(keys), list(entries), dict(by_key)
+			for skill_id, name in skills:
+				key = skill_key(name)
+				if by_key.get(key, (None,))[0] == skill_id:
+					continue
+				# New ids are the highest, so they sort last among equal keys.
+				position = bisect_right(keys, key)
+				keys.insert(position, key)
+				entries.insert(position, (skill_id, name))
+				by_key.setdefault(key, (skill_id, name))
+			self._state = (tuple(keys), tuple(entries), by_key, version)
+
+	def clear(self):
+		"""Forget the loaded index; the next lookup rebuilds it."""
+		with self._lock:
+			self._state = ((), (), {}, None)
+
+	def _build(self, version):
+		# From default, as the version it is stamped with may be ahead of a replica.
+		with use_default():
+			entries = sorted(
+				(skill_key(name), skill_id, name) for skill_id, name in Skill.objects.values_list("id", "name")
+			)
+		by_key = {}
+		for key, skill_id, name in entries:
+			by_key.setdefault(key, (skill_id, name))
+		return tuple(key for key, _, _ in entries), tuple((skill_id, name) for _, skill_id, name in entries), by_key, version
+
+	def search(self, prefix, limit=10):
+		"""Skills whose normalized name starts with ``prefix``, alphabetically, as (id, name) pairs."""
+		keys, skills, _, _ = self._current()
+		prefix = skill_key(prefix)
+		results = []
+		seen = set()
+		position = bisect_left(keys, prefix)
+		while position < len(keys) and len(results) < limit and keys[position].startswith(prefix):
+			if keys[position] not in seen:
+				seen.add(keys[position])
+				results.append(skills[position])
+			position += 1
+		return results
+
+	def find(self, name):
+		"""(id, name) of the skill matching ``name`` after normalization, or None."""
+		return self._current()[2].get(skill_key(name))
+
+
+skill_index = SkillPrefixIndex()
@@ -0,0 +1,215 @@
+"""In-process snapshot of active jobs for read-heavy paths.
+
+Active jobs are kept pre-serialized (the ``serialize_job`` dicts) together with
+their encoded JSON, newest first. The snapshot is an immutable state swapped
+as a whole (copy-on-write), so readers take no lock and never see a partial
+update. Model signals patch it incrementally. Readers compare it against the
+shared job-set and application-count versions and rebuild it, or just re-read
+the counts of the jobs that got applications, when another process changed
+something. In steady state, reading it costs two cache lookups and no queries.
+Each job is tokenized for ranking when it is loaded, and the BM25 index over the
+snapshot is built at most once per state.
+
+The dicts are shared between requests and must be treated as read-only.
+"""
+import logging
+import sys
+import threading
+from typing import NamedTuple
+
+from .cache import APPLICATIONS_VERSION_KEY, get_changes, get_jobs_version, get_version
+from .models import JobPost
+from .ranking import BM25Index, job_terms
+from .routers import use_default
+from .serializers import serialize_job
+from .streaming import encode_job
+
+logger = logging.getLogger(__name__)
+
+
+class Entry(NamedTuple):
+	order: tuple  # sorts newest first
+	row: dict
+	data: bytes
+	updated_at: float
+	terms: dict  # ranking.job_terms of ``row``
+
+
+class State(NamedTuple):
+	entries: dict  # job id -> Entry
+	rows: tuple  # serialized jobs, newest first
+	data: tuple  # encoded JSON of ``rows``, same order
+	jobs_version: object
+	applications_version: object
+
+
+EMPTY = State({}, (), (), None, None)
+
+
+def _entry(job):
+	row = serialize_job(job)
+	return Entry((-job.created_at.timestamp(), -job.id), row, encode_job(row), job.updated_at.timestamp(), job_terms(row))
+
+
+def _state(entries, jobs_version, applications_version):
+	ordered = sorted(entries.values())
+	return State(
+		entries,
+		tuple(entry.row for entry in ordered),
+		tuple(entry.data for entry in ordered),
+		jobs_version,
+		applications_version,
+	)
+
+
+def _advanced(state, version):
+	# A snapshot that missed an earlier change (made elsewhere) is not made current
+	# by patching this one; it is left without a version, so the next read rebuilds it.
+	return version if state.jobs_version == version - 1 else None
+
+
+class ActiveJobsSnapshot:
+	def __init__(self):
+		self._lock = threading.Lock()
+		self._state = EMPTY
+		self._ranking = (EMPTY, None)  # (state, BM25Index over its rows)
+
+	def _load(self, job_ids=None):
+		# Always from default: the snapshot is stamped with the shared versions, which a
+		# lagging replica may not have caught up with. Loads can start inside use_replica().
+		with use_default():
+			jobs = JobPost.objects.active().with_related()
+			if job_ids is not None:
+				jobs = jobs.filter(pk__in=job_ids)
+			return {job.id: _entry(job) for job in jobs}
+
+	def rebuild(self):
+		with self._lock:
+			self._state = self._build()
+			return self._state
+
+	def clear(self):
+		"""Forget the loaded snapshot; the next read rebuilds it."""
+		with self._lock:
+			self._state = EMPTY
+			self._ranking = (EMPTY, None)
+
+	def _build(self):
+		# Versions are read first, so a write racing the load leaves them stale
+		# and the next reader rebuilds again rather than keeping missed changes.
+		jobs_version, applications_version = get_jobs_version(), get_version(APPLICATIONS_VERSION_KEY)
+		state = _state(self._load(), jobs_version, applications_version)
+		logger.info("Active jobs snapshot rebuilt: %d jobs, %d bytes of JSON", len(state.rows), sum(map(len, state.data)))
+		return state
+
+	def _refresh_counts(self, state, applications_version):
+		"""Re-read only application counts after applications were recorded.
+
+		Only the jobs recorded under the versions in between are read, or every
+		active job when those are no longer known.
+		"""
+		job_ids = get_changes(APPLICATIONS_VERSION_KEY, state.applications_version, applications_version)
+		counts = JobPost.objects.active()
+		if job_ids is not None:
+			counts = counts.filter(pk__in=[job_id for job_id in job_ids if job_id in state.entries])
+		entries = dict(state.entries)
+		with use_default():
+			counts = list(counts.values_list("id", "applications_count"))
+		for job_id, count in counts:
+			entry = entries.get(job_id)
+			if entry is not None and entry.row["applications"] != count:
+				row = {**entry.row, "applications": count}
+				entries[job_id] = entry._replace(row=row, data=encode_job(row))
+		return _state(entries, state.jobs_version, applications_version)
+
+	def current(self):
+		state = self._state
+		jobs_version, applications_version = get_jobs_version(), get_version(APPLICATIONS_VERSION_KEY)
+		if state.jobs_version == jobs_version and state.applications_version == applications_version:
+			return state
+		with self._lock:
+			state = self._state
+			if state.jobs_version != jobs_version:
+				state = self._state = self._build()
+			elif state.applications_version != applications_version:
+				state = self._state = self._refresh_counts(state, applications_version)
+			return state
+
+	def update_jobs(self, job_ids, version):
+		"""Re-read the given jobs after they were saved or their skills changed, moving the job-set version to ``version``."""
+		job_ids = list(job_ids)
+		with self._lock:
+			state = self._state
+			if state.jobs_version is None:
+				return  # not loaded yet; the first read builds it from scratch
+			entries = dict(state.entries)
+			for job_id in job_ids:
+				entries.pop(job_id, None)
+			entries.update(self._load(job_ids))
+			self._state = _state(entries, _advanced(state, version), state.applications_version)
+
+	def remove_jobs(self, job_ids, version):
+		with self._lock:
+			state = self._state
+			if state.jobs_version is None:
+				return
+			entries = dict(state.entries)
+			for job_id in job_ids:
+				entries.pop(job_id, None)
+			self._state = _state(entries, _advanced(state, version), state.applications_version)
+
+	def rows(self):
+		"""Serialized active jobs, newest first."""
+		return self.current().rows
+
+	def ranking_index(self):
+		"""BM25 index over :meth:`rows`, rebuilt only when the snapshot changed."""
+		state = self.current()
+		indexed, index = self._ranking
+		if indexed is not state:
+			entries = state.entries
+			index = BM25Index(state.rows, terms=lambda row: entries[row["id"]].terms)
+			self._ranking = (state, index)
+		return index
+
+	def encoded(self):
+		"""Encoded JSON of :meth:`rows`, in the same order."""
+		return self.current().data
+
+	def updated_at(self, job_id):
+		"""``updated_at`` timestamp of a job as loaded in the snapshot, or None."""
+		entry = self._state.entries.get(job_id)
+		return entry.updated_at if entry is not None else None
+
+	def stats(self):
+		"""Job count and measured memory of the loaded snapshot (not loading it)."""
+		state = self._state
+		seen = set()
+		row_bytes = sum(_deep_size(row, seen) for row in state.rows)
+		json_bytes = sum(sys.getsizeof(data) for data in state.data)
+		total = row_bytes + json_bytes + sys.getsizeof(state.entries) + sys.getsizeof(state.rows) + sys.getsizeof(state.data)
+		count = len(state.rows)
+		return {
+			"jobs": count,
+			"loaded": state.jobs_version is not None,
+			"row_bytes": row_bytes,
+			"json_bytes": json_bytes,
+			"total_bytes": total,
+			"bytes_per_job": round(total / count) if count else 0,
+		}
+
+
+def _deep_size(obj, seen):
+	# Objects shared between rows (interned strings, small ints) are counted once.
+	if id(obj) in seen:
+		return 0
+	seen.add(id(obj))
+	size = sys.getsizeof(obj)
+	if isinstance(obj, dict):
+		size += sum(_deep_size(key, seen) + _deep_size(value, seen) for key, value in obj.items())
+	elif isinstance(obj, (list, tuple)):
+		size += sum(_deep_size(item, seen) for item in obj)
+	return size
+
+
+active_jobs = ActiveJobsSnapshot()
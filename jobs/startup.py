@@ -0,0 +1,77 @@
+"""Worker warm-up and boot import-time measurement.
+
+Heavy SDKs (``firebase_admin``, ``google.generativeai``) are imported on first
+use, so management commands never load them. Web workers load them up front
+instead: ``server.wsgi`` and ``server.asgi`` call :func:`preload`, which runs
+the ``STARTUP_PRELOAD`` hooks once per process (in the master, before forking,
+under ``gunicorn --preload``).
+
+Hooks run in the master must be fork-safe: they may import modules and store
+configuration, but must not open connections or start threads, which a forked
+worker would inherit broken. The shipped hooks qualify. Firebase's app keeps
+its credentials and builds its HTTP session on the first verification,
+``genai.configure`` creates its client on the first call, and the model thread
+pool starts its threads on the first submit; the locks they take are released
+before :func:`preload` returns. A hook that does need sockets or threads should
+run per worker instead, from gunicorn's ``post_fork`` server hook.
+"""
+import logging
+import os
+import re
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+_IMPORTTIME = re.compile(r"^import time:\s*(\d+) \|\s*(\d+) \|( +)(\S+)$", re.MULTILINE)
+
+
+def preload():
+	"""Run the ``STARTUP_PRELOAD`` hooks; a failing hook is logged, not raised."""
+	for path in getattr(settings, "STARTUP_PRELOAD", ()):
+		started = time.perf_counter()
+		try:
+			import_string(path)()
+		except Exception:
+			logger.exception("Startup preload hook %s failed", path)
+			continue
+		logger.info("Preloaded %s in %.0f ms", path, (time.perf_counter() - started) * 1000)
+
+
+def parse_importtime(output):
+	"""(module, self µs, cumulative µs, depth) for each line of ``python -X importtime`` output."""
+	return [
+		(name, int(own), int(cumulative), (len(indent) - 1) // 2)
+		for own, cumulative, indent, name in _IMPORTTIME.findall(output)
+	]
+
+
+def boot_code():
+	"""What a worker imports before serving: Django's app registry and the URLconf with every view."""
+	return f"import django; django.setup(); import {settings.ROOT_URLCONF}"
+
+
+def measure_boot(runs):
+	"""Boot fresh interpreters under ``-X importtime``; one dict of wall/import ms and modules per run."""
+	env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "server.settings")}
+	results = []
+	for _ in range(runs):
+		started = time.perf_counter()
+		process = subprocess.run(
+			[sys.executable, "-X", "importtime", "-c", boot_code()],
+			cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+		)
+		wall_ms = (time.perf_counter() - started) * 1000
+		if process.returncode:
+			raise RuntimeError(f"Boot failed:\n{process.stderr[-2000:]}")
+		modules = parse_importtime(process.stderr)
+		results.append({
+			"wall_ms": wall_ms,
+			"import_ms": sum(cumulative for _, _, cumulative, depth in modules if depth == 0) / 1000,
+			"modules": modules,
+		})
+	return results
@@ -0,0 +1,69 @@
+"""Incremental JSON rendering for large job listings.
+
+Rows are read with ``QuerySet.iterator(chunk_size=...)`` (which also prefetches
+skills per chunk), serialized one chunk at a time and written out as they are
+produced, so worker memory is bounded by the chunk size rather than the number
+of rows.
+"""
+import json
+from itertools import islice
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+from .serializers import serialize_jobs
+
+
+def chunk_size():
+	return getattr(settings, 'JOBS_STREAM_CHUNK_SIZE', 500)
+
+
+def iter_serialized_jobs(queryset, size=None, fields=None):
+	size = size or chunk_size()
+	rows = queryset.iterator(chunk_size=size)
+	while True:
+		chunk = list(islice(rows, size))
+		if not chunk:
+			return
+		yield from serialize_jobs(chunk, fields)
+
+
+def encode_job(row):
+	"""UTF-8 JSON for one serialized job, byte for byte what DRF's JSONRenderer writes for it."""
+	data = json.dumps(row, cls=JSONEncoder, ensure_ascii=False, separators=(",", ":"))
+	# Like the renderer, escape the line separators that are invalid in JavaScript strings.
+	return data.replace("\u2028", "\\u2028").replace("\u2029", "\\u2029").encode()
+
+
+def _json_array(encoded):
+	yield b"["
+	for index, data in enumerate(encoded):
+		yield (b"," if index else b"") + data
+	yield b"]"
+
+
+def _ndjson(encoded):
+	for data in encoded:
+		yield data + b"\n"
+
+
+def json_array_response(encoded):
+	"""Stream already encoded jobs as one JSON array."""
+	return StreamingHttpResponse(_json_array(encoded), content_type="application/json")
+
+
+def ndjson_response(encoded, filename=None):
+	"""Stream already encoded jobs as newline-delimited JSON."""
+	response = StreamingHttpResponse(_ndjson(encoded), content_type="application/x-ndjson")
+	if filename:
+		response["Content-Disposition"] = f'attachment; filename="{filename}"'
+	return response
+
+
+def stream_json_array(queryset, fields=None):
+	return json_array_response(map(encode_job, iter_serialized_jobs(queryset, fields=fields)))
+
+
+def stream_ndjson(queryset, filename=None, fields=None):
+	return ndjson_response(map(encode_job, iter_serialized_jobs(queryset, fields=fields)), filename)
@@ -0,0 +1,119 @@
+"""Background AI recommendation tasks.
+
+An asynchronous ``POST /ai/recommendations/`` stores a :class:`RecommendationTask`
+and returns its id at once. The recommendation then runs on a small in-process
+thread pool and its result is written to the task row, so polling it with
+``GET /ai/recommendations/tasks/<id>/`` is a single primary-key lookup that
+never waits on the model. Bursts queue up in the pool instead of holding
+request workers.
+
+Identical requests share one computation (singleflight): tasks whose request
+key is already in flight in this process wait on that run and receive its result,
+and a user repeating a request still in flight gets the same task back.
+
+A task reported lost stays failed even if its run finishes later. Expired
+results are deleted at most every ``AI_TASK_CLEANUP_INTERVAL`` seconds per process.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from . import cache as recommendation_cache
+from .models import RecommendationTask
+from .recommendations import candidate_limit, recommend
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_inflight = {}  # request key -> {task id: user id} of tasks waiting on its run
+_executor = None
+_next_cleanup = 0.0  # time.monotonic() after which expired results are deleted again
+
+
+def _get_executor():
+	global _executor
+	if _executor is None:
+		with _lock:
+			if _executor is None:
+				_executor = ThreadPoolExecutor(
+					max_workers=getattr(settings, "AI_TASK_WORKERS", 4), thread_name_prefix="recommendations",
+				)
+	return _executor
+
+
+def submit(profile, skills, preferences):
+	"""Queue a recommendation for ``profile`` and return its task."""
+	key = recommendation_cache.recommendation_key(skills, preferences, candidate_limit())
+	user_id = profile.user_id
+	with _lock:
+		waiting = _inflight.get(key, {})
+		task_id = next((task_id for task_id, owner in waiting.items() if owner == user_id), None)
+	if task_id is not None:
+		task = RecommendationTask.objects.filter(pk=task_id).first()
+		if task is not None:
+			return task
+
+	task = RecommendationTask.objects.create(user_id=user_id, key=key)
+	with _lock:
+		waiting = _inflight.get(key)
+		if waiting is not None:
+			waiting[task.pk] = user_id
+			return task
+		_inflight[key] = {task.pk: user_id}
+	_get_executor().submit(_run, key, profile, skills, preferences)
+	return task
+
+
+def _run(key, profile, skills, preferences):
+	try:
+		try:
+			result = recommend(profile, skills, preferences)
+			fields = {"status": RecommendationTask.Status.DONE, "source": result.source, "result": result.jobs}
+		except Exception:
+			logger.exception("Recommendation task failed")
+			fields = {"status": RecommendationTask.Status.FAILED, "error": "Recommendation failed."}
+		finally:
+			with _lock:
+				task_ids = list(_inflight.pop(key, ()))
+
+		# Tasks already reported lost by get_task keep that outcome.
+		RecommendationTask.objects.filter(pk__in=task_ids, status=RecommendationTask.Status.PENDING).update(
+			finished_at=timezone.now(), **fields,
+		)
+		_delete_expired()
+	except Exception:
+		logger.exception("Could not store recommendation task results")
+	finally:
+		close_old_connections()
+
+
+def _delete_expired():
+	global _next_cleanup
+	with _lock:
+		if time.monotonic() < _next_cleanup:
+			return
+		_next_cleanup = time.monotonic() + getattr(settings, "AI_TASK_CLEANUP_INTERVAL", 300)
+	ttl = getattr(settings, "AI_TASK_RESULT_TTL", 3600)
+	RecommendationTask.objects.filter(finished_at__lt=timezone.now() - timedelta(seconds=ttl)).delete()
+
+
+def get_task(task_id, user):
+	"""The user's task, with unfinished tasks that outlived ``AI_TASK_TIMEOUT`` marked failed."""
+	task = RecommendationTask.objects.filter(pk=task_id, user=user).first()
+	if task is None or task.status != RecommendationTask.Status.PENDING:
+		return task
+	timeout = getattr(settings, "AI_TASK_TIMEOUT", 300)
+	if task.created_at < timezone.now() - timedelta(seconds=timeout):
+		# The process running it went away; its result will never arrive. A result
+		# that landed since the read above wins.
+		RecommendationTask.objects.filter(pk=task.pk, status=RecommendationTask.Status.PENDING).update(
+			status=RecommendationTask.Status.FAILED, error="Recommendation task was lost.", finished_at=timezone.now(),
+		)
+		task.refresh_from_db()
+	return task
@@ -0,0 +1,70 @@
+"""Offline stand-ins for external services, for tests and benchmarks."""
+import time
+from contextlib import contextmanager
+
+
+class FakeFirebaseAuth:
+	"""Drop-in for ``firebase_admin.auth`` that verifies locally issued tokens.
+
+	Tokens have the form ``fake:<uid>:<email>:<exp>``. ``latency`` simulates the
+	cost of signature verification and ``calls`` counts verifications.
+	"""
+
+	class InvalidIdTokenError(ValueError):
+		pass
+
+	def __init__(self, latency=0.0, lifetime=3600):
+		self.latency = latency
+		self.lifetime = lifetime
+		self.calls = 0
+
+	def issue_token(self, uid, email=""):
+		return f"fake:{uid}:{email}:{int(time.time()) + self.lifetime}"
+
+	def verify_id_token(self, id_token, check_revoked=False):
+		self.calls += 1
+		if self.latency:
+			time.sleep(self.latency)
+		parts = id_token.split(":")
+		if len(parts) != 4 or parts[0] != "fake" or not parts[3].isdigit():
+			raise self.InvalidIdTokenError("Malformed token")
+		_, uid, email, exp = parts
+		if int(exp) <= time.time():
+			raise self.InvalidIdTokenError("Token expired")
+		return {"uid": uid, "email": email, "exp": int(exp), "iat": int(exp) - self.lifetime}
+
+
+@contextmanager
+def fake_firebase(fake=None):
+	"""Route ``FirebaseAuthentication`` through a :class:`FakeFirebaseAuth`."""
+	from . import authentication
+
+	fake = fake or FakeFirebaseAuth()
+	original = authentication.fb_auth, authentication.ensure_firebase_initialized
+	authentication.fb_auth = fake
+	authentication.ensure_firebase_initialized = lambda: None
+	authentication.clear_auth_caches()
+	try:
+		yield fake
+	finally:
+		authentication.fb_auth, authentication.ensure_firebase_initialized = original
+		authentication.clear_auth_caches()
+
+
+def reset_caches():
+	"""Clear every configured cache and the in-process job, skill and prompt state.
+
+	Change counters restart with the cleared caches, so structures stamped with
+	an earlier counter value must be dropped as well.
+	"""
+	from django.core.cache import caches
+
+	from .matching import skill_matrix
+	from .prompting import _fragments
+	from .skill_index import skill_index
+	from .snapshot import active_jobs
+
+	for cache in caches.all():
+		cache.clear()
+	for state in (skill_matrix, active_jobs, skill_index, _fragments):
+		state.clear()
@@ -0,0 +1,1174 @@
+import asyncio
+import gzip
+import io
+import json
+import os
+import threading
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import DatabaseError, IntegrityError, connection, connections, transaction
+from django.db.models.query import QuerySet
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from . import ai_client, authentication, bulk, coalescing, counters, fake_genai, metrics, profiling, prompting, ranking, search, tasks, throttling
+from . import cache as recommendation_cache
+from .matching import skill_matrix
+from .middleware import CompressionMiddleware, accepted_encodings
+from .models import JobApplication, JobPost, RecommendationTask, RequestProfile, Skill, UserProfile
+from .recommendations import candidate_limit, load_candidates, recommend
+from .routers import use_replica
+from .serializers import JOB_FIELDS, SUMMARY_FIELDS, JobPostSerializer, serialize_job, serialize_jobs
+from .skill_index import skill_index
+from .snapshot import active_jobs
+from .streaming import encode_job
+from .testing import fake_firebase, reset_caches
+
+
+class JobsTestCase(TestCase):
+	"""Resets every cache and routes Firebase through the offline stand-in."""
+
+	def setUp(self):
+		reset_caches()
+		self.firebase = self.enterContext(fake_firebase())
+
+	def make_user(self, uid, role=UserProfile.Role.JOB_SEEKER, skills=()):
+		user = User.objects.create(username=uid, email=f"{uid}@example.com")
+		profile = UserProfile.objects.create(user=user, role=role)
+		profile.skills.set(skills)
+		return user
+
+	def committed(self):
+		"""Run the on-commit hooks of writes made in the block, as a committed transaction would."""
+		return self.captureOnCommitCallbacks(execute=True)
+
+	def make_job(self, employer, skills=(), **fields):
+		fields.setdefault("title", "Backend developer")
+		fields.setdefault("description", "Build APIs.")
+		with self.committed():
+			job = JobPost.objects.create(employer=employer, **fields)
+			job.skills.set(skills)
+		return job
+
+	def auth(self, user):
+		return {"HTTP_AUTHORIZATION": f"Bearer {self.firebase.issue_token(user.username, user.email)}"}
+
+
+class RecommendationCacheTests(JobsTestCase):
+	def test_versions_live_in_the_version_cache(self):
+		before = recommendation_cache.get_jobs_version()
+		after = recommendation_cache.bump_jobs_version()
+		self.assertEqual(after, before + 1)
+		self.assertEqual(caches["versions"].get(recommendation_cache.JOBS_VERSION_KEY), after)
+		self.assertIsNone(caches["default"].get(recommendation_cache.JOBS_VERSION_KEY))
+
+	def test_job_change_moves_recommendation_key(self):
+		key = recommendation_cache.recommendation_key(["python"], {})
+		employer = self.make_user("employer", UserProfile.Role.EMPLOYER)
+		self.make_job(employer)
+		self.assertNotEqual(recommendation_cache.recommendation_key(["python"], {}), key)
+
+	def test_cache_hit_keeps_the_cached_source(self):
+		seeker = self.make_user("seeker")
+		python = Skill.objects.create(name="Python")
+		job = self.make_job(self.make_user("employer", UserProfile.Role.EMPLOYER), skills=[python])
+		result = recommend(seeker.profile, ["Python"], {})
+		self.assertEqual((result.source, result.cache), ("local", "MISS"))
+
+		key = recommendation_cache.recommendation_key(["Python"], {}, candidate_limit())
+		recommendation_cache.set_recommendations(key, [{"id": job.pk}], "local")
+		result = recommend(seeker.profile, ["Python"], {})
+		self.assertEqual((result.jobs, result.source, result.cache), ([{"id": job.pk}], "local", "HIT"))
+
+
+class AuthenticationCacheTests(JobsTestCase):
+	def test_role_change_applies_on_the_next_request(self):
+		seeker = self.make_user("seeker")
+		self.assertEqual(self.client.get("/api/me", **self.auth(seeker)).json()["role"], UserProfile.Role.JOB_SEEKER)
+		with self.captureOnCommitCallbacks(execute=True):
+			self.client.post("/api/set-role", {"role": UserProfile.Role.EMPLOYER}, content_type="application/json", **self.auth(seeker))
+		self.assertEqual(self.client.get("/api/me", **self.auth(seeker)).json()["role"], UserProfile.Role.EMPLOYER)
+
+	def test_invalidation_from_another_process_is_seen(self):
+		seeker = self.make_user("seeker")
+		self.client.get("/api/me", **self.auth(seeker))
+		# Another worker changed the role: this process's entry is stale, only the shared counter moved.
+		UserProfile.objects.filter(user=seeker).update(role=UserProfile.Role.EMPLOYER)
+		recommendation_cache.bump_version(authentication._user_version_key(seeker.username))
+		self.assertEqual(self.client.get("/api/me", **self.auth(seeker)).json()["role"], UserProfile.Role.EMPLOYER)
+
+	def test_cached_user_skips_queries(self):
+		seeker = self.make_user("seeker")
+		self.client.get("/api/me", **self.auth(seeker))
+		with self.assertNumQueries(1):  # the profile's skills
+			self.client.get("/api/me", **self.auth(seeker))
+
+
+class QueryCountTests(JobsTestCase):
+	"""Query counts must not grow with the number of jobs or skills (no N+1)."""
+
+	def setUp(self):
+		super().setUp()
+		self.employer = self.make_user("employer", UserProfile.Role.EMPLOYER)
+		self.skills = [Skill.objects.create(name=name) for name in ("Python", "Django", "SQL")]
+		self.seeker = self.make_user("seeker", skills=self.skills[:2])
+
+	def add_jobs(self, count):
+		for index in range(count):
+			self.make_job(self.employer, skills=self.skills, title=f"Job {index}")
+
+	def test_list(self):
+		for count in (3, 15):
+			self.add_jobs(count)
+			with self.assertNumQueries(2):  # page, skills prefetch
+				response = self.client.get("/api/jobs/")
+			self.assertEqual(response.status_code, 200)
+
+	def test_list_for_seeker(self):
+		self.client.get("/api/jobs/", **self.auth(self.seeker))  # caches the user and builds the skill matrix
+		for count in (3, 15):
+			self.add_jobs(count)
+			self.client.get("/api/jobs/", **self.auth(self.seeker))
+			with self.assertNumQueries(3):  # seeker skills, page, skills prefetch
+				response = self.client.get("/api/jobs/", **self.auth(self.seeker))
+			self.assertTrue(all(row["match_score"] is not None for row in response.json()["results"]))
+
+	def test_detail(self):
+		self.add_jobs(1)
+		job = JobPost.objects.get()
+		with self.assertNumQueries(3):  # updated_at lookup, job with employer, skills prefetch
+			response = self.client.get(f"/api/jobs/{job.pk}/")
+		self.assertEqual(len(response.json()["skills"]), 3)
+
+	def test_recommendations(self):
+		def post():
+			return self.client.post("/ai/recommendations/", {"skills": ["Python"]}, content_type="application/json", **self.auth(self.seeker))
+
+		post()  # caches the user and loads the active jobs snapshot
+		for count in (3, 15):
+			self.add_jobs(count)  # the snapshot is patched by the save signals
+			with self.assertNumQueries(0):
+				response = post()
+			self.assertEqual(response["X-Recommendations-Source"], "local")
+			self.assertEqual(len(response.json()), JobPost.objects.count())
+
+
+class SerializerParityTests(JobsTestCase):
+	"""The hand-written fast path must render exactly what JobPostSerializer renders, byte for byte."""
+
+	def setUp(self):
+		super().setUp()
+		self.employer = self.make_user("employer", UserProfile.Role.EMPLOYER)
+
+	def assertParity(self, job):
+		job = JobPost.objects.with_related().get(pk=job.pk) if job.employer_id else job
+		self.assertRendersAlike(serialize_job(job), JobPostSerializer(job).data)
+		return job
+
+	def assertRendersAlike(self, data, expected):
+		self.assertEqual(JSONRenderer().render(data), JSONRenderer().render(expected))
+
+	def test_job_with_skills(self):
+		skills = [Skill.objects.create(name=name) for name in ("Python", "Django")]
+		job = self.make_job(self.employer, skills=skills, location="Berlin", company="Acme", salary="90k", applications_count=4)
+		self.assertParity(job)
+
+	def test_job_without_skills_or_optional_fields(self):
+		self.assertParity(self.make_job(self.employer, status=JobPost.JobStatus.DRAFT))
+
+	def test_unicode_fields(self):
+		skills = [Skill.objects.create(name="C++"), Skill.objects.create(name="Résumé ✍")]
+		job = self.make_job(
+			self.employer, skills=skills, title="Développeur·se 東京 🚀", description="Ça marche – «très» bien\nzweite Zeile",
+			location="São Paulo", company="Zürich AG",
+		)
+		data = serialize_job(self.assertParity(job))
+		self.assertEqual(data["title"], "Développeur·se 東京 🚀")
+
+	def test_null_employer(self):
+		job = JobPost.objects.with_related().get(pk=self.make_job(self.employer).pk)
+		job.employer = None
+		self.assertRendersAlike(serialize_job(job), JobPostSerializer(job).data)
+		self.assertIsNone(JobPostSerializer(job).data["employer_name"])
+		self.assertEqual(serialize_jobs([job], ("id", "employer_name")), [{"id": job.pk, "employer_name": None}])
+
+	def test_projection_matches_full_rows(self):
+		skills = [Skill.objects.create(name="Go")]
+		self.make_job(self.employer, skills=skills)
+		self.make_job(self.employer)
+		jobs = list(JobPost.objects.with_related())
+		full = serialize_jobs(jobs)
+		for fields in (tuple(JOB_FIELDS), SUMMARY_FIELDS, ("id", "title", "postedDate")):
+			self.assertRendersAlike(serialize_jobs(jobs, fields), [{name: row[name] for name in fields} for row in full])
+
+
+class AIClientTests(JobsTestCase):
+	def setUp(self):
+		super().setUp()
+		fake_genai.reset()
+		self.addCleanup(fake_genai.reset)
+		self.breaker = ai_client.CircuitBreaker(failure_threshold=10)
+
+	def client_for(self, **options):
+		options.setdefault("backoff", 0)
+		return ai_client.GeminiClient(fake_genai, breaker=self.breaker, **options)
+
+	def test_failed_request_counts_once(self):
+		fake_genai.set_behaviour(failures=3, response="[]")
+		with self.assertRaises(ai_client.AIServiceUnavailable):
+			self.client_for(max_retries=2).generate("prompt")
+		self.assertEqual((fake_genai.calls, self.breaker.failures), (3, 1))
+
+	def test_timeout_is_not_retried_while_the_call_holds_its_permit(self):
+		release = threading.Event()
+		fake_genai.set_behaviour(response="[]")
+		client = self.client_for(timeout=0.05, max_retries=3)
+		futures = []
+		submit = client._submit
+
+		def slow_call(prompt):
+			release.wait(5)
+			return "[]"
+
+		def tracked_submit(prompt):
+			futures.append(submit(prompt))
+			return futures[-1]
+
+		free = ai_client._in_flight._value
+		with mock.patch.object(client, "_call", slow_call), mock.patch.object(client, "_submit", tracked_submit):
+			with self.assertRaises(ai_client.AIServiceUnavailable):
+				client.generate("prompt")
+		self.assertEqual(len(futures), 1)
+		self.assertEqual(ai_client._in_flight._value, free - 1)  # still held by the running call
+		finished = threading.Event()
+		futures[0].add_done_callback(lambda future: finished.set())  # runs after the permit is returned
+		release.set()
+		finished.wait(5)
+		self.assertEqual(ai_client._in_flight._value, free)
+		self.assertEqual(self.breaker.failures, 1)
+
+	@override_settings(AI_GENAI_MODULE="jobs.fake_genai")
+	def test_invalid_response_falls_back_to_local_ranking(self):
+		fake_genai.set_behaviour(response="not json")
+		seeker = self.make_user("seeker")
+		python = Skill.objects.create(name="Python")
+		job = self.make_job(self.make_user("employer", UserProfile.Role.EMPLOYER), skills=[python])
+		with mock.patch.dict(os.environ, {"GEMINI_API_KEY": "test"}):
+			response = self.client.post(
+				"/ai/recommendations/", {"skills": ["Python"]}, content_type="application/json", **self.auth(seeker),
+			)
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response["X-Recommendations-Source"], "local")
+		self.assertEqual([row["id"] for row in response.json()], [job.pk])
+		self.assertEqual(fake_genai.calls, 1)
+
+
+	@override_settings(AI_GENAI_MODULE="jobs.fake_genai")
+	def test_response_naming_no_candidate_is_not_cached(self):
+		seeker = self.make_user("seeker")
+		python = Skill.objects.create(name="Python")
+		employer = self.make_user("employer", UserProfile.Role.EMPLOYER)
+		jobs = [self.make_job(employer, skills=[python]) for _ in range(2)]
+		self.enterContext(mock.patch.dict(os.environ, {"GEMINI_API_KEY": "test"}))
+		fake_genai.set_behaviour(response=f'["x", {max(job.pk for job in jobs) + 1}]')
+		for _ in range(2):
+			with self.assertLogs("jobs.recommendations", "WARNING"):
+				self.assertEqual(recommend(seeker.profile, ["Python"], {})[1:], ("local", "MISS"))
+		self.assertEqual(fake_genai.calls, 2)
+		fake_genai.set_behaviour(response=f'["{jobs[0].pk}", "{jobs[1].pk}"]')
+		result = recommend(seeker.profile, ["Python"], {})
+		self.assertEqual(([job["id"] for job in result.jobs], result.source), ([jobs[0].pk, jobs[1].pk], "ai"))
+		self.assertEqual(recommend(seeker.profile, ["Python"], {}).cache, "HIT")
+
+	@override_settings(AI_GENAI_MODULE="jobs.fake_genai")
+	def test_failed_client_load_is_retried(self):
+		self.enterContext(mock.patch.dict(ai_client._genai_clients, clear=True))
+		self.enterContext(mock.patch.dict(os.environ, {"GEMINI_API_KEY": "test"}))
+		with mock.patch.object(fake_genai, "configure", side_effect=RuntimeError("unreachable")):
+			self.assertEqual(ai_client._get_genai_client(), (None, "Error configuring Gemini API: unreachable"))
+		self.assertEqual(ai_client._get_genai_client(), (fake_genai, None))
+
+
+def job_row(job_id, title, skills=(), description="", **fields):
+	return {"id": job_id, "title": title, "skills": [{"name": name} for name in skills], "description": description, **fields}
+
+
+class RankingTests(SimpleTestCase):
+	def setUp(self):
+		self.jobs = [
+			job_row(1, "Office manager", description="Keeps the office running."),
+			job_row(2, "Python developer", ["Python", "Django"], location="Berlin", type="FULL_TIME"),
+			job_row(3, "Data engineer", ["Python"], location="Remote", type="PART_TIME"),
+			job_row(4, "Frontend developer", ["React"], location="Berlin", type="PART_TIME"),
+		]
+
+	def ids(self, *args, **kwargs):
+		return [job["id"] for job in ranking.rank_jobs(self.jobs, *args, **kwargs)]
+
+	def test_jobs_are_ordered_by_bm25_relevance(self):
+		# Job 2 matches both terms, job 3 only Python, and "django" is rarer than "python".
+		self.assertEqual(self.ids(["Python", "Django"]), [2, 3])
+		self.assertEqual(self.ids(["Python"], {"search": "data"}), [3, 2])
+
+	def test_jobs_matching_no_term_are_dropped(self):
+		self.assertEqual(self.ids(["Rust"]), [])
+		self.assertEqual(self.ids(), [1, 2, 3, 4])
+
+	def test_location_and_job_type_add_bonuses(self):
+		self.assertEqual(self.ids([], {"location": "berlin"}), [2, 4, 1, 3])
+		self.assertEqual(self.ids([], {"location": "Berlin", "jobType": "part-time"}), [4, 2, 3, 1])
+		self.assertEqual(self.ids(["Python"], {"location": "remote", "jobType": "any"}), [3, 2])
+
+	def test_limit_keeps_the_best_jobs(self):
+		self.assertEqual(self.ids([], {"location": "Berlin"}, limit=2), [2, 4])
+
+	def test_prebuilt_index_ranks_like_the_rows(self):
+		index = ranking.BM25Index(self.jobs)
+		for skills in (["Python", "Django"], ["React"], []):
+			self.assertEqual(ranking.rank_jobs(index, skills, {"location": "Berlin"}), ranking.rank_jobs(self.jobs, skills, {"location": "Berlin"}))
+
+
+class PromptTests(JobsTestCase):
+	def setUp(self):
+		super().setUp()
+		self.employer = self.make_user("employer", UserProfile.Role.EMPLOYER)
+
+	def test_fragments_survive_changes_to_other_jobs(self):
+		first, second = self.make_job(self.employer, title="First"), self.make_job(self.employer, title="Second")
+		rows = {row["id"]: row for row in active_jobs.rows()}
+		prompting.encode_jobs(list(rows.values()), 10000, active_jobs.updated_at)
+		cached = prompting._fragments.get((first.pk, active_jobs.updated_at(first.pk)))
+		self.assertIsNotNone(cached)
+
+		second.title = "Second, renamed"
+		with self.committed():
+			second.save()
+		self.assertIs(prompting._fragments.get((first.pk, active_jobs.updated_at(first.pk))), cached)
+		text, _ = prompting.encode_jobs(list(active_jobs.rows()), 10000, active_jobs.updated_at)
+		self.assertIn("Second, renamed", text)
+
+	def test_budget_is_never_negative(self):
+		with self.settings(AI_PROMPT_BUDGET_BYTES=100):
+			self.assertEqual(prompting.jobs_budget(500), 0)
+
+	@override_settings(AI_GENAI_MODULE="jobs.fake_genai", AI_PROMPT_BUDGET_BYTES=10)
+	def test_no_job_fits_falls_back_without_calling_the_model(self):
+		fake_genai.reset()
+		seeker = self.make_user("seeker")
+		job = self.make_job(self.employer)
+		with mock.patch.dict(os.environ, {"GEMINI_API_KEY": "test"}), self.assertLogs("jobs.prompting", "WARNING"):
+			result = recommend(seeker.profile, [], {})
+		self.assertEqual(([row["id"] for row in result.jobs], result.source), ([job.pk], "local"))
+		self.assertEqual(fake_genai.calls, 0)
+
+
+class SkillMatrixTests(JobsTestCase):
+	def setUp(self):
+		super().setUp()
+		self.employer = self.make_user("employer", UserProfile.Role.EMPLOYER)
+		self.python = Skill.objects.create(name="Python")
+		self.job = self.make_job(self.employer, skills=[self.python])
+		skill_matrix.scores([self.python.pk])
+
+	def test_local_change_keeps_the_matrix_current(self):
+		other = self.make_job(self.employer, skills=[self.python])
+		self.assertEqual(skill_matrix.version, recommendation_cache.get_jobs_version())
+		self.assertEqual(set(skill_matrix.scores([self.python.pk])), {self.job.pk, other.pk})
+
+	def test_change_missed_from_another_process_forces_a_rebuild(self):
+		# Another worker closed the job: only the shared counter moved.
+		JobPost.objects.filter(pk=self.job.pk).update(status=JobPost.JobStatus.CLOSED)
+		recommendation_cache.bump_jobs_version()
+		other = self.make_job(self.employer, skills=[self.python])
+		self.assertIsNone(skill_matrix.version)
+		self.assertEqual(set(skill_matrix.scores([self.python.pk])), {other.pk})
+
+	def test_scoring_does_not_wait_for_an_update(self):
+		held, release = threading.Event(), threading.Event()
+
+		def hold_lock():
+			with skill_matrix._lock:
+				held.set()
+				release.wait(5)
+
+		updater = threading.Thread(target=hold_lock)
+		updater.start()
+		self.addCleanup(updater.join)
+		self.addCleanup(release.set)
+		held.wait(5)
+		self.assertEqual(skill_matrix.scores([self.python.pk])[self.job.pk].overlap, 1)
+
+
+class BulkImportTests(JobsTestCase):
+	def setUp(self):
+		super().setUp()
+		self.employer = self.make_user("employer", UserProfile.Role.EMPLOYER)
+
+	def rows(self, count):
+		return [{"title": f"Job {index}", "description": "Build APIs.", "skills": ["Python"]} for index in range(count)]
+
+	def test_ids_are_read_back_when_the_backend_does_not_return_them(self):
+		self.make_job(self.employer, title="Job 1")  # an identical earlier row must not be picked up
+		with mock.patch.object(type(connection.features), "can_return_rows_from_bulk_insert", False), \
+				mock.patch.object(JobPost.objects, "bulk_create", self.bulk_create_without_ids):
+			results = bulk.import_jobs(self.rows(3), self.employer)
+		for index, result in enumerate(results):
+			job = JobPost.objects.get(pk=result["id"])
+			self.assertEqual((job.title, list(job.skills.values_list("name", flat=True))), (f"Job {index}", ["Python"]))
+
+	def bulk_create_without_ids(self, jobs, **kwargs):
+		created = JobPost.objects.get_queryset().bulk_create(jobs, **kwargs)
+		for job in created:
+			job.pk = None
+		return created
+
+	def test_failed_batch_keeps_earlier_batches(self):
+		original = bulk._import_batch
+
+		def failing(rows, offset, employer):
+			if offset:
+				raise DatabaseError("disk full")
+			return original(rows, offset, employer)
+
+		with self.settings(JOBS_BULK_BATCH_SIZE=2), mock.patch.object(bulk, "_import_batch", failing), \
+				self.assertLogs("jobs.bulk", "ERROR"):
+			results = bulk.import_jobs(self.rows(5), self.employer)
+		self.assertEqual([result["status"] for result in results], ["created", "created", "error", "error", "error"])
+		self.assertEqual([result["index"] for result in results], [0, 1, 2, 3, 4])
+		self.assertEqual(JobPost.objects.count(), 2)
+
+
+class ApplyTests(JobsTestCase):
+	def setUp(self):
+		super().setUp()
+		self.seeker = self.make_user("seeker")
+		self.job = self.make_job(self.make_user("employer", UserProfile.Role.EMPLOYER))
+
+	def apply(self):
+		return self.client.post(f"/api/jobs/{self.job.pk}/apply/", **self.auth(self.seeker)).json()
+
+	def test_repeated_apply_counts_once(self):
+		self.assertEqual(self.apply(), {"id": self.job.pk, "applications": 1, "already_applied": False})
+		self.assertEqual(self.apply(), {"id": self.job.pk, "applications": 1, "already_applied": True})
+		self.assertEqual(JobApplication.objects.count(), 1)
+
+	def test_apply_that_loses_the_insert_race_counts_once(self):
+		get = QuerySet.get
+		raced = []
+
+		def racing_get(queryset, *args, **kwargs):
+			if queryset.model is JobApplication and not raced:
+				# A concurrent request inserts the row after this one looked for it.
+				raced.append(JobApplication.objects.create(user=self.seeker, job=self.job))
+				raise JobApplication.DoesNotExist
+			return get(queryset, *args, **kwargs)
+
+		with mock.patch.object(QuerySet, "get", racing_get):
+			response = self.apply()
+		self.assertEqual((response["applications"], response["already_applied"]), (0, True))
+		self.assertEqual(JobApplication.objects.count(), 1)
+
+
+@skipUnlessDBFeature("test_db_allows_multiple_connections")
+class ConcurrentApplyTests(TransactionTestCase):
+	"""Simultaneous applies, each on its own connection."""
+
+	def setUp(self):
+		reset_caches()
+		self.firebase = self.enterContext(fake_firebase())
+		employer = User.objects.create(username="employer")
+		UserProfile.objects.create(user=employer, role=UserProfile.Role.EMPLOYER)
+		self.job = JobPost.objects.create(employer=employer, title="Backend developer", description="Build APIs.")
+
+	def seeker_token(self, username):
+		seeker = User.objects.create(username=username, email=f"{username}@example.com")
+		UserProfile.objects.create(user=seeker)
+		return self.firebase.issue_token(seeker.username, seeker.email)
+
+	def apply_concurrently(self, tokens):
+		start = threading.Barrier(len(tokens))
+		statuses = []
+
+		def apply(token):
+			start.wait()
+			try:
+				response = self.client_class().post(f"/api/jobs/{self.job.pk}/apply/", HTTP_AUTHORIZATION=f"Bearer {token}")
+				statuses.append(response.status_code)
+			finally:
+				connection.close()
+
+		threads = [threading.Thread(target=apply, args=(token,)) for token in tokens]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+		self.assertEqual(statuses, [200] * len(tokens))
+		self.job.refresh_from_db()
+		return JobApplication.objects.count(), self.job.applications_count
+
+	def test_concurrent_applies_count_once(self):
+		self.assertEqual(self.apply_concurrently([self.seeker_token("seeker")] * 4), (1, 1))
+
+	def test_concurrent_seekers_are_all_counted(self):
+		tokens = [self.seeker_token(f"seeker-{index}") for index in range(8)]
+		self.assertEqual(self.apply_concurrently(tokens), (8, 8))
+
+
+class ApplicationCounterTests(JobsTestCase):
+	def setUp(self):
+		super().setUp()
+		self.job = self.make_job(self.make_user("employer", UserProfile.Role.EMPLOYER))
+		# Flushes are driven by the tests, from this thread's connection.
+		self.enterContext(mock.patch.object(counters.BufferedCounter, "_start_flusher"))
+
+	def count(self):
+		self.job.refresh_from_db(fields=["applications_count"])
+		return self.job.applications_count
+
+	def test_concurrent_adds_lose_no_increments(self):
+		buffer = counters.BufferedCounter(flush_interval=3600)
+		threads = [threading.Thread(target=lambda: [buffer.add(self.job.pk) for _ in range(250)]) for _ in range(8)]
+		for thread in threads:
+			thread.start()
+		while any(thread.is_alive() for thread in threads):
+			buffer.flush()  # swaps the deltas out while the threads keep adding
+		for thread in threads:
+			thread.join()
+		buffer.flush()
+		self.assertEqual((self.count(), buffer.pending(self.job.pk)), (2000, 0))
+
+	def test_flush_deltas_applies_each_jobs_delta(self):
+		other = self.make_job(self.job.employer)
+		counters.flush_deltas({self.job.pk: 3, other.pk: 1})
+		other.refresh_from_db(fields=["applications_count"])
+		self.assertEqual((self.count(), other.applications_count), (3, 1))
+
+	@override_settings(JOBS_APPLICATION_COUNT_BUFFERED=True)
+	def test_buffered_applies_from_distinct_seekers(self):
+		buffer = counters.BufferedCounter(flush_interval=3600)
+		self.enterContext(mock.patch.object(counters, "_buffer", buffer))
+		for index in range(3):
+			seeker = self.make_user(f"seeker-{index}")
+			with self.committed():
+				self.client.post(f"/api/jobs/{self.job.pk}/apply/", **self.auth(seeker))
+		self.assertEqual((self.count(), buffer.pending(self.job.pk)), (0, 3))
+		buffer.flush()
+		self.assertEqual(self.count(), 3)
+
+	@override_settings(JOBS_APPLICATION_COUNT_BUFFERED=True)
+	def test_buffer_is_only_touched_after_commit(self):
+		buffer = counters.BufferedCounter(flush_interval=0)
+		self.enterContext(mock.patch.object(counters, "_buffer", buffer))
+		buffer._deltas[self.job.pk] = 5  # another request's pending applications
+		with self.assertRaises(DatabaseError), transaction.atomic():
+			counters.record_application(self.job.pk)
+			raise DatabaseError
+		self.assertEqual((self.count(), buffer.pending(self.job.pk)), (0, 5))
+		with self.committed():
+			with transaction.atomic():
+				counters.record_application(self.job.pk)
+			self.assertEqual(buffer.pending(self.job.pk), 5)  # not added or flushed before commit
+		self.assertEqual((self.count(), buffer.pending(self.job.pk)), (6, 0))
+
+
+class SkillIndexTests(JobsTestCase):
+	def setUp(self):
+		super().setUp()
+		with self.committed():
+			Skill.objects.create(name="Python")
+		skill_index.search("")  # load the index
+
+	def test_bulk_created_skills_are_inserted_without_a_rebuild(self):
+		employer = self.make_user("employer", UserProfile.Role.EMPLOYER)
+		with self.committed():
+			bulk.import_jobs([{"title": "Job", "description": "Build APIs.", "skills": ["PyTorch", "python "]}], employer)
+		with self.assertNumQueries(0):
+			self.assertEqual([name for _, name in skill_index.search("py")], ["Python", "PyTorch"])
+
+	def test_change_missed_from_another_process_forces_a_rebuild(self):
+		Skill.objects.bulk_create([Skill(name="Pandas")])  # created elsewhere, no signals here
+		recommendation_cache.bump_skills_version()
+		with self.committed():
+			Skill.objects.create(name="Perl")
+		self.assertEqual([name for _, name in skill_index.search("p")], ["Pandas", "Perl", "Python"])
+
+	def test_names_are_unique_ignoring_case(self):
+		with self.assertRaises(IntegrityError):
+			Skill.objects.create(name="PYTHON")
+
+
+class ConditionalRequestTests(JobsTestCase):
+	def setUp(self):
+		super().setUp()
+		self.employer = self.make_user("employer", UserProfile.Role.EMPLOYER)
+		self.job = self.make_job(self.employer)
+
+	def assertRevalidates(self, path, change, **headers):
+		etag = self.client.get(path, **headers)["ETag"]
+		self.assertEqual(self.client.get(path, HTTP_IF_NONE_MATCH=etag, **headers).status_code, 304)
+		with self.committed():
+			change()
+		response = self.client.get(path, HTTP_IF_NONE_MATCH=etag, **headers)
+		self.assertEqual(response.status_code, 200)
+		self.assertNotEqual(response["ETag"], etag)
+		return response
+
+	def test_list_after_create(self):
+		response = self.assertRevalidates("/api/jobs/", lambda: self.client.post(
+			"/api/jobs/", {"title": "Frontend developer", "description": "Build UIs."},
+			content_type="application/json", **self.auth(self.employer),
+		))
+		self.assertEqual([row["title"] for row in response.json()["results"]], ["Frontend developer", "Backend developer"])
+
+	def test_list_after_update(self):
+		self.assertRevalidates("/api/jobs/", lambda: self.client.patch(
+			f"/api/jobs/{self.job.pk}/", {"title": "Renamed"}, content_type="application/json", **self.auth(self.employer),
+		))
+
+	def test_list_after_delete(self):
+		response = self.assertRevalidates("/api/jobs/", lambda: self.client.delete(f"/api/jobs/{self.job.pk}/", **self.auth(self.employer)))
+		self.assertEqual(response.json()["results"], [])
+
+	def test_list_after_apply(self):
+		seeker = self.make_user("seeker")
+		response = self.assertRevalidates("/api/jobs/", lambda: self.client.post(f"/api/jobs/{self.job.pk}/apply/", **self.auth(seeker)))
+		self.assertEqual(response.json()["results"][0]["applications"], 1)
+
+	def test_detail_after_update(self):
+		response = self.assertRevalidates(f"/api/jobs/{self.job.pk}/", lambda: self.client.patch(
+			f"/api/jobs/{self.job.pk}/", {"title": "Renamed"}, content_type="application/json", **self.auth(self.employer),
+		))
+		self.assertEqual(response.json()["title"], "Renamed")
+
+	def test_skills_after_create(self):
+		self.assertRevalidates("/api/skills/", lambda: self.client.post("/api/skills/", {"name": "Rust"}, content_type="application/json"))
+
+	def test_write_from_another_process(self):
+		# Validators come from the shared counters, so a bump made by any worker is seen here.
+		self.assertRevalidates("/api/jobs/", recommendation_cache.bump_jobs_version)
+
+	def test_versions_move_only_once_the_write_commits(self):
+		version = recommendation_cache.get_jobs_version()
+		with self.assertRaises(DatabaseError), transaction.atomic():
+			JobPost.objects.create(employer=self.employer, title="Rolled back")
+			raise DatabaseError
+		self.assertEqual(recommendation_cache.get_jobs_version(), version)
+
+
+class JobListingTests(JobsTestCase):
+	def setUp(self):
+		super().setUp()
+		self.employer = self.make_user("employer", UserProfile.Role.EMPLOYER)
+		self.python, self.react = Skill.objects.create(name="Python"), Skill.objects.create(name="React")
+		self.backend = self.make_job(self.employer, skills=[self.python], location="Berlin", company="Acme")
+		self.frontend = self.make_job(
+			self.employer, skills=[self.react], title="Frontend developer", description="Build UIs with React.",
+			location="Remote", company="Globex", job_type=JobPost.JobType.CONTRACT,
+		)
+		self.closed = self.make_job(
+			self.employer, skills=[self.python, self.react], title="Fullstack developer", location="Berlin, Germany",
+			company="Acme", job_type=JobPost.JobType.PART_TIME, status=JobPost.JobStatus.CLOSED,
+		)
+
+	def ids(self, query):
+		response = self.client.get(f"/api/jobs/?{query}")
+		self.assertEqual(response.status_code, 200, response.content)
+		return [row["id"] for row in response.json()["results"]]
+
+	def test_status(self):
+		self.assertEqual(self.ids("status=active"), [self.frontend.pk, self.backend.pk])
+		self.assertEqual(self.ids("status=closed,draft"), [self.closed.pk])
+
+	def test_job_type(self):
+		self.assertEqual(self.ids("job_type=contract,part_time"), [self.closed.pk, self.frontend.pk])
+
+	def test_location_and_company(self):
+		self.assertEqual(self.ids("location=berlin"), [self.closed.pk, self.backend.pk])
+		self.assertEqual(self.ids("company=acme&status=active"), [self.backend.pk])
+
+	def test_skills(self):
+		self.assertEqual(self.ids(f"skills={self.react.pk}"), [self.closed.pk, self.frontend.pk])
+		self.assertEqual(self.ids(f"skills={self.python.pk},{self.react.pk}&status=active"), [self.frontend.pk, self.backend.pk])
+
+	def test_invalid_skills(self):
+		response = self.client.get("/api/jobs/?skills=1,python")
+		self.assertEqual(response.status_code, 400)
+		self.assertIn("skills", response.json())
+
+	def test_search(self):
+		self.assertEqual(self.ids("search=react"), [self.closed.pk, self.frontend.pk])
+
+	def test_cursor_walks_jobs_with_tied_created_at(self):
+		for index in range(4):
+			self.make_job(self.employer, title=f"Job {index}")
+		JobPost.objects.update(created_at=timezone.now())
+		expected = list(JobPost.objects.order_by("-id").values_list("id", flat=True))
+		seen, url = [], "/api/jobs/?page_size=2"
+		while url:
+			page = self.client.get(url).json()
+			self.assertLessEqual(len(page["results"]), 2)
+			seen.extend(row["id"] for row in page["results"])
+			url = page["next"]
+		self.assertEqual(seen, expected)
+
+
+class StreamingTests(JobsTestCase):
+	def setUp(self):
+		super().setUp()
+		employer = self.make_user("employer", UserProfile.Role.EMPLOYER)
+		python = Skill.objects.create(name="Python")
+		for index in range(5):
+			self.make_job(employer, skills=[python] if index % 2 else [], title=f"Job {index} – «{index}»")
+		self.make_job(employer, title="Closed", status=JobPost.JobStatus.CLOSED)
+
+	def paginated(self, query):
+		return self.client.get(f"/api/jobs/?page_size=100&{query}").json()["results"]
+
+	def body(self, response):
+		self.assertEqual(response.status_code, 200)
+		self.assertTrue(response.streaming)
+		return b"".join(response.streaming_content)
+
+	def test_streamed_array_matches_the_paginated_list(self):
+		for query in ("", "status=active", "status=active,closed", "fields=title,skills", "view=summary&status=closed"):
+			streamed = json.loads(self.body(self.client.get(f"/api/jobs/?stream=true&{query}")))
+			self.assertEqual(streamed, self.paginated(query), query)
+
+	def test_rows_are_encoded_as_the_renderer_would(self):
+		job = JobPost.objects.get(title="Job 1 – «1»")
+		job.description = "Line\u2028separated\u2029paragraph 東京"
+		with self.committed():
+			job.save()
+		for row in active_jobs.rows():
+			self.assertEqual(encode_job(row), JSONRenderer().render(row))
+		streamed = self.body(self.client.get("/api/jobs/?stream=true&status=active"))
+		self.assertIn(b"Line\\u2028separated\\u2029paragraph", streamed)
+		self.assertEqual(streamed, JSONRenderer().render(self.paginated("status=active")))
+
+	def test_export_is_ndjson_of_the_listed_rows(self):
+		for query in ("status=active", "fields=title", "job_type=FULL_TIME"):
+			response = self.client.get(f"/api/jobs/export/?{query}")
+			self.assertEqual(response["Content-Type"], "application/x-ndjson")
+			self.assertEqual(response["Content-Disposition"], 'attachment; filename="jobs.ndjson"')
+			lines = self.body(response).decode().splitlines()
+			self.assertEqual([json.loads(line) for line in lines], self.paginated(query), query)
+
+
+class CompressionTests(JobsTestCase):
+	body = b'{"title": "Backend developer"}' * 100
+
+	def compress(self, response, accept="gzip", **settings_overrides):
+		request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING=accept)
+		with override_settings(**settings_overrides):
+			middleware = CompressionMiddleware(lambda request: response)
+		return middleware(request)
+
+	def test_accepted_encodings(self):
+		self.assertEqual(accepted_encodings("gzip;q=0, *;q=0.5, br"), {"gzip": 0.0, "*": 0.5, "br": 1.0})
+		self.assertEqual(accepted_encodings("gzip;q=1.2.3, ;;, zstd ; q = 0.25"), {"gzip": 0.0, "zstd": 0.25})
+		self.assertEqual(accepted_encodings(""), {})
+
+	def test_negotiation(self):
+		middleware = CompressionMiddleware(lambda request: None)
+		middleware.encoders = {"br": object(), "gzip": object()}
+		for header, coding in (
+			("gzip, br", "br"),  # equal q-values follow server preference
+			("br;q=0.5, gzip", "gzip"),
+			("*", "br"),
+			("br;q=0, *", "gzip"),
+			("gzip;q=0, br;q=0", None),
+			("gzip;q=0, *", "br"),
+			("identity", None),
+			("", None),
+		):
+			request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING=header)
+			self.assertEqual(middleware._choose(request), coding, header)
+
+	def test_gzip_body(self):
+		response = self.compress(HttpResponse(self.body))
+		self.assertEqual(response["Content-Encoding"], "gzip")
+		self.assertEqual(response["Vary"], "Accept-Encoding")
+		self.assertEqual(int(response["Content-Length"]), len(response.content))
+		self.assertEqual(gzip.decompress(response.content), self.body)
+
+	def test_refused_coding_is_sent_as_is_but_varies(self):
+		for accept in ("gzip;q=0", "identity", "gzip;q=0, *"):
+			response = self.compress(HttpResponse(self.body), accept)
+			self.assertFalse(response.has_header("Content-Encoding"), accept)
+			self.assertEqual(response["Vary"], "Accept-Encoding")
+			self.assertEqual(response.content, self.body)
+
+	def test_size_threshold(self):
+		small = self.compress(HttpResponse(self.body), COMPRESSION_MIN_BYTES=len(self.body) + 1)
+		self.assertFalse(small.has_header("Content-Encoding"))
+		self.assertFalse(small.has_header("Vary"))
+		exact = self.compress(HttpResponse(self.body), COMPRESSION_MIN_BYTES=len(self.body))
+		self.assertEqual(exact["Content-Encoding"], "gzip")
+
+	def test_incompressible_body_is_sent_as_is(self):
+		body = os.urandom(4096)
+		response = self.compress(HttpResponse(body))
+		self.assertFalse(response.has_header("Content-Encoding"))
+		self.assertEqual(response.content, body)
+
+	def test_streamed_body(self):
+		# Streams are compressed whatever their size, as it is not known up front.
+		response = StreamingHttpResponse(iter([b"[", b'{"id": 1}', b"]"]))
+		response["Content-Length"] = "11"
+		response = self.compress(response, COMPRESSION_MIN_BYTES=10**6)
+		self.assertEqual(response["Content-Encoding"], "gzip")
+		self.assertEqual(response["Vary"], "Accept-Encoding")
+		self.assertFalse(response.has_header("Content-Length"))
+		self.assertEqual(gzip.decompress(b"".join(response.streaming_content)), b'[{"id": 1}]')
+
+	def test_streamed_listing(self):
+		employer = self.make_user("employer", UserProfile.Role.EMPLOYER)
+		self.make_job(employer)
+		plain = self.client.get("/api/jobs/?stream=true")
+		response = self.client.get("/api/jobs/?stream=true", HTTP_ACCEPT_ENCODING="gzip")
+		self.assertEqual(response["Content-Encoding"], "gzip")
+		self.assertEqual(gzip.decompress(b"".join(response.streaming_content)), b"".join(plain.streaming_content))
+
+	def test_etag_is_weakened_and_still_revalidates(self):
+		employer = self.make_user("employer", UserProfile.Role.EMPLOYER)
+		for index in range(10):
+			self.make_job(employer, title=f"Backend developer {index}", description="Build APIs. " * 20)
+		identity = self.client.get("/api/jobs/")
+		self.assertFalse(identity.has_header("Content-Encoding"))
+		self.assertTrue(identity["ETag"].startswith('"'))
+
+		response = self.client.get("/api/jobs/", HTTP_ACCEPT_ENCODING="gzip")
+		self.assertEqual(response["Content-Encoding"], "gzip")
+		self.assertEqual(response["ETag"], "W/" + identity["ETag"])
+
+		for etag in (response["ETag"], identity["ETag"]):
+			revalidated = self.client.get("/api/jobs/", HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=etag)
+			self.assertEqual(revalidated.status_code, 304, etag)
+			self.assertEqual(revalidated["ETag"], response["ETag"])
+			self.assertEqual(revalidated["Vary"].count("Accept-Encoding"), 1)
+		revalidated = self.client.get("/api/jobs/", HTTP_IF_NONE_MATCH=identity["ETag"])
+		self.assertEqual(revalidated.status_code, 304)
+		self.assertEqual(revalidated["ETag"], identity["ETag"])
+
+
+class SearchTests(JobsTestCase):
+	def setUp(self):
+		super().setUp()
+		self.employer = self.make_user("employer", UserProfile.Role.EMPLOYER)
+		self.django = Skill.objects.create(name="Django")
+
+	def search(self, query):
+		response = self.client.get("/api/jobs/search/", {"q": query})
+		self.assertEqual(response.status_code, 200, response.content)
+		return [row["id"] for row in response.json()]
+
+	def test_title_matches_rank_above_description_matches(self):
+		mentioned = self.make_job(self.employer, title="Backend developer", description="Python services with Django.")
+		titled = self.make_job(self.employer, title="Django developer", description="Build APIs.")
+		self.assertEqual(self.search("django"), [titled.pk, mentioned.pk])
+
+	def test_index_follows_saves_and_deletes(self):
+		job = self.make_job(self.employer, title="Rust developer")
+		self.assertEqual(self.search("rust"), [job.pk])
+		job.title = "Go developer"
+		with self.committed():
+			job.save()
+		self.assertEqual((self.search("rust"), self.search("go")), ([], [job.pk]))
+		with self.committed():
+			job.delete()
+		self.assertEqual(self.search("go"), [])
+
+	def test_index_follows_job_skills(self):
+		job = self.make_job(self.employer)
+		with self.committed():
+			job.skills.add(self.django)
+		self.assertEqual(self.search("django"), [job.pk])
+		with self.committed():
+			job.skills.remove(self.django)
+		self.assertEqual(self.search("django"), [])
+		with self.committed():
+			job.skills.add(self.django)
+		with self.committed():
+			self.django.job_posts.clear()
+		self.assertEqual(self.search("django"), [])
+
+	def test_index_follows_skill_renames(self):
+		job = self.make_job(self.employer, skills=[self.django])
+		self.django.name = "Flask"
+		with self.committed():
+			self.django.save()
+		self.assertEqual((self.search("django"), self.search("flask")), ([], [job.pk]))
+
+	def test_rebuild_command(self):
+		job = self.make_job(self.employer, title="Kotlin developer")
+		search.get_search_backend().remove([job.pk])
+		self.assertEqual(self.search("kotlin"), [])
+		call_command("rebuild_search_index", stdout=io.StringIO())
+		self.assertEqual(self.search("kotlin"), [job.pk])
+
+	def test_symbols_are_part_of_terms(self):
+		cpp = self.make_job(self.employer, title="C++ developer")
+		csharp = self.make_job(self.employer, title="C# developer")
+		self.make_job(self.employer, title="Chef", description="Cook for the team.")
+		self.assertEqual((self.search("c++"), self.search("C#")), ([cpp.pk], [csharp.pk]))
+
+	def test_empty_and_syntax_only_queries(self):
+		self.make_job(self.employer)
+		self.assertEqual(self.client.get("/api/jobs/search/", {"q": "  "}).status_code, 400)
+		for query in ('"', "*", "-", "AND (", "NEAR("):
+			self.assertEqual(self.search(query), [], query)
+		self.assertEqual(self.client.get("/api/jobs/", {"search": '"*'}).json()["results"], [])
+
+
+class MetricsTests(JobsTestCase):
+	def test_exited_threads_fold_into_the_base_shard(self):
+		histogram = metrics.Histogram("test_seconds", "Test.", (1, 2), ("label",))
+		threads = [threading.Thread(target=histogram.observe, args=(1.5, "a")) for _ in range(20)]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+		self.assertEqual(len(histogram._shards), 1)
+		self.assertEqual(histogram.collect(), {("a",): [0, 20, 0, 30.0]})
+
+	@override_settings(DEBUG=False, METRICS_TOKEN="secret")
+	def test_endpoint_requires_a_token_or_staff(self):
+		self.assertEqual(self.client.get("/metrics").status_code, 401)
+		self.assertEqual(self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer wrong").status_code, 401)
+		self.assertEqual(self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer secret").status_code, 200)
+		self.client.force_login(User.objects.create(username="admin", is_staff=True))
+		self.assertEqual(self.client.get("/metrics").status_code, 200)
+
+	@override_settings(DEBUG=False, METRICS_TOKEN="")
+	def test_endpoint_is_closed_without_a_token_outside_debug(self):
+		self.assertEqual(self.client.get("/metrics").status_code, 401)
+
+
+class ReplicaRoutingTests(JobsTestCase):
+	"""Routes reads through ReplicaRouter to a second, separately migrated SQLite database.
+
+	The alias is added after the test case set up its own databases, so the
+	replica is neither wrapped in the test transaction nor blocked as undeclared;
+	its rows are deleted after each test instead.
+	"""
+
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		replica = connections.configure_settings({"default": {}, "replica": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}})["replica"]
+		settings.DATABASES["replica"] = connections.settings["replica"] = replica
+		cls.addClassCleanup(cls.remove_replica)
+		call_command("migrate", database="replica", verbosity=0)
+		cls.enterClassContext(override_settings(DATABASE_ROUTERS=["jobs.routers.ReplicaRouter"]))
+
+	@classmethod
+	def remove_replica(cls):
+		connections["replica"].close()
+		del connections["replica"]
+		settings.DATABASES.pop("replica", None)
+		connections.settings.pop("replica", None)
+
+	def setUp(self):
+		super().setUp()
+		self.employer = self.make_user("employer", UserProfile.Role.EMPLOYER)
+		self.job = self.make_job(self.employer, title="Primary")
+		# The replica lags: it has the job under an older title, but not the employer.
+		lagging = User.objects.using("replica").create(pk=self.employer.pk, username="someone-else")
+		JobPost.objects.using("replica").bulk_create([JobPost(pk=self.job.pk, employer=lagging, title="Replica", description="Old.")])
+		self.addCleanup(User.objects.using("replica").all().delete)
+
+	def test_safe_methods_read_from_the_replica(self):
+		self.assertEqual(self.client.get(f"/api/jobs/{self.job.pk}/").json()["title"], "Replica")
+
+	def test_authenticated_reads_resolve_the_user_on_default(self):
+		response = self.client.get(f"/api/jobs/{self.job.pk}/", **self.auth(self.employer))
+		self.assertEqual(response.json()["title"], "Replica")
+		self.assertFalse(User.objects.using("replica").filter(username="employer").exists())
+
+	def test_writes_and_their_reads_use_default(self):
+		response = self.client.patch(
+			f"/api/jobs/{self.job.pk}/", {"salary": "90k"}, content_type="application/json", **self.auth(self.employer),
+		)
+		self.assertEqual(response.json()["title"], "Primary")
+		self.assertEqual(JobPost.objects.using("default").get().salary, "90k")
+		self.assertEqual(JobPost.objects.using("replica").get().salary, "")
+
+	def test_process_wide_structures_load_from_default(self):
+		python = Skill.objects.create(name="Python")
+		with self.committed():
+			self.job.skills.add(python)
+		newer = self.make_job(self.employer, skills=[python], title="Not replicated yet")
+		response = self.client.get("/api/jobs/", {"stream": "true", "status": "active"})
+		rows = json.loads(b"".join(response.streaming_content))
+		self.assertEqual([(row["id"], row["title"]) for row in rows], [(newer.pk, newer.title), (self.job.pk, "Primary")])
+		self.assertEqual({job["id"] for job in load_candidates(["Python"], {})}, {newer.pk, self.job.pk})
+		with use_replica():
+			self.assertEqual(set(skill_matrix.scores([python.pk])), {self.job.pk, newer.pk})
+		self.assertEqual(self.client.get("/api/skills/", {"prefix": "py"}).json(), [{"id": python.pk, "name": "Python"}])
+
+
+class RecommendationTaskTests(JobsTestCase):
+	def setUp(self):
+		super().setUp()
+		self.seeker = self.make_user("seeker")
+		# Connections are managed by the test case, not by the worker.
+		self.enterContext(mock.patch.object(tasks, "close_old_connections"))
+		self.enterContext(mock.patch.object(tasks, "_next_cleanup", 0.0))
+
+	def run_task(self, task):
+		tasks._inflight[task.key] = {task.pk: self.seeker.pk}
+		tasks._run(task.key, self.seeker.profile, [], {})
+		task.refresh_from_db()
+		return task
+
+	def test_lost_task_stays_failed(self):
+		task = RecommendationTask.objects.create(user=self.seeker, key="request")
+		RecommendationTask.objects.filter(pk=task.pk).update(created_at=task.created_at - timedelta(hours=1))
+		self.assertEqual(tasks.get_task(task.pk, self.seeker).status, RecommendationTask.Status.FAILED)
+		task = self.run_task(task)
+		self.assertEqual((task.status, task.error), (RecommendationTask.Status.FAILED, "Recommendation task was lost."))
+
+	def test_finished_task_is_done(self):
+		task = self.run_task(RecommendationTask.objects.create(user=self.seeker, key="request"))
+		self.assertEqual((task.status, task.source, task.result), (RecommendationTask.Status.DONE, "local", []))
+
+	@override_settings(AI_TASK_RESULT_TTL=60, AI_TASK_CLEANUP_INTERVAL=300)
+	def test_expired_results_are_deleted_at_most_once_per_interval(self):
+		def expired():
+			return RecommendationTask.objects.create(
+				user=self.seeker, key="old", status=RecommendationTask.Status.DONE, finished_at=timezone.now() - timedelta(hours=1),
+			)
+
+		expired()
+		self.run_task(RecommendationTask.objects.create(user=self.seeker, key="a"))
+		second = expired()
+		self.run_task(RecommendationTask.objects.create(user=self.seeker, key="b"))
+		remaining = set(RecommendationTask.objects.filter(key="old").values_list("pk", flat=True))
+		self.assertEqual(remaining, {second.pk})
+
+
+class SnapshotTests(JobsTestCase):
+	def setUp(self):
+		super().setUp()
+		self.employer = self.make_user("employer", UserProfile.Role.EMPLOYER)
+		self.jobs = [self.make_job(self.employer, title=f"Job {index}") for index in range(3)]
+		active_jobs.rows()
+
+	def counts(self):
+		return {row["id"]: row["applications"] for row in active_jobs.rows()}
+
+	def test_counts_of_applied_jobs_are_patched(self):
+		with self.committed():
+			counters.increment(self.jobs[1].pk, 2)
+		with CaptureQueriesContext(connection) as queries:
+			self.assertEqual(self.counts(), {self.jobs[0].pk: 0, self.jobs[1].pk: 2, self.jobs[2].pk: 0})
+		self.assertEqual(len(queries), 1)
+		self.assertIn(f'IN ({self.jobs[1].pk})', queries[0]["sql"])
+
+	def test_counts_are_all_reread_when_the_changes_are_unknown(self):
+		JobPost.objects.filter(pk=self.jobs[0].pk).update(applications_count=5)
+		recommendation_cache.bump_version(recommendation_cache.APPLICATIONS_VERSION_KEY)  # no ids recorded
+		with CaptureQueriesContext(connection) as queries:
+			self.assertEqual(self.counts()[self.jobs[0].pk], 5)
+		self.assertNotIn(" IN (", queries[0]["sql"])
+
+	def test_ranking_index_is_built_once_per_snapshot(self):
+		index = active_jobs.ranking_index()
+		with mock.patch.object(ranking, "job_terms", side_effect=AssertionError("retokenized")):
+			self.assertIs(active_jobs.ranking_index(), index)
+		job = self.make_job(self.employer, title="Python developer")
+		with mock.patch("jobs.snapshot.job_terms", wraps=ranking.job_terms) as tokenized:
+			rebuilt = active_jobs.ranking_index()
+		self.assertIsNot(rebuilt, index)
+		self.assertEqual(tokenized.call_count, 0)  # the new job was tokenized when it was loaded
+		self.assertEqual([row["id"] for row in ranking.rank_jobs(rebuilt, ["Python"])], [job.pk])
+
+	def test_change_missed_from_another_process_forces_a_rebuild(self):
+		JobPost.objects.filter(pk=self.jobs[0].pk).update(status=JobPost.JobStatus.CLOSED)
+		recommendation_cache.bump_jobs_version()
+		job = self.make_job(self.employer, title="New")
+		self.assertEqual({row["id"] for row in active_jobs.rows()}, {self.jobs[1].pk, self.jobs[2].pk, job.pk})
+
+
+@override_settings(JOBS_THROTTLE_RATES={"jobs": "2/min", "jobs_write": "1/min"})
+class ThrottleTests(JobsTestCase):
+	def allowed(self, method):
+		request = SimpleNamespace(method=method, user=User(username="seeker"))
+		return throttling.JobsThrottle().allow_request(request, view=None)
+
+	def test_writes_do_not_spend_the_read_bucket(self):
+		self.assertEqual([self.allowed("POST"), self.allowed("PATCH")], [True, False])
+		self.assertEqual([self.allowed("GET"), self.allowed("HEAD"), self.allowed("GET")], [True, True, False])
+
+
+class CoalescingTests(JobsTestCase):
+	def test_follower_stops_waiting_after_its_timeout(self):
+		flights = coalescing.SingleFlight("test")
+		started, release = threading.Event(), threading.Event()
+
+		def stuck():
+			started.set()
+			release.wait(5)
+			return "leader"
+
+		leader = threading.Thread(target=flights.do, args=("key", stuck))
+		leader.start()
+		self.addCleanup(leader.join)
+		self.addCleanup(release.set)
+		started.wait(5)
+		self.assertEqual(flights.do("key", lambda: "follower", timeout=0.05), "follower")
+
+	def test_async_follower_stops_waiting_after_its_timeout(self):
+		flights = coalescing.SingleFlight("test")
+
+		async def run():
+			release = asyncio.Event()
+
+			async def stuck():
+				await release.wait()
+				return "leader"
+
+			async def own():
+				return "follower"
+
+			leader = asyncio.create_task(flights.ado("key", stuck))
+			await asyncio.sleep(0)
+			followed = await flights.ado("key", own, timeout=0.05)
+			release.set()
+			return followed, await leader
+
+		self.assertEqual(asyncio.run(run()), ("follower", "leader"))
+
+
+@override_settings(PROFILING_TOKEN="secret", PROFILING_BUFFER_SIZE=2, PROFILING_TRIM_INTERVAL=60)
+class ProfilingTests(JobsTestCase):
+	def setUp(self):
+		super().setUp()
+		self.seeker = self.make_user("seeker")
+		self.enterContext(mock.patch.object(profiling, "_next_trim", 0.0))
+
+	def profiled(self):
+		response = self.client.get("/api/me", HTTP_X_PROFILE="secret", **self.auth(self.seeker))
+		return int(response["X-Profile-Id"])
+
+	def test_queries_are_not_logged_by_default(self):
+		timing, token = metrics.start_request()
+		self.addCleanup(metrics.end_request, token)
+		self.assertEqual(profiling.begin(RequestFactory().get("/api/me"), timing), (None, None))
+		self.assertIsNone(timing.queries)
+
+	def test_buffer_is_trimmed_at_most_once_per_interval(self):
+		first = [self.profiled() for _ in range(3)]
+		self.assertEqual(list(RequestProfile.objects.values_list("id", flat=True).order_by("id")), first)
+		profiling._next_trim = 0.0
+		latest = self.profiled()
+		self.assertEqual(list(RequestProfile.objects.values_list("id", flat=True).order_by("id")), [first[-1], latest])
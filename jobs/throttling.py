@@ -0,0 +1,84 @@
+"""Token-bucket throttling keyed by Firebase uid.
+
+Each scope has a rate such as ``"10/min"`` in ``JOBS_THROTTLE_RATES``; a throttle
+with a ``write_scope`` charges unsafe methods to that scope instead. A bucket
+holds up to that many tokens (the allowed burst) and refills continuously at
+that rate. Buckets live in the ``THROTTLE_CACHE_ALIAS`` cache. Updates are
+atomic within a process; with a shared backend, concurrent processes may
+occasionally let an extra request through, as with DRF's built-in throttles.
+Refused requests get DRF's 429 with ``Retry-After`` and are counted in the
+``jobchain_requests_shed_total`` metric.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+from . import metrics
+
+_DURATIONS = {"s": 1, "sec": 1, "m": 60, "min": 60, "h": 3600, "hour": 3600, "d": 86400, "day": 86400}
+_lock = threading.Lock()
+
+
+def parse_rate(rate):
+	"""``"10/min"`` -> (capacity 10, refill of 10 tokens per 60 seconds as tokens/second)."""
+	count, _, period = rate.partition("/")
+	count = int(count)
+	return count, count / _DURATIONS[period.strip().lower()]
+
+
+class TokenBucketThrottle(BaseThrottle):
+	scope = None
+	write_scope = None
+
+	def __init__(self):
+		self.retry_after = None
+
+	def get_rate(self, request, view):
+		scope = getattr(view, "throttle_scope", None) or self.scope
+		if self.write_scope and request.method not in SAFE_METHODS:
+			scope = self.write_scope
+		rate = getattr(settings, "JOBS_THROTTLE_RATES", {}).get(scope)
+		return scope, (parse_rate(rate) if rate else None)
+
+	def get_ident(self, request):
+		user = getattr(request, "user", None)
+		if user is not None and user.is_authenticated:
+			return f"uid:{user.username}"
+		return f"ip:{super().get_ident(request)}"
+
+	def allow_request(self, request, view):
+		scope, rate = self.get_rate(request, view)
+		if rate is None:
+			return True
+		capacity, per_second = rate
+		key = f"throttle:{scope}:{self.get_ident(request)}"
+		cache = caches[getattr(settings, "THROTTLE_CACHE_ALIAS", "default")]
+		now = time.time()
+		with _lock:
+			tokens, updated = cache.get(key, (capacity, now))
+			tokens = min(capacity, tokens + (now - updated) * per_second)
+			allowed = tokens >= 1
+			if allowed:
+				tokens -= 1
+			# Keep the bucket until it would have refilled anyway.
+			cache.set(key, (tokens, now), timeout=int((capacity - tokens) / per_second) + 1)
+		if not allowed:
+			self.retry_after = (1 - tokens) / per_second
+			metrics.SHED_REQUESTS.inc(scope, "throttled")
+		return allowed
+
+	def wait(self):
+		return self.retry_after
+
+
+class RecommendationsThrottle(TokenBucketThrottle):
+	scope = "recommendations"
+
+
+class JobsThrottle(TokenBucketThrottle):
+	scope = "jobs"
+	write_scope = "jobs_write"
@@ -1,12 +1,118 @@
-import os
 import json
+import math
+
+from asgiref.sync import sync_to_async
 from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.urls import reverse
+from django.views.decorators.csrf import csrf_exempt
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef
+from django.utils.cache import patch_vary_headers
+from django.utils.crypto import constant_time_compare
 from rest_framework import viewsets, permissions, status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView  # Import APIView
-from .models import JobPost, UserProfile, Skill
-from .serializers import JobPostSerializer, SkillSerializer
+from . import cache as recommendation_cache
+from .bulk import import_jobs
+from .ai_client import request_budget
+from .coalescing import recommendation_flights
+from . import metrics
+from . import tasks
+from .conditional import make_etag, not_modified, with_validators
+from .counters import pending_applications, record_application
+from .models import JobApplication, JobPost, RecommendationTask, UserProfile, Skill
+from .matching import match_scores
+from .pagination import JobPostCursorPagination
+from .parsers import NDJSONParser
+from .recommendations import arecommend, recommend
+from .routers import ReplicaReadMixin
+from .search import get_search_backend
+from .skill_index import normalize_skill_name, skill_index
+from .serializers import JOB_FIELDS, SUMMARY_FIELDS, JobPostSerializer, SkillSerializer, project_jobs, serialize_jobs
+from .snapshot import active_jobs
+from .throttling import JobsThrottle, RecommendationsThrottle
+from .streaming import json_array_response, ndjson_response, stream_json_array, stream_ndjson
+
+
+def _split_param(value):
+    return [part.strip() for part in value.split(",") if part.strip()]
+
+
+def _requested_fields(request):
+    """Output fields from ?fields=id,title,... or ?view=summary, or None for full rows.
+
+    ``id`` is always included so rows stay addressable.
+    """
+    params = request.query_params
+    if params.get("fields"):
+        fields = _split_param(params["fields"])
+        unknown = [name for name in fields if name not in JOB_FIELDS]
+        if unknown:
+            raise ValidationError({"fields": f"Unknown fields: {', '.join(unknown)}."})
+        return tuple(dict.fromkeys(["id", *fields]))
+    view = params.get("view", "full")
+    if view not in ("full", "summary"):
+        raise ValidationError({"view": "Expected 'full' or 'summary'."})
+    return SUMMARY_FIELDS if view == "summary" else None
+
+
+def _active_only(params, *allowed):
+    """True when the only filter is status=active, so the active jobs snapshot can answer."""
+    return params.get("status") == JobPost.JobStatus.ACTIVE and set(params) <= {"status", *allowed}
+
+
+def _seeker_skill_ids(request):
+    """Sorted skill ids of a job seeker making the request, or None for anyone else."""
+    if not hasattr(request, "_seeker_skill_ids"):
+        profile = getattr(request.user, "profile", None) if request.user.is_authenticated else None
+        request._seeker_skill_ids = (
+            sorted(profile.skills.values_list("pk", flat=True))
+            if profile is not None and profile.role == UserProfile.Role.JOB_SEEKER else None
+        )
+    return request._seeker_skill_ids
+
+
+def _with_match_scores(request, rows):
+    """Add each job's skill-match score (share of its skills the seeker has) for job seekers."""
+    skill_ids = _seeker_skill_ids(request)
+    if not rows or skill_ids is None:
+        return rows
+    scores = match_scores(skill_ids, [row["id"] for row in rows])
+    for row in rows:
+        score = scores.get(row["id"])
+        row["match_score"] = round(score.coverage, 3) if score else None
+    return rows
+
+
+def _jobs_validators(request):
+    """ETag and Last-Modified for a job collection, derived from the shared change counters.
+
+    Seekers get per-user match scores, so their ETag also covers who they are and
+    their skills, and no Last-Modified is sent since skill edits are not dated.
+    """
+    parts = [recommendation_cache.get_jobs_version(), recommendation_cache.get_version(recommendation_cache.APPLICATIONS_VERSION_KEY)]
+    skill_ids = _seeker_skill_ids(request)
+    if skill_ids is not None:
+        return make_etag(request, *parts, request.user.pk, skill_ids), None
+    changed = [
+        recommendation_cache.get_changed_at(key)
+        for key in (recommendation_cache.JOBS_VERSION_KEY, recommendation_cache.APPLICATIONS_VERSION_KEY)
+    ]
+    return make_etag(request, *parts), max(filter(None, changed), default=None)
+
+
+def _conditional(request, validators, render):
+    """Answer 304 when the client's copy is current, otherwise ``render()`` with validators attached."""
+    etag, last_modified = validators
+    response = not_modified(request, etag, last_modified) or with_validators(render(), etag, last_modified)
+    patch_vary_headers(response, ("Authorization",))
+    return response
 
 
 class IsEmployer(permissions.BasePermission):
@@ -20,25 +126,177 @@ class IsEmployer(permissions.BasePermission):
         )
 
 
-class SkillViewSet(viewsets.ModelViewSet):
+class SkillViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = Skill.objects.all()
     serializer_class = SkillSerializer
     permission_classes = [permissions.AllowAny]  # Allow unauthenticated access for testing
     
+    def _validators(self, request):
+        key = recommendation_cache.SKILLS_VERSION_KEY
+        return make_etag(request, recommendation_cache.get_version(key)), recommendation_cache.get_changed_at(key)
+
+    def list(self, request, *args, **kwargs):
+        return _conditional(request, self._validators(request), lambda: self._list(request, *args, **kwargs))
+
+    def _list(self, request, *args, **kwargs):
+        # Autocomplete, e.g. /api/skills/?prefix=py&limit=10, served from the in-process prefix index
+        prefix = request.query_params.get('prefix')
+        if prefix is None:
+            return super().list(request, *args, **kwargs)
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+        except ValueError:
+            raise ValidationError({"limit": "Expected an integer."})
+        return Response([{"id": skill_id, "name": name} for skill_id, name in skill_index.search(prefix, limit)])
+
+    def retrieve(self, request, *args, **kwargs):
+        return _conditional(request, self._validators(request), lambda: super(SkillViewSet, self).retrieve(request, *args, **kwargs))
+
     def create(self, request, *args, **kwargs):
-        # Check if skill already exists
-        name = request.data.get('name')
+        # Check if skill already exists, ignoring case and whitespace differences
+        name = normalize_skill_name(request.data.get('name') or '')
         if name:
-            skill, created = Skill.objects.get_or_create(name=name)
+            existing = skill_index.find(name)
+            if existing:
+                return Response({"id": existing[0], "name": existing[1]})
+            skill = Skill.objects.filter(name__iexact=name).first()
+            if skill is None:
+                try:
+                    skill = Skill.objects.get_or_create(name=name)[0]
+                except IntegrityError:  # a differently cased spelling was created concurrently
+                    skill = Skill.objects.get(name__iexact=name)
             serializer = self.get_serializer(skill)
             return Response(serializer.data)
         return super().create(request, *args, **kwargs)
 
 
-class JobPostViewSet(viewsets.ModelViewSet):
-    queryset = JobPost.objects.all().order_by("-created_at")
+class JobPostViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
+    queryset = JobPost.objects.with_related().order_by("-created_at", "-id")
     serializer_class = JobPostSerializer
     permission_classes = [IsEmployer]
+    pagination_class = JobPostCursorPagination
+    throttle_classes = [JobsThrottle]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action not in ("list", "export", "search", "retrieve"):
+            return queryset
+        fields = _requested_fields(self.request)
+        if fields is not None:
+            queryset = project_jobs(queryset, fields)
+        if self.action == "retrieve":
+            return queryset
+
+        # Server-side filters, e.g. ?status=active&job_type=FULL_TIME,CONTRACT&skills=1,2&search=django
+        params = self.request.query_params
+        if params.get("status"):
+            queryset = queryset.filter(status__in=_split_param(params["status"]))
+        if params.get("job_type"):
+            queryset = queryset.filter(job_type__in=[value.upper() for value in _split_param(params["job_type"])])
+        if params.get("location"):
+            queryset = queryset.filter(location__icontains=params["location"])
+        if params.get("company"):
+            queryset = queryset.filter(company__icontains=params["company"])
+        if params.get("skills"):
+            skill_ids = _split_param(params["skills"])
+            if not all(value.isdigit() for value in skill_ids):
+                raise ValidationError({"skills": "Expected a comma-separated list of skill ids."})
+            queryset = queryset.filter(Exists(
+                JobPost.skills.through.objects.filter(jobpost_id=OuterRef("pk"), skill_id__in=skill_ids)
+            ))
+        if params.get("search"):
+            queryset = get_search_backend().filter(queryset, params["search"])
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        return _conditional(request, _jobs_validators(request), lambda: self._list(request))
+
+    def _list(self, request):
+        # ?stream=true renders every matching job as one incrementally written JSON array
+        if request.query_params.get("stream", "").lower() in ("1", "true"):
+            if _active_only(request.query_params, "stream"):
+                return json_array_response(active_jobs.encoded())
+            return stream_json_array(self.filter_queryset(self.get_queryset()), fields=_requested_fields(request))
+
+        page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        return self.get_paginated_response(_with_match_scores(request, serialize_jobs(page, _requested_fields(request))))
+
+    def retrieve(self, request, *args, **kwargs):
+        # A single-column lookup decides 304s before the job is loaded and serialized.
+        pk = str(kwargs.get("pk", ""))
+        updated_at = JobPost.objects.filter(pk=pk).values_list("updated_at", flat=True).first() if pk.isdigit() else None
+        if updated_at is None:
+            return super().retrieve(request, *args, **kwargs)
+        validators = make_etag(request, updated_at.isoformat()), updated_at.timestamp()
+        return _conditional(request, validators, lambda: self._retrieve(request, *args, **kwargs))
+
+    def _retrieve(self, request, *args, **kwargs):
+        fields = _requested_fields(request)
+        if fields is None:
+            return super().retrieve(request, *args, **kwargs)
+        return Response(serialize_jobs([self.get_object()], fields)[0])
+
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """Every matching job as newline-delimited JSON, streamed in chunks."""
+        if _active_only(request.query_params):
+            return ndjson_response(active_jobs.encoded(), filename="jobs.ndjson")
+        return stream_ndjson(self.filter_queryset(self.get_queryset()), filename="jobs.ndjson", fields=_requested_fields(request))
+
+    @action(detail=True, methods=["post"], permission_classes=[permissions.IsAuthenticated])
+    def apply(self, request, pk=None):
+        """Record an application from a job seeker."""
+        _, error = _seeker_profile(request.user)
+        if error:
+            return Response({"error": "Only job seekers can apply to jobs."}, status=status.HTTP_403_FORBIDDEN)
+        job = self.get_object()
+        if job.status != JobPost.JobStatus.ACTIVE:
+            return Response({"error": "This job is not accepting applications."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # The unique (user, job) row makes repeated or concurrent applies count once.
+        with transaction.atomic():
+            _, created = JobApplication.objects.get_or_create(user=request.user, job=job)
+            if created:
+                record_application(job.pk)
+        job.refresh_from_db(fields=["applications_count"])
+        return Response({
+            "id": job.pk,
+            "applications": job.applications_count + pending_applications(job.pk),
+            "already_applied": not created,
+        })
+
+    @action(detail=False, methods=["post"], parser_classes=[JSONParser, NDJSONParser])
+    def bulk(self, request):
+        """Create many jobs from a JSON array or an NDJSON stream, with a per-row result report."""
+        rows = request.data
+        if not isinstance(rows, list):
+            raise ValidationError({"non_field_errors": ["Expected a list of jobs."]})
+        max_rows = getattr(settings, 'JOBS_BULK_MAX_ROWS', 10000)
+        if len(rows) > max_rows:
+            raise ValidationError({"non_field_errors": [f"At most {max_rows} jobs can be imported per request."]})
+
+        results = import_jobs(rows, request.user)
+        created = sum(1 for result in results if result["status"] == "created")
+        return Response(
+            {"created": created, "failed": len(results) - created, "results": results},
+            status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST,
+        )
+
+    @action(detail=False, methods=["get"])
+    def search(self, request):
+        """Full-text search ranked by relevance, e.g. /api/jobs/search/?q=django&status=active&limit=20."""
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            raise ValidationError({"q": "This query parameter is required."})
+        try:
+            limit = min(max(int(request.query_params.get("limit", 20)), 1), 100)
+        except ValueError:
+            raise ValidationError({"limit": "Expected an integer."})
+
+        def render():
+            jobs = get_search_backend().search(self.filter_queryset(self.get_queryset()), query)[:limit]
+            return Response(_with_match_scores(request, serialize_jobs(jobs, _requested_fields(request))))
+        return _conditional(request, _jobs_validators(request), render)
 
     def perform_create(self, serializer):
         serializer.save(employer=self.request.user)
@@ -51,9 +309,24 @@ def me(request):
         "uid": request.user.username,
         "email": request.user.email,
         "role": request.user.profile.role,
+        "skills": list(request.user.profile.skills.values_list("pk", flat=True)),
     })
 
 
+@api_view(["POST"])
+@permission_classes([permissions.IsAuthenticated])
+def set_skills(request):
+    skill_ids = request.data.get("skill_ids")
+    if not isinstance(skill_ids, list) or not all(isinstance(skill_id, int) for skill_id in skill_ids):
+        return Response({"error": "skill_ids must be a list of skill ids"}, status=400)
+
+    skills = list(Skill.objects.filter(pk__in=skill_ids))
+    if len(skills) != len(set(skill_ids)):
+        return Response({"error": "Unknown skill id"}, status=400)
+    request.user.profile.skills.set(skills)
+    return Response({"skills": sorted(skill.pk for skill in skills)})
+
+
 @api_view(["POST"])
 @permission_classes([permissions.IsAuthenticated])
 def set_role(request):
@@ -67,117 +340,151 @@ def set_role(request):
     return Response({"role": role})
 
 
-def _get_genai_client():
-    """Attempt to import and configure the google.generativeai client.
-
-    Returns (genai_module, None) on success or (None, error_message) on failure.
-    This keeps import/configuration lazy so management commands (migrate, makemigrations)
-    don't crash if the optional dependency is missing or not configured.
-    """
+def _seeker_profile(user):
+    """Return (profile, None) for job seekers, or (None, (error_body, status_code))."""
     try:
-        import google.generativeai as genai  # imported lazily
-    except Exception:
-        return None, "google.generativeai not installed"
+        user_profile = user.profile
+    except UserProfile.DoesNotExist:
+        return None, ({"error": "User profile not found."}, status.HTTP_404_NOT_FOUND)
+    if user_profile.role != UserProfile.Role.JOB_SEEKER:
+        return None, ({"error": "Only job seekers can receive recommendations."}, status.HTTP_403_FORBIDDEN)
+    return user_profile, None
 
-    api_key = os.environ.get("GEMINI_API_KEY") or os.environ.get("GEMINI_APIKEY")
-    if not api_key:
-        return None, "GEMINI_API_KEY not set in environment"
 
-    try:
-        # configure may raise if the client API changes; surface that message
-        genai.configure(api_key=api_key)
-    except Exception as e:
-        return None, f"Error configuring Gemini API: {e}"
+def _with_recommendation_headers(response, result):
+    response['X-Recommendations-Source'] = result.source
+    response['X-Cache'] = result.cache
+    return response
+
+
+def _flight_key(user, skills, preferences):
+    # Identical requests from the same user share one computation.
+    return user.pk, json.dumps({"skills": skills, "preferences": preferences}, sort_keys=True, default=str)
+
+
+def _wants_async(request):
+    # ?mode=async or the standard "Prefer: respond-async" request header
+    return request.query_params.get('mode') == 'async' or 'respond-async' in request.headers.get('Prefer', '')
 
-    return genai, None
+
+def _task_response(task):
+    body = {"task_id": str(task.pk), "status": task.status}
+    if task.status == RecommendationTask.Status.DONE:
+        body.update(source=task.source, jobs=task.result)
+    elif task.status == RecommendationTask.Status.FAILED:
+        body["error"] = task.error
+    response = Response(body, status=status.HTTP_202_ACCEPTED if task.status == RecommendationTask.Status.PENDING else status.HTTP_200_OK)
+    response['Location'] = reverse('ai-recommendation-task', args=[task.pk])
+    if task.status == RecommendationTask.Status.PENDING:
+        response['Retry-After'] = '1'
+    return response
 
 
 class AIRecommendationsView(APIView):
     """
     An API view that accepts a job seeker's preferences and returns
     a list of jobs filtered and ranked by the Gemini AI.
+
+    With ?mode=async (or "Prefer: respond-async") the request is queued and
+    answered with 202 and a task id to poll at /ai/recommendations/tasks/<id>/.
     """
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [RecommendationsThrottle]
 
     def post(self, request, *args, **kwargs):
         # Get the current user's profile
-        try:
-            user_profile = request.user.profile
-            if user_profile.role != UserProfile.Role.JOB_SEEKER:
-                return Response(
-                    {"error": "Only job seekers can receive recommendations."},
-                    status=status.HTTP_403_FORBIDDEN
-                )
-        except UserProfile.DoesNotExist:
-            return Response({"error": "User profile not found."}, status=status.HTTP_404_NOT_FOUND)
+        user_profile, error = _seeker_profile(request.user)
+        if error:
+            return Response(error[0], status=error[1])
 
         # Get user preferences from the frontend request
         preferences = request.data.get('preferences', {})
         user_skills = request.data.get('skills', [])
 
-        # Fetch all active job posts from the database
-        all_jobs = JobPost.objects.filter(status='active')
-        if not all_jobs.exists():
-            return Response([], status=status.HTTP_200_OK)  # Return empty if no jobs exist
+        if _wants_async(request):
+            return _task_response(tasks.submit(user_profile, user_skills, preferences))
+
+        result = recommendation_flights.do(
+            _flight_key(request.user, user_skills, preferences),
+            lambda: recommend(user_profile, user_skills, preferences),
+            timeout=request_budget(),
+        )
+        return _with_recommendation_headers(Response(result.jobs, status=status.HTTP_200_OK), result)
+
 
-        # Serialize job data to be sent to the AI
-        job_serializer = JobPostSerializer(all_jobs, many=True)
-        jobs_data = job_serializer.data
+@api_view(["GET"])
+@permission_classes([permissions.IsAuthenticated])
+def recommendation_task(request, task_id):
+    """Status of a queued recommendation, with the ranked jobs once it is done."""
+    task = tasks.get_task(task_id, request.user)
+    if task is None:
+        return Response({"error": "Task not found."}, status=status.HTTP_404_NOT_FOUND)
+    return _task_response(task)
 
-        # Construct a detailed prompt for the Gemini API
-        prompt = self.construct_prompt(user_profile, preferences, user_skills, jobs_data)
 
-        # Import and configure the Gemini client lazily. If it's not available or configured,
-        # return a 503 so management commands and non-AI flows continue to work.
-        genai, genai_err = _get_genai_client()
-        if genai is None:
-            return Response({"error": "AI service unavailable", "details": genai_err}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+def _authenticate_json_request(request):
+    """Run DRF authentication, throttling and JSON parsing for a plain Django request.
 
-        # Call the Gemini API
-        try:
-            model = genai.GenerativeModel('gemini-pro')
-            response = model.generate_content(prompt)
-			
-            # Clean the response text to ensure it's valid JSON
-            cleaned_response_text = getattr(response, 'text', str(response)).strip().replace('```json', '').replace('```', '').strip()
-			
-            # Parse the AI's response to get the recommended job IDs
-            recommended_job_ids = json.loads(cleaned_response_text)
-
-        except json.JSONDecodeError:
-            return Response({"error": "Failed to parse AI response."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        except Exception as e:
-            return Response({"error": f"An error occurred with the AI service: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-        # Filter and return the matched jobs
-        matched_jobs_dict = {job.id: job for job in all_jobs if job.id in recommended_job_ids}
-        ordered_matched_jobs = [matched_jobs_dict[job_id] for job_id in recommended_job_ids if job_id in matched_jobs_dict]
-
-        final_serializer = JobPostSerializer(ordered_matched_jobs, many=True)
-        return Response(final_serializer.data, status=status.HTTP_200_OK)
-
-    def construct_prompt(self, profile, preferences, skills, jobs_data):
-        """Helper method to build the prompt for the AI."""
-        return f"""
-        You are an expert AI career advisor. Your task is to analyze a list of available jobs and recommend the best matches for a user based on their profile and explicit preferences.
-
-        **User Profile:**
-        - Role: {profile.get_role_display()}
-        - Skills: {', '.join(skills) if skills else "Not specified"}
-        - Other Profile Data: (You can add more fields from the UserProfile model here if needed)
-
-        **User's Current Search Preferences:**
-        - Keywords: {preferences.get('search', 'any')}
-        - Location: {preferences.get('location', 'any')}
-        - Job Type: {preferences.get('jobType', 'any')}
-        - Salary Range: {preferences.get('salaryRange', 'any')}
-        - Experience Level: {preferences.get('experienceLevel', 'any')}
-
-        **Available Jobs (JSON format):**
-        {json.dumps(jobs_data, indent=2)}
-
-        **Your Task:**
-        Analyze all the available jobs and return a JSON array containing only the integer IDs of the jobs that are the best fit for the user, ordered from the absolute best match to the least. Do not include any explanations or other text outside of the JSON array.
-
-        Example Response: [10, 5, 23]
-        """
\ No newline at end of file
+    Returns (user, data, retry_after); retry_after is set when the request was throttled.
+    """
+    drf_request = Request(
+        request,
+        parsers=[JSONParser()],
+        authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES],
+    )
+    throttle = RecommendationsThrottle()
+    if drf_request.user and drf_request.user.is_authenticated and not throttle.allow_request(drf_request, None):
+        return drf_request.user, None, throttle.wait()
+    return drf_request.user, drf_request.data, None
+
+
+@csrf_exempt
+async def ai_recommendations_async(request):
+    """ASGI-native variant of AIRecommendationsView: the model call awaits without holding a worker thread."""
+    if request.method != "POST":
+        return JsonResponse({"detail": f'Method "{request.method}" not allowed.'}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+    try:
+        user, data, retry_after = await sync_to_async(_authenticate_json_request)(request)
+    except APIException as e:
+        return JsonResponse({"detail": str(e.detail)}, status=e.status_code)
+    if not user or not user.is_authenticated:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=status.HTTP_401_UNAUTHORIZED)
+    if retry_after is not None:
+        response = JsonResponse({"detail": "Request was throttled."}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+        response['Retry-After'] = str(math.ceil(retry_after))
+        return response
+
+    user_profile, error = await sync_to_async(_seeker_profile)(user)
+    if error:
+        return JsonResponse(error[0], status=error[1])
+
+    skills, preferences = data.get('skills', []), data.get('preferences', {})
+    result = await recommendation_flights.ado(
+        _flight_key(user, skills, preferences),
+        lambda: arecommend(user_profile, skills, preferences),
+        timeout=request_budget(),
+    )
+    return _with_recommendation_headers(JsonResponse(result.jobs, safe=False), result)
+
+
+@api_view(["GET"])
+@permission_classes([permissions.IsAdminUser])
+def recommendation_cache_stats(request):
+    return Response({**recommendation_cache.cache_stats(), "active_jobs_snapshot": active_jobs.stats()})
+
+
+def metrics_view(request):
+    """Request metrics in Prometheus text format.
+
+    Served to ``Bearer <METRICS_TOKEN>`` (when that is set) and to staff sessions;
+    with DEBUG on, to anyone.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    authorized = (
+        settings.DEBUG
+        or (token and constant_time_compare(request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'))
+        or request.user.is_staff
+    )
+    if not authorized:
+        return HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+    return HttpResponse(metrics.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
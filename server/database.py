@@ -0,0 +1,43 @@
+"""``DATABASE_URL`` parsing for settings.
+
+Supports ``sqlite:///relative/path.sqlite3``, ``sqlite:////absolute/path``,
+``sqlite://:memory:``, ``postgres://`` (or ``postgresql://``) and ``mysql://``.
+Query string parameters become backend ``OPTIONS``, e.g. ``?sslmode=require``.
+"""
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+ENGINES = {
+	'sqlite': 'django.db.backends.sqlite3',
+	'postgres': 'django.db.backends.postgresql',
+	'postgresql': 'django.db.backends.postgresql',
+	'pgsql': 'django.db.backends.postgresql',
+	'mysql': 'django.db.backends.mysql',
+}
+
+
+def parse_database_url(url, conn_max_age=0, conn_health_checks=False):
+	"""Return a ``DATABASES`` entry for ``url``."""
+	parts = urlsplit(url)
+	engine = ENGINES.get(parts.scheme)
+	if engine is None:
+		raise ValueError(f"Unsupported database URL scheme: {parts.scheme!r}")
+
+	if parts.scheme == 'sqlite':
+		# sqlite:///db.sqlite3 is relative, sqlite:////srv/db.sqlite3 absolute
+		name = ':memory:' if parts.netloc == ':memory:' else unquote(parts.path[1:])
+		config = {'ENGINE': engine, 'NAME': name or ':memory:'}
+	else:
+		config = {
+			'ENGINE': engine,
+			'NAME': unquote(parts.path.lstrip('/')),
+			'USER': unquote(parts.username or ''),
+			'PASSWORD': unquote(parts.password or ''),
+			'HOST': parts.hostname or '',
+			'PORT': str(parts.port or ''),
+		}
+	options = dict(parse_qsl(parts.query))
+	if options:
+		config['OPTIONS'] = options
+	config['CONN_MAX_AGE'] = conn_max_age
+	config['CONN_HEALTH_CHECKS'] = conn_health_checks
+	return config
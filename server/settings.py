@@ -2,6 +2,8 @@ import os
 from pathlib import Path
 from dotenv import load_dotenv
 
+from server.database import parse_database_url
+
 load_dotenv()
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -24,6 +26,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+	'jobs.middleware.PerformanceMiddleware',
+	'jobs.middleware.CompressionMiddleware',
 	'corsheaders.middleware.CorsMiddleware',
 	'django.middleware.common.CommonMiddleware',
 	'django.middleware.security.SecurityMiddleware',
@@ -54,11 +58,36 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'server.wsgi.application'
 
+# Database from DATABASE_URL (SQLite file next to manage.py by default). Connections are kept
+# for CONN_MAX_AGE seconds and health-checked before reuse instead of reopened per request.
+_conn_max_age = int(os.getenv('CONN_MAX_AGE', '60'))
+_conn_health_checks = os.getenv('CONN_HEALTH_CHECKS', 'true').lower() == 'true'
 DATABASES = {
-	'default': {
-		'ENGINE': 'django.db.backends.sqlite3',
-		'NAME': BASE_DIR / 'db.sqlite3',
-	}
+	'default': parse_database_url(
+		os.getenv('DATABASE_URL', f'sqlite:///{BASE_DIR / "db.sqlite3"}'),
+		conn_max_age=_conn_max_age,
+		conn_health_checks=_conn_health_checks,
+	),
+}
+
+# Optional read replica: GETs on the job and skill endpoints read from DATABASE_REPLICA_URL
+DATABASE_REPLICA_ALIAS = 'replica'
+if os.getenv('DATABASE_REPLICA_URL'):
+	DATABASES[DATABASE_REPLICA_ALIAS] = parse_database_url(
+		os.getenv('DATABASE_REPLICA_URL'),
+		conn_max_age=_conn_max_age,
+		conn_health_checks=_conn_health_checks,
+	)
+	DATABASES[DATABASE_REPLICA_ALIAS]['TEST'] = {'MIRROR': 'default'}
+	DATABASE_ROUTERS = ['jobs.routers.ReplicaRouter']
+
+# PRAGMAs run on every new SQLite connection: WAL lets readers proceed alongside the
+# single writer, and busy_timeout (ms) makes writers wait for the lock instead of failing.
+SQLITE_PRAGMAS = {
+	'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'wal'),
+	'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'normal'),
+	'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', '5000')),
+	'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
 }
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -91,6 +120,7 @@ CORS_ALLOW_HEADERS = [
     'origin',
     'user-agent',
     'x-csrftoken',
+    'x-profile',
     'x-requested-with',
 ]
 
@@ -107,13 +137,118 @@ REST_FRAMEWORK = {
 	],
 }
 
-# Firebase Admin certificate path auto-detection
-_env_cert = os.getenv('FIREBASE_CERT_PATH')
-_default_cert = BASE_DIR / 'serviceAccountKey.json'
-_alt_cert = BASE_DIR / 'zenithwork-17258-firebase-adminsdk-fbsvc-441aa01a2a.json'
-if _env_cert and Path(_env_cert).exists():
-	FIREBASE_CERT_PATH = _env_cert
-elif _alt_cert.exists():
-	FIREBASE_CERT_PATH = str(_alt_cert)
-else:
-	FIREBASE_CERT_PATH = str(_default_cert)
+# Caches. Recommendation entries expire after RECOMMENDATION_CACHE_TTL seconds and the
+# least recently used ones are evicted past RECOMMENDATION_CACHE_MAX_ENTRIES.
+CACHES = {
+	'default': {
+		'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+	},
+	# Change counters behind ETags, recommendation keys and in-process snapshots. Must be shared
+	# (Redis/Memcached) when more than one worker process runs; `check --deploy` reports jobs.E001 otherwise.
+	'versions': {
+		'BACKEND': os.getenv('VERSION_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+		'LOCATION': os.getenv('VERSION_CACHE_LOCATION', 'versions'),
+		'TIMEOUT': None,
+	},
+	'recommendations': {
+		'BACKEND': os.getenv('RECOMMENDATION_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+		'LOCATION': os.getenv('RECOMMENDATION_CACHE_LOCATION', 'recommendations'),
+		'TIMEOUT': int(os.getenv('RECOMMENDATION_CACHE_TTL', '300')),
+		'OPTIONS': {
+			'MAX_ENTRIES': int(os.getenv('RECOMMENDATION_CACHE_MAX_ENTRIES', '1000')),
+		},
+	},
+}
+RECOMMENDATION_CACHE_ALIAS = 'recommendations'
+VERSION_CACHE_ALIAS = 'versions'
+
+# Page size of the /api/jobs/ cursor pagination
+JOBS_PAGE_SIZE = int(os.getenv('JOBS_PAGE_SIZE', '20'))
+
+# Rows fetched and serialized per chunk by streamed job listings and exports
+JOBS_STREAM_CHUNK_SIZE = int(os.getenv('JOBS_STREAM_CHUNK_SIZE', '500'))
+
+# Bulk job import: rows validated and written per transaction, and rows accepted per request
+JOBS_BULK_BATCH_SIZE = int(os.getenv('JOBS_BULK_BATCH_SIZE', '500'))
+JOBS_BULK_MAX_ROWS = int(os.getenv('JOBS_BULK_MAX_ROWS', '10000'))
+
+# Application counting: buffer per-process increments and flush them in one UPDATE
+# every JOBS_APPLICATION_FLUSH_INTERVAL seconds instead of writing on every apply
+JOBS_APPLICATION_COUNT_BUFFERED = os.getenv('JOBS_APPLICATION_COUNT_BUFFERED', 'false').lower() == 'true'
+JOBS_APPLICATION_FLUSH_INTERVAL = float(os.getenv('JOBS_APPLICATION_FLUSH_INTERVAL', '5'))
+
+# AI recommendations: number of locally pre-ranked jobs sent to the model
+AI_RECOMMENDATION_CANDIDATES = int(os.getenv('AI_RECOMMENDATION_CANDIDATES', '50'))
+
+# Prompt size budget in bytes and per-job description length sent to the model
+AI_PROMPT_BUDGET_BYTES = int(os.getenv('AI_PROMPT_BUDGET_BYTES', '32000'))
+AI_PROMPT_DESCRIPTION_CHARS = int(os.getenv('AI_PROMPT_DESCRIPTION_CHARS', '280'))
+
+# Gemini client: module (jobs.fake_genai for offline runs), per-call timeout in seconds,
+# cap on in-flight calls, retries with jittered backoff, and circuit breaker thresholds
+AI_GENAI_MODULE = os.getenv('AI_GENAI_MODULE', 'google.generativeai')
+AI_MODEL_NAME = os.getenv('AI_MODEL_NAME', 'gemini-pro')
+AI_REQUEST_TIMEOUT = float(os.getenv('AI_REQUEST_TIMEOUT', '15'))
+AI_MAX_CONCURRENCY = int(os.getenv('AI_MAX_CONCURRENCY', '8'))
+AI_MAX_RETRIES = int(os.getenv('AI_MAX_RETRIES', '2'))
+AI_RETRY_BACKOFF = float(os.getenv('AI_RETRY_BACKOFF', '0.5'))
+AI_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('AI_CIRCUIT_FAILURE_THRESHOLD', '5'))
+AI_CIRCUIT_RESET_TIMEOUT = float(os.getenv('AI_CIRCUIT_RESET_TIMEOUT', '30'))
+
+# Queued (?mode=async) recommendations: worker threads per process, seconds before an
+# unfinished task is reported as lost, seconds finished task results are kept, and
+# the least number of seconds between two deletions of expired results per process
+AI_TASK_WORKERS = int(os.getenv('AI_TASK_WORKERS', '4'))
+AI_TASK_TIMEOUT = int(os.getenv('AI_TASK_TIMEOUT', '300'))
+AI_TASK_RESULT_TTL = int(os.getenv('AI_TASK_RESULT_TTL', '3600'))
+AI_TASK_CLEANUP_INTERVAL = int(os.getenv('AI_TASK_CLEANUP_INTERVAL', '300'))
+
+# Firebase Admin certificate: FIREBASE_CERT_PATH if that file exists, else the first existing
+# candidate; resolved when Firebase is first initialized rather than on every boot
+FIREBASE_CERT_PATH = os.getenv('FIREBASE_CERT_PATH')
+FIREBASE_CERT_CANDIDATES = [
+	BASE_DIR / 'zenithwork-17258-firebase-adminsdk-fbsvc-441aa01a2a.json',
+	BASE_DIR / 'serviceAccountKey.json',
+]
+
+# Warm-up hooks run once per web worker by server.wsgi/server.asgi (not by management commands),
+# and the median boot import time allowed by `manage.py startup_benchmark` (0 disables the check)
+STARTUP_PRELOAD = [
+	p.strip() for p in os.getenv('STARTUP_PRELOAD', 'jobs.authentication.preload,jobs.ai_client.preload').split(',') if p.strip()
+]
+STARTUP_IMPORT_BUDGET_MS = float(os.getenv('STARTUP_IMPORT_BUDGET_MS', '800'))
+
+# Verified-token and uid -> user/profile caches used by FirebaseAuthentication; cached users are
+# revalidated against a per-user counter in the shared 'versions' cache on every request
+FIREBASE_TOKEN_CACHE_SIZE = int(os.getenv('FIREBASE_TOKEN_CACHE_SIZE', '1024'))
+FIREBASE_USER_CACHE_SIZE = int(os.getenv('FIREBASE_USER_CACHE_SIZE', '1024'))
+FIREBASE_USER_CACHE_TTL = int(os.getenv('FIREBASE_USER_CACHE_TTL', '300'))
+
+# Token-bucket throttling per Firebase uid (client IP when anonymous): each scope allows bursts
+# of up to N requests, refilling at N per period. Job reads and writes (create, edit, apply, bulk)
+# have separate buckets. Buckets live in THROTTLE_CACHE_ALIAS.
+JOBS_THROTTLE_RATES = {
+	'recommendations': os.getenv('THROTTLE_RATE_RECOMMENDATIONS', '10/min'),
+	'jobs': os.getenv('THROTTLE_RATE_JOBS', '120/min'),
+	'jobs_write': os.getenv('THROTTLE_RATE_JOBS_WRITE', '30/min'),
+}
+THROTTLE_CACHE_ALIAS = os.getenv('THROTTLE_CACHE_ALIAS', 'default')
+
+# Response compression (br and zstd when brotli / zstandard are installed, else gzip)
+# for bodies of at least COMPRESSION_MIN_BYTES
+COMPRESSION_MIN_BYTES = int(os.getenv('COMPRESSION_MIN_BYTES', '1024'))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', '4'))
+COMPRESSION_ZSTD_LEVEL = int(os.getenv('COMPRESSION_ZSTD_LEVEL', '3'))
+
+# Per-request timing: Server-Timing response header; /metrics is served to staff and to Bearer METRICS_TOKEN (anyone with DEBUG)
+PERF_SERVER_TIMING = os.getenv('PERF_SERVER_TIMING', 'true').lower() == 'true'
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Profiling: requests sending X-Profile: <PROFILING_TOKEN>, or a sampled fraction, run under cProfile;
+# those and requests slower than PROFILING_SLOW_MS (0 disables; otherwise every request's SQL is logged)
+# keep the newest PROFILING_BUFFER_SIZE captures, trimmed every PROFILING_TRIM_INTERVAL seconds per process
+PROFILING_TOKEN = os.getenv('PROFILING_TOKEN', '')
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', '0'))
+PROFILING_SLOW_MS = float(os.getenv('PROFILING_SLOW_MS', '0'))
+PROFILING_BUFFER_SIZE = int(os.getenv('PROFILING_BUFFER_SIZE', '100'))
+PROFILING_TRIM_INTERVAL = int(os.getenv('PROFILING_TRIM_INTERVAL', '60'))
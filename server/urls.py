@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from jobs.views import JobPostViewSet, SkillViewSet, me, set_role, AIRecommendationsView
+from jobs.views import JobPostViewSet, SkillViewSet, me, set_role, set_skills, AIRecommendationsView, ai_recommendations_async, recommendation_cache_stats, recommendation_task, metrics_view
 
 router = DefaultRouter()
 router.register('jobs', JobPostViewSet, basename='job')
@@ -12,5 +12,10 @@ urlpatterns = [
 	path('api/', include(router.urls)),
 	path('api/me', me),
 	path('api/set-role', set_role),
+	path('api/me/skills', set_skills),
   path('ai/recommendations/', AIRecommendationsView.as_view(), name='ai-recommendations'),
+  path('ai/recommendations/async/', ai_recommendations_async, name='ai-recommendations-async'),
+  path('ai/recommendations/tasks/<uuid:task_id>/', recommendation_task, name='ai-recommendation-task'),
+  path('ai/recommendations/cache/', recommendation_cache_stats, name='ai-recommendations-cache'),
+  path('metrics', metrics_view, name='metrics'),
 ]
@@ -4,3 +4,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'server.settings')
 
 application = get_wsgi_application()
+
+from jobs.startup import preload  # noqa: E402  (needs the app registry set up above)
+
+preload()